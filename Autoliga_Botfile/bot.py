@@ -1,12 +1,13 @@
 import asyncio
+import hashlib
 import html as html_module
 import logging
 import os
 import re
 import sys
 import django
-from collections import OrderedDict
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from dotenv import load_dotenv
 
 # ── 1. Load .env BEFORE Django setup (settings.py reads env vars) ───────────
@@ -23,9 +24,9 @@ if not _django_apps.ready:
     django.setup()
 
 # ── 3. Django imports (safe only after setup) ────────────────────────────────
+from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import close_old_connections
 from django.db import transaction
 from django.utils import timezone
 from main.models import (Dealer, Product, ProductCategory, TelegramUser,
@@ -33,15 +34,24 @@ from main.models import (Dealer, Product, ProductCategory, TelegramUser,
 from main.services.bot_service import BotService
 
 # ── 4. Third-party imports ───────────────────────────────────────────────────
-from aiogram import Bot, Dispatcher, F, types
+from aiogram import Bot, F, types
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import (FSInputFile, KeyboardButton, ReplyKeyboardMarkup,
                            ReplyKeyboardRemove, InlineKeyboardButton, InlineKeyboardMarkup)
-from asgiref.sync import sync_to_async
-from config import BOT_TOKEN, MEDIA_ROOT, SITE_URL
+from pydantic import ConfigDict
+from config import (BOT_ADMIN_IDS, BOT_MAX_PENDING_UPDATES, BOT_TOKEN, BOT_USER_LANG_TTL, BOT_WORKERS,
+                    CATALOG_CHECK_INTERVAL, CATALOG_REFRESH_INTERVAL,
+                    FSM_FLUSH_INTERVAL, FSM_STATE_TTL, SITE_URL)
+from utils.catalog import CatalogSnapshot
+from utils.db import run_db
+from utils.fsm_storage import DjangoFSMStorage
+from utils.metrics import metrics
+from utils.notify import NotificationQueue
+from utils.scheduler import ChatScheduler, OrderedDispatcher
+from utils.user_lang import UserLanguageCache
 
 
 # ================= LOGGING =================
@@ -60,61 +70,87 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 bot = Bot(token=BOT_TOKEN)
-dp = Dispatcher(storage=MemoryStorage())
-
+# Bitta chat update lari ketma-ket, turli chatlar BOT_WORKERS ta worker da parallel
+dp = OrderedDispatcher(
+    storage=DjangoFSMStorage(ttl=FSM_STATE_TTL, flush_interval=FSM_FLUSH_INTERVAL),
+    scheduler=ChatScheduler(workers=BOT_WORKERS, max_pending=BOT_MAX_PENDING_UPDATES),
+)
 
-class DjangoDBMiddleware:
-    """Refresh stale Django DB connections before each update."""
 
-    async def __call__(self, handler, event, data):
-        close_old_connections()
-        return await handler(event, data)
+# Katalog (brendlar, avtomobillar, dilerlar) — xotiradagi snapshot, fon vazifasida yangilanadi
+catalog = CatalogSnapshot(refresh_interval=CATALOG_REFRESH_INTERVAL, check_interval=CATALOG_CHECK_INTERVAL)
+dp.startup.register(catalog.start)
+dp.shutdown.register(catalog.stop)
 
+# Kechikish statistikasi: update/handler/FSM holati, DB va Telegram API vaqti (/stats)
+dp.update.outer_middleware(metrics.update_middleware)
+dp.message.middleware(metrics.handler_middleware)
+bot.session.middleware(metrics.request_middleware)
+dp.startup.register(metrics.start)
+dp.shutdown.register(metrics.stop)
 
-dp.update.outer_middleware(DjangoDBMiddleware())
+# Test-drayv arizalari haqida guruhga xabar — navbat orqali, javobni kutmasdan
+notifications = NotificationQueue(bot, settings.TELEGRAM_BOT_TOKEN, settings.TELEGRAM_CHAT_ID)
+dp.startup.register(notifications.start)
+dp.shutdown.register(notifications.stop)
 
 # ================= DATABASE FUNCTIONS =================
+# Katalog o'qishlari event loop dan chiqmaydi; foydalanuvchi va test-drayv
+# bilan ishlash — cheklangan DB pool orqali (utils/db.py)
 
 
-@sync_to_async(thread_sensitive=False)
-def get_user_by_telegram_id(telegram_id: int) -> TelegramUser | None:
-    return BotService.get_telegram_user(telegram_id)
+async def get_user_by_telegram_id(telegram_id: int) -> TelegramUser | None:
+    return await run_db(BotService.get_telegram_user, telegram_id)
 
 
-@sync_to_async(thread_sensitive=False)
-def update_or_create_user(telegram_id: int, **kwargs) -> TelegramUser:
-    user, created = BotService.create_or_update_telegram_user(telegram_id, **kwargs)
+async def update_or_create_user(telegram_id: int, **kwargs) -> TelegramUser:
+    user, created = await run_db(BotService.create_or_update_telegram_user, telegram_id, **kwargs)
     return user
 
 
-@sync_to_async(thread_sensitive=False)
-def get_brands(lang: str = "uz") -> list[dict]:
-    return BotService.get_brands(lang)
+async def get_brands(lang: str = "uz") -> list[dict]:
+    return await catalog.brands(lang)
+
+
+async def get_cars_by_brand(brand_id: int, lang: str = "uz") -> list[dict]:
+    return await catalog.cars(brand_id, lang)
+
+
+async def get_car_detail(car_id: int, lang: str = "uz") -> dict | None:
+    return await catalog.car_detail(car_id, lang)
+
+
+async def get_dealers(lang: str = "uz") -> list[dict]:
+    return await catalog.dealers(lang)
+
+
+async def get_test_drive_data(lang: str = "uz") -> dict:
+    return await catalog.test_drive_data(lang)
 
 
-@sync_to_async(thread_sensitive=False)
-def get_cars_by_brand(brand_id: int, lang: str = "uz") -> list[dict]:
-    return BotService.get_cars_by_brand(brand_id, lang)
+def _create_test_drive(data: dict) -> tuple[TestDriveRequest | None, str | None, str | None]:
+    test_drive, error = BotService.create_test_drive_request(data, notify=False)
+    text = BotService.test_drive_notification_text(test_drive) if test_drive else None
+    return test_drive, error, text
 
 
-@sync_to_async(thread_sensitive=False)
-def get_car_detail(car_id: int, lang: str = "uz") -> dict | None:
-    return BotService.get_car_detail(car_id, lang)
+async def create_test_drive_request(data: dict) -> tuple[TestDriveRequest | None, str | None]:
+    test_drive, error, text = await run_db(_create_test_drive, data)
+    if text:
+        notifications.enqueue(text)
+    return test_drive, error
 
 
-@sync_to_async(thread_sensitive=False)
-def get_dealers(lang: str = "uz") -> list[dict]:
-    return BotService.get_dealers(lang)
+async def get_photo_file_id(product_id: int, field: str, image_hash: str) -> str | None:
+    return await run_db(BotService.get_photo_file_id, product_id, field, image_hash)
 
 
-@sync_to_async(thread_sensitive=False)
-def get_test_drive_data(lang: str = "uz") -> dict:
-    return BotService.get_test_drive_form_data(lang)
+async def save_photo_file_id(product_id: int, field: str, image_hash: str, file_id: str) -> None:
+    await run_db(BotService.save_photo_file_id, product_id, field, image_hash, file_id)
 
 
-@sync_to_async(thread_sensitive=False)
-def create_test_drive_request(data: dict) -> tuple[TestDriveRequest | None, str | None]:
-    return BotService.create_test_drive_request(data)
+async def forget_photo_file_id(product_id: int, field: str) -> None:
+    await run_db(BotService.forget_photo_file_id, product_id, field)
 
 
 # ================= HELPERS =================
@@ -131,19 +167,39 @@ def sanitize_name(text):
     return text
 
 
-def get_image_path(relative_url: str) -> str | None:
-    if not relative_url:
-        return None
-    path = relative_url
-    if path.startswith("/media/"):
-        path = path[7:]
-    elif path.startswith("media/"):
-        path = path[6:]
-    safe_path = os.path.normpath(path).lstrip("/\\")
-    full_path = os.path.join(MEDIA_ROOT, safe_path)
-    if not full_path.startswith(os.path.abspath(MEDIA_ROOT)):
-        return None
-    return full_path if os.path.exists(full_path) else None
+# path -> ((size, mtime_ns), sha256): fayl o'zgarmasa qayta o'qilmaydi
+_image_hashes: dict[str, tuple[tuple[int, int], str]] = {}
+
+
+def get_image_hash(image: dict) -> str:
+    # size/mtime — media indeksidan (catalog.media), stat qilinmaydi
+    path, signature = image["path"], (image["size"], image["mtime_ns"])
+    cached = _image_hashes.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    _image_hashes[path] = (signature, digest.hexdigest())
+    return _image_hashes[path][1]
+
+
+async def send_car_photo(message: types.Message, car: dict, field: str, image: dict, **kwargs):
+    """Rasmni Telegram file_id orqali yuborish; faqat rasm o'zgarganda qayta yuklash."""
+    image_hash = await asyncio.to_thread(get_image_hash, image)
+    file_id = await get_photo_file_id(car["id"], field, image_hash)
+    if file_id:
+        try:
+            return await message.answer_photo(photo=file_id, **kwargs)
+        except TelegramBadRequest:
+            # file_id eskirgan (masalan, bot token almashgan) — qayta yuklaymiz
+            await forget_photo_file_id(car["id"], field)
+
+    sent = await message.answer_photo(photo=FSInputFile(image["path"]), **kwargs)
+    if sent.photo:
+        await save_photo_file_id(car["id"], field, image_hash, sent.photo[-1].file_id)
+    return sent
 
 
 # ================= DEALER REGION LABELS =================
@@ -474,8 +530,24 @@ class TestDriveStates(StatesGroup):
 
 
 # ================= KEYBOARDS =================
+# Klaviaturalar o'zgarmas va har xabarda qayta qurilmaydi: statiklari til
+# bo'yicha bir marta (lru_cache), katalogdagilari snapshot yangilanguncha
+# (catalog.derived), sanalar kuniga bir marta.
+
 
-LANG_KEYBOARD = ReplyKeyboardMarkup(
+class FrozenReplyKeyboardMarkup(ReplyKeyboardMarkup):
+    """Handlerlar o'rtasida bo'lishiladigan klaviatura — o'zgartirib bo'lmaydi."""
+    model_config = ConfigDict(frozen=True)
+
+
+def _list_keyboard(texts, back_btn: str, width: int = 1) -> ReplyKeyboardMarkup:
+    buttons = [KeyboardButton(text=t) for t in texts]
+    rows = [buttons[i:i + width] for i in range(0, len(buttons), width)]
+    rows.append([KeyboardButton(text=back_btn)])
+    return FrozenReplyKeyboardMarkup(keyboard=rows, resize_keyboard=True)
+
+
+LANG_KEYBOARD = FrozenReplyKeyboardMarkup(
     keyboard=[
         [KeyboardButton(text="🇺🇿 O'zbekcha"), KeyboardButton(text="🇷🇺 Русский")],
         [KeyboardButton(text="🇺🇸 English")]
@@ -680,24 +752,19 @@ CHANGE_LANG_BTNS = {
 }
 TEST_DRIVE_BTNS = {MESSAGES["uz"]["test_drive_btn"], MESSAGES["ru"]["test_drive_btn"], MESSAGES["en"]["test_drive_btn"]}
 
-class _LRUDict(OrderedDict):
-    """Bounded dict — evicts oldest entry when maxsize exceeded."""
-    def __init__(self, maxsize: int = 5000):
-        self._maxsize = maxsize
-        super().__init__()
+# Til: xotiradagi LRU + TelegramUser.language (utils/user_lang.py)
+user_lang = UserLanguageCache(maxsize=5000, ttl=BOT_USER_LANG_TTL)
 
-    def __setitem__(self, key, value):
-        super().__setitem__(key, value)
-        self.move_to_end(key)
-        if len(self) > self._maxsize:
-            self.popitem(last=False)
 
-
-user_lang: _LRUDict = _LRUDict(maxsize=5000)
+PHONE_KEYBOARD = FrozenReplyKeyboardMarkup(
+    keyboard=[[KeyboardButton(text="📞 Telefon yuborish", request_contact=True)]],
+    resize_keyboard=True,
+)
 
 
+@lru_cache(maxsize=None)
 def get_confirm_keyboard(lang: str) -> ReplyKeyboardMarkup:
-    return ReplyKeyboardMarkup(
+    return FrozenReplyKeyboardMarkup(
         keyboard=[
             [
                 KeyboardButton(text=MESSAGES[lang]["yes_btn"]),
@@ -709,9 +776,10 @@ def get_confirm_keyboard(lang: str) -> ReplyKeyboardMarkup:
     )
 
 
+@lru_cache(maxsize=None)
 def get_main_menu_keyboard(lang: str) -> ReplyKeyboardMarkup:
     if lang == "ru":
-        return ReplyKeyboardMarkup(
+        return FrozenReplyKeyboardMarkup(
             keyboard=[
                 [
                     KeyboardButton(text="🚗 Автомобили"),
@@ -723,7 +791,7 @@ def get_main_menu_keyboard(lang: str) -> ReplyKeyboardMarkup:
             resize_keyboard=True,
         )
     if lang == "en":
-        return ReplyKeyboardMarkup(
+        return FrozenReplyKeyboardMarkup(
             keyboard=[
                 [
                     KeyboardButton(text="🚗 Cars"),
@@ -734,7 +802,7 @@ def get_main_menu_keyboard(lang: str) -> ReplyKeyboardMarkup:
             ],
             resize_keyboard=True,
         )
-    return ReplyKeyboardMarkup(
+    return FrozenReplyKeyboardMarkup(
         keyboard=[
             [
                 KeyboardButton(text="🚗 Mashinalar"),
@@ -790,19 +858,56 @@ def build_car_caption(car: dict, lang: str = "uz") -> str:
 
 def get_date_keyboard(back_btn: str, days: int = 14) -> ReplyKeyboardMarkup:
     """Bugundan boshlab N kunlik sana tugmalari (3 ustunli)"""
-    today = timezone.localtime(timezone.now()).date()
-    rows = []
-    row = []
-    for i in range(days):
-        d = today + timedelta(days=i)
-        row.append(KeyboardButton(text=d.strftime("%d.%m.%Y")))
-        if len(row) == 3:
-            rows.append(row)
-            row = []
-    if row:
-        rows.append(row)
-    rows.append([KeyboardButton(text=back_btn)])
-    return ReplyKeyboardMarkup(keyboard=rows, resize_keyboard=True)
+    return _date_keyboard(back_btn, days, timezone.localtime(timezone.now()).date())
+
+
+@lru_cache(maxsize=8)
+def _date_keyboard(back_btn: str, days: int, today: date) -> ReplyKeyboardMarkup:
+    # Kalitda sana bor — kun o'zgarganda yangisi quriladi, eskisi LRU dan chiqadi
+    dates = [(today + timedelta(days=i)).strftime("%d.%m.%Y") for i in range(days)]
+    return _list_keyboard(dates, back_btn, width=3)
+
+
+@lru_cache(maxsize=None)
+def get_regions_keyboard(lang: str) -> ReplyKeyboardMarkup:
+    regions = UZ_REGIONS.get(lang, UZ_REGIONS["uz"])
+    return _list_keyboard(regions.keys(), MESSAGES[lang]["back_btn"])
+
+
+@lru_cache(maxsize=64)
+def get_districts_keyboard(lang: str, region_name: str) -> ReplyKeyboardMarkup:
+    regions = UZ_REGIONS.get(lang, UZ_REGIONS["uz"])
+    return _list_keyboard(regions.get(region_name, []), MESSAGES[lang]["back_btn"])
+
+
+async def get_brands_keyboard(lang: str) -> ReplyKeyboardMarkup:
+    return await catalog.derived(lang, ("brands_kb",), lambda c: _list_keyboard(
+        [b["name"] for b in c["brands"]], MESSAGES[lang]["back_btn"]
+    ))
+
+
+async def get_cars_keyboard(brand_id: int, lang: str) -> ReplyKeyboardMarkup:
+    return await catalog.derived(lang, ("cars_kb", brand_id), lambda c: _list_keyboard(
+        [car["title"] for car in c["cars"].get(brand_id, [])], MESSAGES[lang]["back_btn"]
+    ))
+
+
+async def get_td_dealers_keyboard(lang: str) -> ReplyKeyboardMarkup:
+    return await catalog.derived(lang, ("td_dealers_kb",), lambda c: _list_keyboard(
+        [d["name"] for d in c["td_data"].get("dealers", [])], MESSAGES[lang]["back_btn"]
+    ))
+
+
+async def get_td_products_keyboard(lang: str) -> ReplyKeyboardMarkup:
+    return await catalog.derived(lang, ("td_products_kb",), lambda c: _list_keyboard(
+        [p["title"] for p in c["td_data"].get("products", [])], MESSAGES[lang]["back_btn"]
+    ))
+
+
+async def get_td_time_keyboard(lang: str) -> ReplyKeyboardMarkup:
+    return await catalog.derived(lang, ("td_time_kb",), lambda c: _list_keyboard(
+        c["td_data"].get("time_slots", []), MESSAGES[lang]["back_btn"], width=3
+    ))
 
 
 # ================= MEDIA BLOCKER =================
@@ -810,7 +915,7 @@ def get_date_keyboard(back_btn: str, days: int = 14) -> ReplyKeyboardMarkup:
 
 @dp.message(~F.text & ~F.contact)
 async def block_unsupported_media(message: types.Message):
-    lang = user_lang.get(message.from_user.id, "uz")
+    lang = await user_lang.get(message.from_user.id)
     await message.answer(MESSAGES[lang]["unsupported"])
 
 
@@ -825,7 +930,7 @@ async def start(message: types.Message, state: FSMContext):
 
     if user_data and user_data.phone and user_data.first_name:
         lang = user_data.language or "uz"
-        user_lang[uid] = lang
+        user_lang.remember(uid, lang)
         await state.clear()
         await message.answer(
             MESSAGES[lang]["welcome_back"], reply_markup=get_main_menu_keyboard(lang)
@@ -835,6 +940,43 @@ async def start(message: types.Message, state: FSMContext):
         await message.answer(MESSAGES["uz"]["choose_lang"], reply_markup=LANG_KEYBOARD)
 
 
+# ================= STATS (adminlar uchun) =================
+
+
+def format_stats(snapshot: dict, top: int = 8) -> str:
+    def table(title: str, group: dict) -> list[str]:
+        lines = [f"<b>{title}</b> (p50 / p95 / max ms, soni)"]
+        for name, s in list(group.items())[:top]:
+            lines.append(
+                f"<code>{html_module.escape(str(name)[:32])}</code>: "
+                f"{s['p50_ms']} / {s['p95_ms']} / {s['max_ms']}, {s['count']}"
+                + (f", xato {s['errors']}" if s["errors"] else "")
+            )
+        return lines
+
+    u, db, q = snapshot["updates"], snapshot["db"], snapshot["queue"]
+    lines = [
+        f"📊 <b>Bot statistikasi</b> (oxirgi {metrics.window} ta namuna)",
+        f"Update: {u['count']}, p50 {u['p50_ms']} ms, p95 {u['p95_ms']} ms, xato {u['errors']}",
+        f"DB: {db['count']} chaqiruv, p50 {db['p50_ms']} ms, p95 {db['p95_ms']} ms",
+        f"Navbat: {q.get('pending', 0)}/{q.get('max_pending', '-')} update, {q.get('chats', 0)} chat, "
+        f"band worker {q.get('busy_workers', 0)}/{q.get('workers', '-')}, "
+        f"kutish p95 {q['wait']['p95_ms']} ms",
+        "",
+        *table("Handlerlar", snapshot["handlers"]),
+        "",
+        *table("FSM holatlari", snapshot["states"]),
+        "",
+        *table("Telegram API", snapshot["api"]),
+    ]
+    return "\n".join(lines)
+
+
+@dp.message(Command("stats"), F.from_user.id.in_(BOT_ADMIN_IDS))
+async def show_stats(message: types.Message):
+    await message.answer(format_stats(metrics.snapshot()), parse_mode="HTML")
+
+
 # ================= TIL O'ZGARTIRISH =================
 
 
@@ -859,11 +1001,7 @@ async def choose_language(message: types.Message, state: FSMContext):
         lang = "ru"
     else:
         lang = "en"
-    user_lang[uid] = lang
-
-    await update_or_create_user(  # ← await qo'shildi
-        uid, language=lang, username=message.from_user.username
-    )
+    await user_lang.set(uid, lang, username=message.from_user.username)
 
     user = await get_user_by_telegram_id(uid)  # ← await qo'shildi
     has_profile = bool(user and user.phone and user.first_name)
@@ -886,7 +1024,7 @@ async def choose_language(message: types.Message, state: FSMContext):
 @dp.message(F.contact)
 async def save_phone(message: types.Message, state: FSMContext):
     uid = message.from_user.id
-    lang = user_lang.get(uid, "uz")
+    lang = await user_lang.get(uid)
 
     if message.contact.user_id != uid:
         await message.answer("❌")
@@ -908,7 +1046,7 @@ async def save_phone(message: types.Message, state: FSMContext):
 
 @dp.message(F.text.in_({"🚗 Mashinalar", "🚗 Автомобили", "🚗 Cars"}))
 async def show_brands(message: types.Message, state: FSMContext):
-    lang = user_lang.get(message.from_user.id, "uz")
+    lang = await user_lang.get(message.from_user.id)
     brands = await get_brands(lang)  # ← await qo'shildi
 
     if not brands:
@@ -918,9 +1056,7 @@ async def show_brands(message: types.Message, state: FSMContext):
     await state.set_state(NavStates.choose_brand)
     await state.update_data(brands={b["name"]: b["id"] for b in brands})
 
-    rows = [[KeyboardButton(text=b["name"])] for b in brands]
-    rows.append([KeyboardButton(text=MESSAGES[lang]["back_btn"])])
-    kb = ReplyKeyboardMarkup(keyboard=rows, resize_keyboard=True)
+    kb = await get_brands_keyboard(lang)
     await message.answer(MESSAGES[lang]["choose_brand"], reply_markup=kb)
 
 
@@ -929,7 +1065,7 @@ async def show_brands(message: types.Message, state: FSMContext):
 
 @dp.message(F.text.in_({"🏢 Dilerlik markazlari", "🏢 Дилерские центры", "🏢 Dealerships"}))
 async def show_dealers(message: types.Message):
-    lang = user_lang.get(message.from_user.id, "uz")
+    lang = await user_lang.get(message.from_user.id)
     dealers = await get_dealers(lang)  # ← await qo'shildi
 
     if not dealers:
@@ -967,7 +1103,7 @@ async def show_dealers(message: types.Message):
 
 @dp.message(F.text.in_(TEST_DRIVE_BTNS))
 async def start_test_drive(message: types.Message, state: FSMContext):
-    lang = user_lang.get(message.from_user.id, "uz")
+    lang = await user_lang.get(message.from_user.id)
 
     td_data = await get_test_drive_data(lang)  # ← await qo'shildi
     dealers = td_data.get("dealers", [])
@@ -975,16 +1111,10 @@ async def start_test_drive(message: types.Message, state: FSMContext):
         await message.answer(MESSAGES[lang].get("td_no_dealers", MESSAGES[lang]["td_error"]))
         return
 
+    # Tanlovlar FSM ga yozilmaydi — klaviatura bilan bir xil joriy snapshot bo'yicha tekshiriladi
     await state.set_state(TestDriveStates.choose_dealer)
-    await state.update_data(
-        td_dealers={d["name"]: d["id"] for d in dealers},
-        td_products={p["title"]: p["id"] for p in td_data.get("products", [])},
-        td_time_slots=td_data.get("time_slots", []),
-    )
 
-    rows = [[KeyboardButton(text=d["name"])] for d in dealers]
-    rows.append([KeyboardButton(text=MESSAGES[lang]["back_btn"])])
-    kb = ReplyKeyboardMarkup(keyboard=rows, resize_keyboard=True)
+    kb = await get_td_dealers_keyboard(lang)
     await message.answer(MESSAGES[lang]["td_choose_dealer"], reply_markup=kb)
 
 
@@ -995,7 +1125,7 @@ async def start_test_drive(message: types.Message, state: FSMContext):
 async def handle_all(message: types.Message, state: FSMContext):
     uid = message.from_user.id
     current_state = await state.get_state()
-    lang = user_lang.get(uid, "uz")
+    lang = await user_lang.get(uid)
     back_btn = MESSAGES[lang]["back_btn"]
     yes_btn = MESSAGES[lang]["yes_btn"]
     no_btn = MESSAGES[lang]["no_btn"]
@@ -1025,23 +1155,12 @@ async def handle_all(message: types.Message, state: FSMContext):
             )
         elif current_state in (RegStates.confirm_region, RegStates.district):
             await state.set_state(RegStates.region)
-            regions = UZ_REGIONS.get(lang, UZ_REGIONS["uz"])
-            kb = ReplyKeyboardMarkup(
-                keyboard=[[KeyboardButton(text=r)] for r in regions.keys()]
-                + [[KeyboardButton(text=back_btn)]],
-                resize_keyboard=True,
-            )
+            kb = get_regions_keyboard(lang)
             await message.answer(MESSAGES[lang]["choose_region"], reply_markup=kb)
         elif current_state in (RegStates.confirm_district, RegStates.phone):
             data = await state.get_data()
             region_name = data.get("reg_region", "")
-            regions = UZ_REGIONS.get(lang, UZ_REGIONS["uz"])
-            districts = regions.get(region_name, [])
-            kb = ReplyKeyboardMarkup(
-                keyboard=[[KeyboardButton(text=d)] for d in districts]
-                + [[KeyboardButton(text=back_btn)]],
-                resize_keyboard=True,
-            )
+            kb = get_districts_keyboard(lang, region_name)
             await state.set_state(RegStates.district)
             await message.answer(MESSAGES[lang]["choose_district"], reply_markup=kb)
         elif current_state == NavStates.choose_brand:
@@ -1054,9 +1173,7 @@ async def handle_all(message: types.Message, state: FSMContext):
             if brands:
                 await state.set_state(NavStates.choose_brand)
                 await state.update_data(brands={b["name"]: b["id"] for b in brands})
-                rows = [[KeyboardButton(text=b["name"])] for b in brands]
-                rows.append([KeyboardButton(text=back_btn)])
-                kb = ReplyKeyboardMarkup(keyboard=rows, resize_keyboard=True)
+                kb = await get_brands_keyboard(lang)
                 await message.answer(MESSAGES[lang]["choose_brand"], reply_markup=kb)
             else:
                 await state.clear()
@@ -1096,9 +1213,7 @@ async def handle_all(message: types.Message, state: FSMContext):
             brands=brands_map, cars={c["title"]: c["id"] for c in cars}
         )
 
-        rows = [[KeyboardButton(text=c["title"])] for c in cars]
-        rows.append([KeyboardButton(text=back_btn)])
-        kb = ReplyKeyboardMarkup(keyboard=rows, resize_keyboard=True)
+        kb = await get_cars_keyboard(brand_id, lang)
         await message.answer(
             f"{html_module.escape(text)} — {MESSAGES[lang]['choose_model']}",
             reply_markup=kb,
@@ -1128,12 +1243,13 @@ async def handle_all(message: types.Message, state: FSMContext):
         inline_button = InlineKeyboardButton(text=button_text, url=site_url)
         inline_kb = InlineKeyboardMarkup(inline_keyboard=[[inline_button]])
 
-        image_url = car.get("card_image") or car.get("main_image")
-        image_path = get_image_path(image_url) if image_url else None
+        image_field = "card_image" if car.get("card_image") else "main_image"
+        image_url = car.get(image_field)
+        image = await catalog.media(image_url) if image_url else None
 
-        if image_path:
-            await message.answer_photo(
-                photo=FSInputFile(image_path), caption=caption, reply_markup=inline_kb
+        if image:
+            await send_car_photo(
+                message, car, image_field, image, caption=caption, reply_markup=inline_kb
             )
         else:
             await message.answer(caption, reply_markup=inline_kb)
@@ -1195,12 +1311,7 @@ async def handle_all(message: types.Message, state: FSMContext):
                 uid, age=data.get("reg_age")
             )  # ← await qo'shildi
             await state.set_state(RegStates.region)
-            regions = UZ_REGIONS.get(lang, UZ_REGIONS["uz"])
-            kb = ReplyKeyboardMarkup(
-                keyboard=[[KeyboardButton(text=r)] for r in regions.keys()]
-                + [[KeyboardButton(text=back_btn)]],
-                resize_keyboard=True,
-            )
+            kb = get_regions_keyboard(lang)
             await message.answer(MESSAGES[lang]["choose_region"], reply_markup=kb)
         elif text == no_btn:
             await state.set_state(RegStates.age)
@@ -1231,23 +1342,12 @@ async def handle_all(message: types.Message, state: FSMContext):
         if text == yes_btn:
             data = await state.get_data()
             region_name = data.get("reg_region", "")
-            regions = UZ_REGIONS.get(lang, UZ_REGIONS["uz"])
-            districts = regions.get(region_name, [])
-            kb = ReplyKeyboardMarkup(
-                keyboard=[[KeyboardButton(text=d)] for d in districts]
-                + [[KeyboardButton(text=back_btn)]],
-                resize_keyboard=True,
-            )
+            kb = get_districts_keyboard(lang, region_name)
             await state.set_state(RegStates.district)
             await message.answer(MESSAGES[lang]["choose_district"], reply_markup=kb)
         elif text == no_btn:
             await state.set_state(RegStates.region)
-            regions = UZ_REGIONS.get(lang, UZ_REGIONS["uz"])
-            kb = ReplyKeyboardMarkup(
-                keyboard=[[KeyboardButton(text=r)] for r in regions.keys()]
-                + [[KeyboardButton(text=back_btn)]],
-                resize_keyboard=True,
-            )
+            kb = get_regions_keyboard(lang)
             await message.answer(MESSAGES[lang]["choose_region"], reply_markup=kb)
         else:
             await message.answer(MESSAGES[lang]["choose_from_list"])
@@ -1280,23 +1380,11 @@ async def handle_all(message: types.Message, state: FSMContext):
             )
             await update_or_create_user(uid, region=region_full)  # ← await qo'shildi
             await state.set_state(RegStates.phone)
-            kb = ReplyKeyboardMarkup(
-                keyboard=[
-                    [KeyboardButton(text="📞 Telefon yuborish", request_contact=True)]
-                ],
-                resize_keyboard=True,
-            )
-            await message.answer(MESSAGES[lang]["send_phone"], reply_markup=kb)
+            await message.answer(MESSAGES[lang]["send_phone"], reply_markup=PHONE_KEYBOARD)
         elif text == no_btn:
             data = await state.get_data()
             region_name = data.get("reg_region", "")
-            regions = UZ_REGIONS.get(lang, UZ_REGIONS["uz"])
-            districts = regions.get(region_name, [])
-            kb = ReplyKeyboardMarkup(
-                keyboard=[[KeyboardButton(text=d)] for d in districts]
-                + [[KeyboardButton(text=back_btn)]],
-                resize_keyboard=True,
-            )
+            kb = get_districts_keyboard(lang, region_name)
             await state.set_state(RegStates.district)
             await message.answer(MESSAGES[lang]["choose_district"], reply_markup=kb)
         else:
@@ -1305,28 +1393,26 @@ async def handle_all(message: types.Message, state: FSMContext):
 
     # ===== TEST-DRAYV: DEALER =====
     if current_state == TestDriveStates.choose_dealer:
-        data = await state.get_data()
-        dealers_map = data.get("td_dealers", {})
-        if text not in dealers_map:
-            await message.answer(MESSAGES[lang]["choose_from_list"])
+        dealer_id = await catalog.test_drive_choice(lang, "dealers", text)
+        if dealer_id is None:
+            # Katalog yangilangan bo'lishi mumkin — joriy ro'yxat qayta yuboriladi
+            kb = await get_td_dealers_keyboard(lang)
+            await message.answer(MESSAGES[lang]["choose_from_list"], reply_markup=kb)
             return
-        await state.update_data(td_dealer_id=dealers_map[text], td_dealer_name=text)
-        products_map = data.get("td_products", {})
-        rows = [[KeyboardButton(text=p)] for p in products_map.keys()]
-        rows.append([KeyboardButton(text=back_btn)])
-        kb = ReplyKeyboardMarkup(keyboard=rows, resize_keyboard=True)
+        await state.update_data(td_dealer_id=dealer_id, td_dealer_name=text)
+        kb = await get_td_products_keyboard(lang)
         await state.set_state(TestDriveStates.choose_product)
         await message.answer(MESSAGES[lang]["td_choose_product"], reply_markup=kb)
         return
 
     # ===== TEST-DRAYV: PRODUCT =====
     if current_state == TestDriveStates.choose_product:
-        data = await state.get_data()
-        products_map = data.get("td_products", {})
-        if text not in products_map:
-            await message.answer(MESSAGES[lang]["choose_from_list"])
+        product_id = await catalog.test_drive_choice(lang, "products", text)
+        if product_id is None:
+            kb = await get_td_products_keyboard(lang)
+            await message.answer(MESSAGES[lang]["choose_from_list"], reply_markup=kb)
             return
-        await state.update_data(td_product_id=products_map[text], td_product_name=text)
+        await state.update_data(td_product_id=product_id, td_product_name=text)
         await state.set_state(TestDriveStates.choose_date)
         await message.answer(
             MESSAGES[lang]["td_choose_date"], reply_markup=get_date_keyboard(back_btn)
@@ -1344,30 +1430,19 @@ async def handle_all(message: types.Message, state: FSMContext):
         except ValueError:
             await message.answer(MESSAGES[lang]["td_invalid_date"])
             return
-        await state.update_data(td_date=parsed, td_date_display=text)
-        data = await state.get_data()
-        time_slots = data.get("td_time_slots", [])
-        rows = []
-        row = []
-        for ts in time_slots:
-            row.append(KeyboardButton(text=ts))
-            if len(row) == 3:
-                rows.append(row)
-                row = []
-        if row:
-            rows.append(row)
-        rows.append([KeyboardButton(text=back_btn)])
-        kb = ReplyKeyboardMarkup(keyboard=rows, resize_keyboard=True)
+        # FSM data JSON da saqlanadi — sana ISO satr ko'rinishida
+        await state.update_data(td_date=parsed.isoformat(), td_date_display=text)
+        kb = await get_td_time_keyboard(lang)
         await state.set_state(TestDriveStates.choose_time)
         await message.answer(MESSAGES[lang]["td_choose_time"], reply_markup=kb)
         return
 
     # ===== TEST-DRAYV: TIME =====
     if current_state == TestDriveStates.choose_time:
-        data = await state.get_data()
-        time_slots = data.get("td_time_slots", [])
-        if text not in time_slots:
-            await message.answer(MESSAGES[lang]["choose_from_list"])
+        td_data = await get_test_drive_data(lang)
+        if text not in td_data.get("time_slots", []):
+            kb = await get_td_time_keyboard(lang)
+            await message.answer(MESSAGES[lang]["choose_from_list"], reply_markup=kb)
             return
         await state.update_data(td_time=text)
 
@@ -1400,7 +1475,7 @@ async def handle_all(message: types.Message, state: FSMContext):
                 "phone": data.get("td_phone"),
                 "dealer_id": data.get("td_dealer_id"),  # ← ForeignKey uchun _id
                 "product_id": data.get("td_product_id"),  # ← ForeignKey uchun _id
-                "preferred_date": data.get("td_date"),
+                "preferred_date": date.fromisoformat(data["td_date"]) if data.get("td_date") else None,
                 "preferred_time": data.get("td_time"),
                 "agree_terms": True,
             }
@@ -1452,6 +1527,21 @@ async def main():
             "🔹 Записаться на тест-драйв"
         )
     )
+    if settings.BOT_MODE == "webhook":
+        # Update lar sayt ASGI jarayoniga keladi (myproject/asgi.py) — faqat webhook o'rnatamiz
+        from webhook import webhook_url
+
+        await bot.set_webhook(
+            url=webhook_url(),
+            secret_token=settings.BOT_WEBHOOK_SECRET or None,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+        logger.info("Webhook o'rnatildi: %s", webhook_url())
+        await bot.session.close()
+        return
+
+    # Avval o'rnatilgan webhook polling ga xalaqit beradi
+    await bot.delete_webhook()
     await dp.start_polling(bot, handle_signals=False)
 
 
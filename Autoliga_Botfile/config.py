@@ -22,6 +22,24 @@ if not BOT_TOKEN:
 # Sayt URL
 SITE_URL = os.getenv("SITE_URL", "https://autoliga.uz")
 
+# FSM (suhbat holati) — DB da saqlanadi
+FSM_STATE_TTL = int(os.getenv("FSM_STATE_TTL", 86400))  # soniya: tashlab ketilgan suhbat o'chiriladi
+FSM_FLUSH_INTERVAL = float(os.getenv("FSM_FLUSH_INTERVAL", 2))  # soniya: DB ga yozish oralig'i
+
+# Katalog snapshot (utils/catalog.py)
+CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", 300))  # soniya: majburiy qayta qurish
+CATALOG_CHECK_INTERVAL = float(os.getenv("CATALOG_CHECK_INTERVAL", 5))  # soniya: o'zgarishni tekshirish
+
+# Update larni ishlash (utils/scheduler.py): bitta chat — ketma-ket, turli chatlar — parallel
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", 8))  # bir vaqtda ishlanadigan chatlar soni
+BOT_MAX_PENDING_UPDATES = int(os.getenv("BOT_MAX_PENDING_UPDATES", 1000))  # navbat to'lsa qabul kutadi
+
+# Foydalanuvchi tili (utils/user_lang.py): xotiradagi til shu soniyadan keyin DB dan qayta o'qiladi
+BOT_USER_LANG_TTL = float(os.getenv("BOT_USER_LANG_TTL", 60))
+
+# /stats buyrug'i ruxsat etilgan Telegram ID lar (vergul bilan): BOT_ADMIN_IDS=123,456
+BOT_ADMIN_IDS = {int(x) for x in os.getenv("BOT_ADMIN_IDS", "").split(",") if x.strip()}
+
 # Django settings bilan ulanish
 try:
     from django.conf import settings
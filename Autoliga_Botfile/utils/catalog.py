@@ -0,0 +1,152 @@
+"""
+Bot katalogining jarayon ichidagi snapshot i (brendlar, avtomobillar, dilerlar,
+test-drayv formasi).
+
+O'qishlar event loop dan chiqmaydi: ma'lumot xotiradagi dict dan olinadi.
+Snapshot fon vazifasida yangilanadi:
+
+- har check_interval soniyada bot cache avlodi (BotService.cache_generation)
+  tekshiriladi — admin da katalog o'zgarsa signal uni oshiradi va snapshot
+  qayta quriladi
+- avlod o'zgarmasa ham har refresh_interval soniyada qayta quriladi
+
+Snapshot hali bo'lmagan til birinchi so'rovda (read-through) quriladi.
+Snapshot dan hosil qilingan obyektlar (bot klaviaturalari) derived() orqali
+bir marta quriladi va o'sha til snapshot i bilan birga almashtiriladi.
+
+Mahsulot rasmlari indeksi (MediaIndex: URL -> yo'l, hajm, mtime) ham snapshot
+bilan birga olinadi — mashina ko'rsatilganda fayl tizimiga murojaat qilinmaydi.
+"""
+
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+
+from main.services.bot_service import BotService
+from main.services.media_index import MediaIndex
+
+from utils.db import run_db
+
+logger = logging.getLogger(__name__)
+
+LANGUAGES = ("uz", "ru", "en")
+
+# Test-drayv klaviaturasidagi tugma matni qaysi maydondan olinadi
+TD_CHOICE_LABELS = {"dealers": "name", "products": "title"}
+
+
+def _build(languages) -> dict[str, dict]:
+    return {lang: BotService.get_catalog(lang) for lang in languages}
+
+
+class CatalogSnapshot:
+    """Xotiradagi katalog: o'qish — dict dan, yangilash — fon vazifasida."""
+
+    def __init__(self, refresh_interval: float = 300, check_interval: float = 5) -> None:
+        self.refresh_interval = refresh_interval
+        self.check_interval = check_interval
+        self._data: dict[str, dict] = {}
+        self._derived: dict[tuple, object] = {}
+        self._media: dict[str, dict] = {}
+        self._generation = None
+        self._built_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    # ============ LIFECYCLE (dp.startup / dp.shutdown) ============
+
+    async def start(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Katalog snapshot yuklanmadi: {e}", exc_info=True)
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def refresh(self, languages=None) -> None:
+        """Snapshot ni DB/cache dan qayta qurish va bir martada almashtirish."""
+        async with self._lock:
+            languages = tuple(languages or set(LANGUAGES) | set(self._data))
+            full = set(languages) >= set(self._data)
+            generation = await run_db(BotService.cache_generation)
+            data = await run_db(_build, languages)
+            self._media = await run_db(MediaIndex.get_index)
+            self._data = {**self._data, **data}
+            self._derived = {k: v for k, v in self._derived.items() if k[0] not in data}
+            # Bitta til qo'shilganda boshqalar eski avlodda qoladi — avlod belgilanmaydi
+            if full:
+                self._generation = generation
+                self._built_at = time.monotonic()
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                generation = await run_db(BotService.cache_generation)
+                expired = time.monotonic() - self._built_at > self.refresh_interval
+                if generation != self._generation or expired:
+                    await self.refresh()
+            except Exception as e:
+                logger.error(f"Katalog snapshot yangilanmadi: {e}")
+
+    # ============ READ ============
+
+    async def _catalog(self, lang: str) -> dict:
+        catalog = self._data.get(lang)
+        if catalog is None:
+            await self.refresh([lang])
+            catalog = self._data[lang]
+        return catalog
+
+    async def brands(self, lang: str = "uz") -> list[dict]:
+        return (await self._catalog(lang))["brands"]
+
+    async def cars(self, brand_id: int, lang: str = "uz") -> list[dict]:
+        return (await self._catalog(lang))["cars"].get(brand_id, [])
+
+    async def car_detail(self, car_id: int, lang: str = "uz") -> dict | None:
+        return (await self._catalog(lang))["car_details"].get(car_id)
+
+    async def dealers(self, lang: str = "uz") -> list[dict]:
+        return (await self._catalog(lang))["dealers"]
+
+    async def test_drive_data(self, lang: str = "uz") -> dict:
+        return (await self._catalog(lang))["td_data"]
+
+    async def test_drive_choice(self, lang: str, kind: str, text: str) -> int | None:
+        """
+        Test-drayv tugmasi (kind: dealers/products) matni -> id, joriy snapshot bo'yicha.
+
+        Klaviatura ham shu snapshot dan quriladi — suhbat o'rtasida katalog
+        yangilansa ham ko'rsatilgan tugmalar va tekshiruv bir manbadan.
+        """
+        label = TD_CHOICE_LABELS[kind]
+        choices = await self.derived(lang, ("td_choices", kind), lambda c: {
+            item[label]: item["id"] for item in c["td_data"].get(kind, [])
+        })
+        return choices.get(text)
+
+    async def media(self, url: str) -> dict | None:
+        """Rasm fayli (path, size, mtime_ns); fayl yo'q bo'lsa None."""
+        entry = self._media.get(url)
+        if entry is None:
+            # Indeks snapshot dan keyin qo'shilgan rasm — bir marta tekshiriladi
+            name = url.removeprefix(settings.MEDIA_URL)
+            entry = self._media[url] = await asyncio.to_thread(MediaIndex.resolve, name)
+        return entry if entry["path"] else None
+
+    async def derived(self, lang: str, key: tuple, build):
+        """build(catalog) natijasi — til snapshot i yangilanguncha qayta ishlatiladi."""
+        catalog = await self._catalog(lang)
+        cache_key = (lang, *key)
+        value = self._derived.get(cache_key)
+        if value is None:
+            value = self._derived[cache_key] = build(catalog)
+        return value
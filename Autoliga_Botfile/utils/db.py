@@ -0,0 +1,53 @@
+"""
+Bot uchun DB chaqiruvlari — cheklangan thread pool orqali.
+
+Har bir ORM chaqiruvini sync_to_async(thread_sensitive=False) ga o'rash har
+update da yangi executor ishi va (close_old_connections bilan, CONN_MAX_AGE=0)
+yangi PostgreSQL ulanishini anglatardi. Bu yerda:
+
+- faqat DB_WORKERS ta thread — demak ko'pi bilan shuncha doimiy ulanish
+- ulanishlar thread da ochiq qoladi; server uni uzib qo'ygan bo'lsa,
+  chaqiruv bir marta yangi ulanish bilan qaytariladi
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.db import InterfaceError, OperationalError, connection
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DB_WORKERS = 4
+
+_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="bot-db")
+
+
+def _call(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    except (InterfaceError, OperationalError) as e:
+        if connection.in_atomic_block:
+            raise
+        # Uzilgan doimiy ulanish — yopib, bir marta qayta urinamiz
+        logger.warning(f"Bot DB ulanishi qayta ochilmoqda: {e}")
+        connection.close()
+        return func(*args, **kwargs)
+
+
+async def run_db(func, *args, **kwargs):
+    """ORM funksiyasini bot DB pool ida bajarish (event loop bloklanmaydi)."""
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    failed = True
+    try:
+        result = await loop.run_in_executor(_executor, partial(_call, func, args, kwargs))
+        failed = False
+        return result
+    finally:
+        # Navbatda kutish ham kiradi — handler nuqtai nazaridan DB vaqti
+        metrics.record_db((time.perf_counter() - started) * 1000, failed)
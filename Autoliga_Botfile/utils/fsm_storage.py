@@ -0,0 +1,233 @@
+"""
+aiogram FSM storage — Django DB (main.BotFSMState) asosida.
+
+MemoryStorage bot qayta ishga tushganda (run_bot.sh tsikli) ro'yxatdan o'tish
+va test-drayv suhbatlarini yo'qotadi va cheksiz o'sadi. Bu storage:
+
+- holatni DB da saqlaydi: restart dan keyin suhbat davom etadi
+- write-behind: o'zgarishlar xotirada yig'iladi va har flush_interval
+  soniyada bitta bulk upsert bilan yoziladi (har xabarga DB yozuvi emas)
+- TTL: ttl soniya tegilmagan holatlar tashlab ketilgan hisoblanadi va o'chiriladi
+- xotirada faqat max_entries ta oxirgi suhbat (LRU) saqlanadi
+- DB — asosiy manba: xotiradagi (yozilgan, dirty emas) yozuvga ishonishdan oldin
+  DB qatorining updated_at i tekshiriladi. Suhbat boshqa jarayonda davom etgan
+  bo'lsa (webhook workerlari, bot restart), holat DB dan qayta o'qiladi.
+  Tekshiruv har update da kalit uchun bir marta (update_scope —
+  OrderedDispatcher.feed_update ochadi), har get_state/get_data da emas
+  Yozilmagan o'zgarishlar faqat shu jarayonda — bitta chat update lari bir
+  vaqtda bitta jarayonda ishlanishi kerak (utils/scheduler.py, webhook
+  rejimida — utils/inbox.py)
+
+Ma'lumotlar JSONField da saqlanadi, shuning uchun data faqat JSON turlari
+(str, int, float, bool, None, list, dict) bo'lishi kerak.
+"""
+
+import asyncio
+import contextvars
+import copy
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from django.utils import timezone
+
+from main.models import BotFSMState
+
+from utils.db import run_db
+
+logger = logging.getLogger(__name__)
+
+# Joriy update da DB versiyasi tekshirilgan kalitlar; None — update dan tashqarida (har safar tekshiriladi)
+_checked: contextvars.ContextVar[set | None] = contextvars.ContextVar("fsm_checked_keys", default=None)
+
+
+class DjangoFSMStorage(BaseStorage):
+    """Persistent FSM storage: xotira (LRU) + DB ga kechiktirilgan yozish."""
+
+    # Eskirgan qatorlarni DB dan o'chirish oralig'i (soniya)
+    PURGE_INTERVAL = 600
+
+    def __init__(
+        self,
+        ttl: int = 86400,
+        flush_interval: float = 2.0,
+        max_entries: int = 10000,
+        key_builder: KeyBuilder | None = None,
+    ) -> None:
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+
+        # key -> [state, data, touched_at, DB dagi updated_at (qator yo'q — None)]
+        self._entries: OrderedDict[str, list] = OrderedDict()
+        self._dirty: set[str] = set()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+        self._last_purge = 0.0
+
+    # ============ FSM API ============
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        entry = await self._load(key)
+        entry[0] = state.state if isinstance(state, State) else state
+        self._touch(key, entry)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return (await self._load(key))[0]
+
+    async def set_data(self, key: StorageKey, data: dict) -> None:
+        if not isinstance(data, dict):
+            raise TypeError(f"Data must be a dict, got {type(data).__name__}")
+        entry = await self._load(key)
+        entry[1] = copy.deepcopy(data)
+        self._touch(key, entry)
+
+    async def get_data(self, key: StorageKey) -> dict:
+        return copy.deepcopy((await self._load(key))[1])
+
+    @staticmethod
+    @contextmanager
+    def update_scope():
+        """Bitta update ishlanishi: kalit DB versiyasi birinchi o'qishda tekshiriladi."""
+        token = _checked.set(set())
+        try:
+            yield
+        finally:
+            _checked.reset(token)
+
+    async def close(self) -> None:
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+    # ============ WRITE-BEHIND ============
+
+    async def flush(self) -> None:
+        """Yig'ilgan o'zgarishlarni DB ga yozish."""
+        async with self._flush_lock:
+            if not self._dirty:
+                await self._maybe_purge()
+                return
+            keys, self._dirty = self._dirty, set()
+            rows = {k: tuple(self._entries[k][:3]) for k in keys if k in self._entries}
+            try:
+                versions = await run_db(self._write, rows)
+            except Exception as e:
+                # Keyingi flush da qayta urinish
+                self._dirty |= keys
+                logger.error(f"FSM storage flush xatosi: {e}")
+                return
+            for k, version in versions.items():
+                if k in self._entries:
+                    self._entries[k][3] = version
+            await self._maybe_purge()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def _touch(self, key: StorageKey, entry: list) -> None:
+        k = self.key_builder.build(key)
+        entry[2] = time.time()
+        self._dirty.add(k)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    @staticmethod
+    def _write(rows: dict) -> dict:
+        """Upsert/delete; {key: DB dagi yangi updated_at (o'chirilgan — None)}"""
+        upserts, deletes, versions = [], [], {}
+        for k, (state, data, touched_at) in rows.items():
+            if state is None and not data:
+                deletes.append(k)
+                versions[k] = None
+            else:
+                updated_at = datetime.fromtimestamp(touched_at, tz=dt_timezone.utc)
+                upserts.append(BotFSMState(key=k, state=state, data=data, updated_at=updated_at))
+                versions[k] = updated_at
+        if upserts:
+            BotFSMState.objects.bulk_create(
+                upserts,
+                update_conflicts=True,
+                unique_fields=['key'],
+                update_fields=['state', 'data', 'updated_at'],
+            )
+        if deletes:
+            BotFSMState.objects.filter(key__in=deletes).delete()
+        return versions
+
+    async def _maybe_purge(self) -> None:
+        if time.time() - self._last_purge < self.PURGE_INTERVAL:
+            return
+        self._last_purge = time.time()
+        cutoff = timezone.now() - timedelta(seconds=self.ttl)
+        try:
+            await run_db(self._purge, cutoff)
+        except Exception as e:
+            logger.error(f"FSM storage purge xatosi: {e}")
+
+    @staticmethod
+    def _purge(cutoff) -> None:
+        deleted, _ = BotFSMState.objects.filter(updated_at__lt=cutoff).delete()
+        if deleted:
+            logger.info(f"FSM storage: {deleted} ta eskirgan holat o'chirildi")
+
+    # ============ READ ============
+
+    async def _load(self, key: StorageKey) -> list:
+        k = self.key_builder.build(key)
+        checked = _checked.get()
+        entry = self._entries.get(k)
+        if entry is not None and k not in self._dirty and (checked is None or k not in checked):
+            # Boshqa jarayon yozgan (yoki purge o'chirgan) bo'lsa — xotiradagi eskirgan
+            version = await run_db(self._fetch_version, k)
+            if version != entry[3] and k not in self._dirty:
+                self._entries.pop(k, None)
+                entry = None
+        if entry is None:
+            loaded = await run_db(self._fetch, k, self.ttl)
+            # await paytida boshqa update shu kalitni yuklagan bo'lishi mumkin
+            entry = self._entries.get(k)
+            if entry is None:
+                entry = self._entries[k] = loaded
+                self._evict()
+        elif entry[2] < time.time() - self.ttl:
+            # Tashlab ketilgan suhbat — bo'sh holatdan boshlanadi
+            entry[0], entry[1] = None, {}
+        if checked is not None:
+            checked.add(k)
+        self._entries.move_to_end(k)
+        return entry
+
+    @staticmethod
+    def _fetch(k: str, ttl: int) -> list:
+        row = BotFSMState.objects.filter(key=k).values_list('state', 'data', 'updated_at').first()
+        if row is None:
+            return [None, {}, time.time(), None]
+        state, data, updated_at = row
+        if updated_at < timezone.now() - timedelta(seconds=ttl):
+            # Tashlab ketilgan suhbat (purge hali o'chirmagan) — bo'sh holat
+            return [None, {}, time.time(), updated_at]
+        return [state, data or {}, updated_at.timestamp(), updated_at]
+
+    @staticmethod
+    def _fetch_version(k: str):
+        return BotFSMState.objects.filter(key=k).values_list('updated_at', flat=True).first()
+
+    def _evict(self) -> None:
+        """LRU: eng eski, DB ga yozilgan (dirty emas) suhbatlarni xotiradan chiqarish."""
+        if len(self._entries) <= self.max_entries:
+            return
+        # Oxirgi (hozir yuklangan) kalit chiqarilmaydi
+        for k in list(self._entries)[:-1]:
+            if len(self._entries) <= self.max_entries:
+                break
+            if k not in self._dirty:
+                del self._entries[k]
@@ -0,0 +1,245 @@
+"""
+Webhook update lari navbati (main.BotUpdate) — barcha ASGI workerlar uchun bitta iste'molchi.
+
+Telegram update larni sayt workerlariga tasodifiy taqsimlaydi. Har worker
+update ni o'z dp sida ishlasa, bitta chatning ketma-ket ikki update i turli
+jarayonlarda parallel ishlanardi — utils/scheduler.py tartibi faqat jarayon
+ichida. Shuning uchun update larni faqat lease egasi (main.BotLease, lease_ttl
+soniya, har aylanishda uzaytiriladi) dp.enqueue_update ga beradi — chat
+tartibi va backpressure o'sha jarayonning ChatScheduler ida:
+
+- egasiga kelgan update to'g'ridan-to'g'ri dp ga beriladi (DB ga yozilmaydi,
+  poll kutilmaydi); oldin boshqa workerlardan kelib olinmagan update lar
+  bo'lsa, avval ular olinadi — update_id tartibi saqlanadi
+- boshqa worker update ni BotUpdate jadvaliga yozadi va 200 qaytaradi;
+  update_id — primary key, Telegram qayta yuborgani yozilmaydi. Egasi
+  ularni poll_interval da update_id tartibida oladi
+- dedup: dp ga berilgan update umumiy cache da dedup_window soniya
+  belgilanadi (tg:update:<id>) — qayta yuborilgan update qaysi workerga
+  kelmasin ikkinchi marta ishlanmaydi
+- enqueue_update backpressure da kutsa ham lease fonda uzaytiriladi; lease
+  yo'qolsa qolgan update lar navbatga qaytariladi. Qatorlar
+  SELECT ... FOR UPDATE SKIP LOCKED bilan olinadi — ikki jarayon bitta
+  update ni ikki marta ololmaydi
+- egasi to'xtasa lease bo'shatiladi (yoki muddati tugaydi) — boshqa worker
+  uni oladi va olinmagan update lardan davom etadi
+- olingan update lar dedup_window soniyadan keyin o'chiriladi
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+
+from aiogram.types import Update
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from pydantic import ValidationError
+
+from main.models import BotLease, BotUpdate
+
+from utils.db import run_db
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookInbox:
+    """DB navbati: yozish — boshqa workerlar, o'qish va dp ga berish — faqat lease egasi."""
+
+    LEASE_NAME = "bot:webhook"
+    # Olingan update larni o'chirish oralig'i (soniya)
+    PURGE_INTERVAL = 60
+
+    def __init__(
+        self,
+        bot,
+        dp,
+        lease_ttl: float = 15,
+        poll_interval: float = 0.5,
+        batch_size: int = 100,
+        dedup_window: int = 600,
+    ) -> None:
+        self.bot = bot
+        self.dp = dp
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.dedup_window = dedup_window
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.is_owner = False
+        # Navbatdan olish va to'g'ridan-to'g'ri berish bir-biriga aralashmasin (update_id tartibi)
+        self._dispatch_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._last_purge = 0.0
+        # Lease oxirgi marta uzaytirilgan vaqt (time.monotonic)
+        self._renewed_at = 0.0
+
+    # ============ WEBHOOK SO'ROVI ============
+
+    async def put(self, update_id: int, data: dict, update: Update | None = None) -> None:
+        """Egasi — dp ga beradi, boshqa worker — navbatga yozadi."""
+        if self.is_owner:
+            async with self._dispatch_lock:
+                # Boshqa workerlardan kelib olinmagan update lar oldinroq kelgan — avval ular
+                while self.is_owner and await self._consume() == self.batch_size:
+                    pass
+                if self.is_owner:
+                    if update is None:
+                        update = Update.model_validate(data, context={"bot": self.bot})
+                    await self._dispatch(update)
+                    return
+        await run_db(self._store, update_id, data)
+
+    async def _dispatch(self, update: Update) -> bool:
+        """dp ga berish; qayta yuborilgan (allaqachon berilgan) bo'lsa False."""
+        seen_key = f"tg:update:{update.update_id}"
+        if not await run_db(cache.add, seen_key, 1, self.dedup_window):
+            return False
+        try:
+            await self.dp.enqueue_update(self.bot, update)
+        except Exception:
+            # dp ga yetmadi — belgi olib tashlanadi, update qayta olinadi yoki yuboriladi
+            await run_db(cache.delete, seen_key)
+            raise
+        return True
+
+    @staticmethod
+    def _store(update_id: int, data: dict) -> None:
+        BotUpdate.objects.bulk_create([BotUpdate(update_id=update_id, data=data)], ignore_conflicts=True)
+
+    # ============ LIFECYCLE (lifespan startup / shutdown) ============
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_owner:
+            # Boshqa worker lease muddatini kutmasdan davom etsin
+            self.is_owner = False
+            try:
+                await run_db(self._release, self.LEASE_NAME, self.owner)
+            except Exception as e:
+                logger.error(f"Webhook lease bo'shatilmadi: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            taken = 0
+            try:
+                await self._renew()
+                if self.is_owner:
+                    taken = await self.consume()
+                    await self._purge_taken()
+            except Exception as e:
+                logger.error(f"Webhook navbati xatosi: {e}", exc_info=True)
+            if taken == self.batch_size:
+                continue  # navbatda yana bor
+            # Egasi tez-tez tekshiradi, qolganlar — lease muddati ichida bir necha marta
+            await asyncio.sleep(self.poll_interval if self.is_owner else self.lease_ttl / 3)
+
+    # ============ O'QISH (lease egasi) ============
+
+    async def consume(self) -> int:
+        """Olinmagan update larni tartib bilan dp ga berish; nechta olingani."""
+        async with self._dispatch_lock:
+            return await self._consume()
+
+    async def _consume(self) -> int:
+        rows = await run_db(self._take, self.batch_size)
+        if not rows:
+            return 0
+        keeper = asyncio.create_task(self._keep_lease())
+        done = 0
+        try:
+            for update_id, data in rows:
+                if not self.is_owner:
+                    # Lease boshqa workerga o'tdi — qolganlarini u oladi
+                    logger.warning(f"Webhook navbati: lease yo'qoldi, {len(rows) - done} ta update qaytarildi")
+                    break
+                try:
+                    update = Update.model_validate(data, context={"bot": self.bot})
+                except ValidationError as e:
+                    logger.error(f"Webhook navbati: update {update_id} o'qilmadi: {e}")
+                else:
+                    await self._dispatch(update)
+                done += 1
+        finally:
+            keeper.cancel()
+            if done < len(rows):
+                # dp ga yetmagan update lar keyingi egaga qaytariladi
+                await run_db(self._untake, [update_id for update_id, _ in rows[done:]])
+        return len(rows)
+
+    @staticmethod
+    def _take(limit: int) -> list:
+        with transaction.atomic():
+            rows = list(
+                BotUpdate.objects.select_for_update(skip_locked=True)
+                .filter(taken_at__isnull=True)
+                .order_by("update_id")
+                .values_list("update_id", "data")[:limit]
+            )
+            BotUpdate.objects.filter(update_id__in=[update_id for update_id, _ in rows]).update(
+                taken_at=timezone.now()
+            )
+        return rows
+
+    @staticmethod
+    def _untake(update_ids: list) -> None:
+        BotUpdate.objects.filter(update_id__in=update_ids).update(taken_at=None)
+
+    async def _purge_taken(self) -> None:
+        if time.time() - self._last_purge < self.PURGE_INTERVAL:
+            return
+        self._last_purge = time.time()
+        await run_db(self._purge, timezone.now() - timedelta(seconds=self.dedup_window))
+
+    @staticmethod
+    def _purge(cutoff) -> None:
+        BotUpdate.objects.filter(taken_at__lt=cutoff).delete()
+
+    # ============ LEASE ============
+
+    async def _renew(self) -> None:
+        self.is_owner = await run_db(self._acquire, self.LEASE_NAME, self.owner, self.lease_ttl)
+        if self.is_owner:
+            self._renewed_at = time.monotonic()
+
+    async def _keep_lease(self) -> None:
+        """consume paytida (enqueue_update kutayotgan bo'lsa ham) lease ni uzaytirish."""
+        while self.is_owner:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                await self._renew()
+            except Exception as e:
+                logger.error(f"Webhook lease uzaytirilmadi: {e}")
+                if time.monotonic() - self._renewed_at >= self.lease_ttl:
+                    # Muddati o'tdi — lease endi boshqa workerda bo'lishi mumkin
+                    self.is_owner = False
+
+    @staticmethod
+    def _acquire(name: str, owner: str, ttl: float) -> bool:
+        """Lease ni olish yoki uzaytirish: bo'sh, muddati o'tgan yoki o'ziniki bo'lsa."""
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=ttl)
+        _, created = BotLease.objects.get_or_create(name=name, defaults={"owner": owner, "expires_at": expires_at})
+        if created:
+            return True
+        return BotLease.objects.filter(
+            Q(owner=owner) | Q(expires_at__lt=now), name=name,
+        ).update(owner=owner, expires_at=expires_at) == 1
+
+    @staticmethod
+    def _release(name: str, owner: str) -> None:
+        BotLease.objects.filter(name=name, owner=owner).update(expires_at=timezone.now())
@@ -0,0 +1,209 @@
+"""
+Bot kechikish statistikasi (jarayon ichida, halqa buferlarda).
+
+- update middleware (outer): har update ning umumiy vaqti, FSM holati bo'yicha
+- message middleware (inner): qaysi handler ishlagani
+- run_db (utils/db.py): DB chaqiruvlari vaqti
+- bot.session middleware: Telegram API metodlari vaqti
+- utils/scheduler.py: update navbatda qancha kutgani va navbat chuqurligi
+
+Har update uchun namuna (handler, holat, jami/DB/API ms) oxirgi N ta
+namunalar buferiga yoziladi. Statistika /stats buyrug'ida ko'rsatiladi va har
+publish_interval soniyada umumiy cache ga jarayon (pid) kaliti bilan yoziladi —
+webhook rejimida har ASGI worker o'z statistikasini yozadi, Django admin
+sahifasi hammasini birlashtirib ko'rsatadi (BotService.get_metrics). Cache ga
+yoziladigan snapshot da har seriyaning oxirgi o'lchovlari ham bor — p50/p95
+barcha jarayonlarning o'lchovlaridan hisoblanadi.
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone as dt_timezone
+
+from main.services.bot_service import BotService
+
+logger = logging.getLogger(__name__)
+
+# Joriy update namunasi — DB va API vaqti shu update ga qo'shiladi
+_current: contextvars.ContextVar[dict | None] = contextvars.ContextVar("bot_metrics_sample", default=None)
+
+
+class LatencySeries:
+    """Bitta seriya (handler, holat, API metodi ...) kechikishlari: jami va oxirgi window ta o'lchov."""
+
+    def __init__(self, window: int = 500) -> None:
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent: deque = deque(maxlen=window)
+
+    def record(self, elapsed_ms: float, failed: bool) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.recent.append(elapsed_ms)
+        if failed:
+            self.errors += 1
+
+    def snapshot(self, samples: bool = False) -> dict:
+        """samples=True — oxirgi o'lchovlar ham (jarayonlarni birlashtirish uchun)."""
+        recent = sorted(self.recent)
+        stats = {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "p50_ms": round(BotService.percentile(recent, 0.50), 1),
+            "p95_ms": round(BotService.percentile(recent, 0.95), 1),
+            "max_ms": round(self.max_ms, 1),
+        }
+        if samples:
+            stats["recent"] = [round(ms, 1) for ms in self.recent]
+        return stats
+
+
+class BotMetrics:
+    """Handler / FSM holati / DB / Telegram API kechikishlari."""
+
+    def __init__(self, window: int = 500, publish_interval: float = 15) -> None:
+        self.window = window
+        self.publish_interval = publish_interval
+        self.started_at = datetime.now(dt_timezone.utc)
+        self.updates = LatencySeries(window)
+        self.db = LatencySeries(window)
+        self.handlers: dict[str, LatencySeries] = {}
+        self.states: dict[str, LatencySeries] = {}
+        self.api: dict[str, LatencySeries] = {}
+        self.samples: deque = deque(maxlen=window)
+        self.queue_wait = LatencySeries(window)
+        # ChatScheduler o'zini shu yerga ulaydi (navbat chuqurligi)
+        self.queue_stats = None
+        self._task: asyncio.Task | None = None
+
+    def _series(self, group: dict, name: str) -> LatencySeries:
+        series = group.get(name)
+        if series is None:
+            series = group[name] = LatencySeries(self.window)
+        return series
+
+    # ============ MIDDLEWARES ============
+
+    async def update_middleware(self, handler, event, data):
+        """dp.update.outer_middleware: update ning to'liq vaqti."""
+        sample = {
+            "handler": None,
+            "state": data.get("raw_state") or "-",
+            "db_ms": 0.0,
+            "api_ms": 0.0,
+        }
+        token = _current.set(sample)
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = await handler(event, data)
+            failed = False
+            return result
+        finally:
+            _current.reset(token)
+            sample["total_ms"] = (time.perf_counter() - started) * 1000
+            sample["failed"] = failed
+            self._record(sample)
+
+    async def handler_middleware(self, handler, event, data):
+        """dp.message.middleware: tanlangan handler nomi."""
+        sample = _current.get()
+        if sample is not None:
+            sample["handler"] = data["handler"].callback.__name__
+        return await handler(event, data)
+
+    async def request_middleware(self, make_request, bot, method):
+        """bot.session.middleware: Telegram API chaqiruvi vaqti."""
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = await make_request(bot, method)
+            failed = False
+            return response
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._series(self.api, type(method).__name__).record(elapsed_ms, failed)
+            sample = _current.get()
+            if sample is not None:
+                sample["api_ms"] += elapsed_ms
+
+    def record_db(self, elapsed_ms: float, failed: bool) -> None:
+        self.db.record(elapsed_ms, failed)
+        sample = _current.get()
+        if sample is not None:
+            sample["db_ms"] += elapsed_ms
+
+    def record_queue_wait(self, elapsed_ms: float) -> None:
+        self.queue_wait.record(elapsed_ms, False)
+
+    def _record(self, sample: dict) -> None:
+        if sample["handler"] is None:
+            # Handler topilmadi yoki update xabar emas
+            sample["handler"] = "-"
+        sample["at"] = time.time()
+        self.updates.record(sample["total_ms"], sample["failed"])
+        self._series(self.handlers, sample["handler"]).record(sample["total_ms"], sample["failed"])
+        self._series(self.states, sample["state"]).record(sample["total_ms"], sample["failed"])
+        self.samples.append(sample)
+
+    # ============ SNAPSHOT ============
+
+    def snapshot(self, slowest: int = 20, samples: bool = False) -> dict:
+        def by_p95(group):
+            stats = {name: series.snapshot(samples) for name, series in group.items()}
+            return dict(sorted(stats.items(), key=lambda item: item[1]["p95_ms"], reverse=True))
+
+        return {
+            "pid": os.getpid(),
+            "started_at": self.started_at.isoformat(),
+            "published_at": datetime.now(dt_timezone.utc).isoformat(),
+            "updates": self.updates.snapshot(samples),
+            "db": self.db.snapshot(samples),
+            "queue": {
+                "wait": self.queue_wait.snapshot(samples),
+                **(self.queue_stats() if self.queue_stats else {}),
+            },
+            "handlers": by_p95(self.handlers),
+            "states": by_p95(self.states),
+            "api": by_p95(self.api),
+            "slowest": [
+                {k: (round(v, 1) if isinstance(v, float) else v) for k, v in sample.items()}
+                for sample in sorted(self.samples, key=lambda s: s["total_ms"], reverse=True)[:slowest]
+            ],
+        }
+
+    # ============ PUBLISH (dp.startup / dp.shutdown) ============
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._publish_loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.publish()
+
+    async def publish(self) -> None:
+        # run_db emas: DB pool vaqtini o'lchashga aralashmasin
+        snapshot = self.snapshot(samples=True)
+        try:
+            await asyncio.to_thread(BotService.publish_metrics, snapshot, self.publish_interval * 20)
+        except Exception as e:
+            logger.error(f"Bot statistikasi cache ga yozilmadi: {e}")
+
+    async def _publish_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.publish_interval)
+            await self.publish()
+
+
+metrics = BotMetrics()
@@ -0,0 +1,83 @@
+"""
+Menejerlar guruhiga xabarnomalar (test-drayv arizalari) — bot event loop ida.
+
+Ariza DB ga yozilgach foydalanuvchiga darhol javob beriladi, xabarnoma esa
+navbatga qo'yiladi va fon vazifasi uni aiogram Bot sessiyasi orqali yuboradi
+(requests/executor thread band qilinmaydi). Flood control (429) da retry_after
+kutiladi, tarmoq xatosida bir necha marta qayta uriniladi. Bot to'xtaganda
+navbatdagilar yuborib bo'linadi.
+"""
+
+import asyncio
+import logging
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationQueue:
+    """Guruh chatiga yuboriladigan xabarlar navbati (bitta fon vazifasi)."""
+
+    def __init__(self, bot: Bot, token: str | None, chat_id: str | int | None,
+                 maxsize: int = 1000, retries: int = 3) -> None:
+        # Boshqa token bo'lsa ham HTTP sessiya (ulanishlar puli) umumiy
+        if token and token != bot.token:
+            bot = Bot(token=token, session=bot.session)
+        self.bot = bot if token else None
+        self.chat_id = chat_id
+        self.retries = retries
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._task: asyncio.Task | None = None
+
+    def enqueue(self, text: str) -> None:
+        if self.bot is None or not self.chat_id:
+            logger.warning("Guruh xabarnomasi sozlanmagan (TELEGRAM_BOT_TOKEN / TELEGRAM_CHAT_ID)")
+            return
+        try:
+            self._queue.put_nowait(text)
+        except asyncio.QueueFull:
+            logger.error("Xabarnomalar navbati to'la — xabar tashlab yuborildi")
+
+    async def _send(self, text: str) -> None:
+        for attempt in range(1, self.retries + 1):
+            try:
+                await self.bot.send_message(
+                    self.chat_id, text, parse_mode="HTML", disable_web_page_preview=True
+                )
+                return
+            except TelegramRetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+            except TelegramNetworkError as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"Xabarnoma yuborilmadi ({attempt}-urinish): {e}")
+                await asyncio.sleep(attempt)
+        raise RuntimeError("flood control: urinishlar tugadi")
+
+    async def _worker(self) -> None:
+        while True:
+            text = await self._queue.get()
+            try:
+                await self._send(text)
+            except Exception as e:
+                logger.error(f"Guruh xabarnomasi xatosi: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    # ============ LIFECYCLE (dp.startup / dp.shutdown) ============
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._worker())
+
+    async def stop(self, timeout: float = 10) -> None:
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Yuborilmay qolgan xabarnomalar: {self._queue.qsize()}")
+        self._task.cancel()
+        self._task = None
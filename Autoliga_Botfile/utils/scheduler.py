@@ -0,0 +1,147 @@
+"""
+Update larni chatlar bo'yicha tartibli, chatlar orasida parallel ishlash.
+
+aiogram har update uchun alohida task ochadi: bitta foydalanuvchining ikki
+tez bosishi bir vaqtda ishlanib, FSM holatida poyga (race) bo'lardi, reklama
+paytidagi oqimda esa task lar soni cheklanmasdi. Bu yerda:
+
+- har chatning o'z navbati: bitta chat update lari qat'iy ketma-ket
+- turli chatlar workers ta worker da parallel; navbati bor chat ishlangandan
+  keyin qatorning oxiriga qaytadi (bitta faol chat boshqalarni bosib qolmaydi)
+- backpressure: navbatda max_pending tadan ko'p update bo'lsa submit() kutadi —
+  polling yangi update olmaydi, webhook navbatidan (utils/inbox.py) olish to'xtaydi
+- navbat chuqurligi va kutish vaqti utils/metrics.py ga yoziladi (/stats)
+
+Tartib faqat jarayon ichida kafolatlanadi: polling — bitta jarayon, webhook
+rejimida update larni ASGI workerlardan faqat bittasi oladi (utils/inbox.py).
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import nullcontext
+from functools import partial
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.types import Update
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def chat_key(update: Update):
+    """Tartib kaliti: chat (bo'lmasa foydalanuvchi); ikkalasi ham yo'q — update ning o'zi."""
+    context = UserContextMiddleware.resolve_event_context(update)
+    if context.chat is not None:
+        return context.chat.id
+    if context.user is not None:
+        return ("user", context.user.id)
+    return ("update", update.update_id)
+
+
+class ChatScheduler:
+    """Chat bo'yicha navbatlar + cheklangan worker lar."""
+
+    def __init__(self, workers: int = 8, max_pending: int = 1000) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        # chat -> [(navbatga qo'yilgan vaqt, job), ...]; birinchisi — ishlanayotgani
+        self._chats: dict = {}
+        self._ready: asyncio.Queue | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._pending = 0
+        self._busy = 0
+        self._max_depth = 0
+        metrics.queue_stats = self.stats
+
+    def _start(self) -> None:
+        # Event loop ichida yaratiladi (import paytida loop bo'lmaydi)
+        self._ready = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, key, job) -> None:
+        """job() ni key navbatiga qo'yish; navbat to'la bo'lsa joy bo'shashini kutadi."""
+        if not self._tasks:
+            self._start()
+        await self._slots.acquire()
+        queue = self._chats.get(key)
+        if queue is None:
+            queue = self._chats[key] = deque()
+            self._ready.put_nowait(key)
+        queue.append((time.perf_counter(), job))
+        self._pending += 1
+        self._max_depth = max(self._max_depth, len(queue))
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._ready.get()
+            queue = self._chats[key]
+            enqueued_at, job = queue[0]
+            metrics.record_queue_wait((time.perf_counter() - enqueued_at) * 1000)
+            self._busy += 1
+            try:
+                await job()
+            except Exception as e:
+                logger.error(f"Update ishlashda xato ({key}): {e}", exc_info=True)
+            finally:
+                self._busy -= 1
+                queue.popleft()
+                self._pending -= 1
+                self._slots.release()
+                if queue:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._chats[key]
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "chats": len(self._chats),
+            "busy_workers": self._busy,
+            "workers": self.workers,
+            "max_chat_depth": self._max_depth,
+        }
+
+    async def stop(self, timeout: float = 10) -> None:
+        """Navbatdagi update larni tugatib (ko'pi bilan timeout soniya) worker larni to'xtatish."""
+        deadline = time.monotonic() + timeout
+        while self._pending and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+
+class OrderedDispatcher(Dispatcher):
+    """Dispatcher: update lar ChatScheduler orqali ishlanadi (polling va webhook)."""
+
+    def __init__(self, *, scheduler: ChatScheduler, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.scheduler = scheduler
+        self.shutdown.register(scheduler.stop)
+
+    async def enqueue_update(self, bot: Bot, update: Update, **kwargs) -> None:
+        process = partial(super()._process_update, bot=bot, update=update, **kwargs)
+        await self.scheduler.submit(chat_key(update), process)
+
+    async def feed_update(self, bot: Bot, update: Update, **kwargs):
+        # FSM storage (utils/fsm_storage.py) holat versiyasini update da bir marta tekshiradi
+        update_scope = getattr(self.fsm.storage, "update_scope", None)
+        with update_scope() if update_scope else nullcontext():
+            return await super().feed_update(bot, update, **kwargs)
+
+    async def _process_update(self, bot: Bot, update: Update, call_answer: bool = True, **kwargs) -> bool:
+        # Polling shu yerni chaqiradi: update navbatga qo'yiladi, ishlashni worker bajaradi
+        await self.enqueue_update(bot, update, call_answer=call_answer, **kwargs)
+        return True
+
+    async def start_polling(self, *bots: Bot, **kwargs) -> None:
+        # Har update ga task ochilmasin — parallellik va backpressure scheduler da
+        kwargs["handle_as_tasks"] = False
+        await super().start_polling(*bots, **kwargs)
@@ -0,0 +1,60 @@
+"""
+Foydalanuvchi tili — xotiradagi LRU + TelegramUser.language.
+
+Avval til faqat xotiradagi cheklangan dict da edi: bot qayta ishga tushganda
+yoki kalit chiqarib yuborilganda foydalanuvchi "uz" ga qaytardi. Endi:
+
+- o'qish: avval LRU dan, topilmasa TelegramUser.language dan (lazy load)
+  va natija LRU ga yoziladi (ro'yxatdan o'tmaganlar uchun "uz" ham)
+- o'zgartirish: LRU va DB birga yangilanadi (write-through)
+- TTL: LRU dagi til ttl soniyadan keyin DB dan qayta o'qiladi — tilni boshqa
+  jarayon (webhook workeri) o'zgartirgan bo'lsa, shu vaqt ichida ko'rinadi
+"""
+
+import time
+from collections import OrderedDict
+
+from main.services.bot_service import BotService
+
+from utils.db import run_db
+
+DEFAULT_LANG = "uz"
+
+
+class UserLanguageCache:
+    """Ikki bosqichli til qidiruvi: LRU (maxsize ta, ttl soniya) -> DB."""
+
+    def __init__(self, maxsize: int = 5000, ttl: float = 60) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # telegram_id -> (til, eskirish vaqti — time.monotonic())
+        self._langs: OrderedDict[int, tuple[str, float]] = OrderedDict()
+
+    def _cached(self, telegram_id: int) -> str | None:
+        entry = self._langs.get(telegram_id)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0]
+
+    async def get(self, telegram_id: int) -> str:
+        lang = self._cached(telegram_id)
+        if lang is None:
+            lang = await run_db(BotService.get_user_language, telegram_id) or DEFAULT_LANG
+            # await paytida set() chaqirilgan bo'lsa, yangi qiymat ustun
+            lang = self._cached(telegram_id) or lang
+            self.remember(telegram_id, lang)
+        else:
+            self._langs.move_to_end(telegram_id)
+        return lang
+
+    async def set(self, telegram_id: int, lang: str, **fields) -> None:
+        """Tilni o'zgartirish: xotira + DB (qo'shimcha maydonlar ham yoziladi)."""
+        self.remember(telegram_id, lang)
+        await run_db(BotService.create_or_update_telegram_user, telegram_id, language=lang, **fields)
+
+    def remember(self, telegram_id: int, lang: str) -> None:
+        """DB dan allaqachon o'qilgan tilni faqat xotiraga yozish."""
+        self._langs[telegram_id] = (lang, time.monotonic() + self.ttl)
+        self._langs.move_to_end(telegram_id)
+        if len(self._langs) > self.maxsize:
+            self._langs.popitem(last=False)
@@ -0,0 +1,154 @@
+"""
+Telegram webhook — sayt ASGI jarayoni ichida (myproject/asgi.py).
+
+BOT_MODE=webhook bo'lganda Telegram update larni BOT_WEBHOOK_PATH ga POST
+qiladi, ular bot.py dagi o'sha `dp` ga uzatiladi. Alohida polling jarayoni
+(run_bot.sh) kerak emas — bot saytning ASGI workerlarida ishlaydi.
+
+- Secret: X-Telegram-Bot-Api-Secret-Token sarlavhasi BOT_WEBHOOK_SECRET bilan
+  tekshiriladi; secret sozlanmagan bo'lsa webhook so'rovlari rad etiladi
+- Update larni faqat bitta worker (lease egasi, utils/inbox.py) dp ga beradi —
+  bitta chat update lari workerlar soni qancha bo'lishidan qat'i nazar
+  ketma-ket ishlanadi (utils/scheduler.py). Egasiga kelgan update darhol dp
+  ga beriladi, boshqa worker uni DB navbatiga yozadi va egasi u yerdan oladi;
+  ikkalasidan keyin 200, bo'lmasa 500 — Telegram qayta yuboradi
+- Dedup: qayta yuborilgan update BOT_WEBHOOK_DEDUP_WINDOW soniya ichida
+  ikkinchi marta ishlanmaydi (umumiy cache va navbatning primary key i)
+- Webhook lifespan startup da o'rnatiladi (yoki: python run_bot.py)
+"""
+
+import hmac
+import json
+import logging
+
+from django.conf import settings
+
+from utils.inbox import WebhookInbox
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = b'x-telegram-bot-api-secret-token'
+MAX_BODY_SIZE = 1024 * 1024
+
+
+def webhook_url() -> str:
+    return settings.BOT_WEBHOOK_BASE_URL.rstrip('/') + settings.BOT_WEBHOOK_PATH
+
+
+class TelegramWebhookRouter:
+    """ASGI router: webhook yo'li -> aiogram Dispatcher, qolgan hammasi -> Django."""
+
+    def __init__(self, django_app):
+        self.django_app = django_app
+        self.path = settings.BOT_WEBHOOK_PATH
+        self.secret = settings.BOT_WEBHOOK_SECRET
+        self.dedup_window = settings.BOT_WEBHOOK_DEDUP_WINDOW
+        self._bot = None
+        self._dp = None
+        self._inbox = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] == 'http' and scope['path'] == self.path:
+            return await self._webhook(scope, receive, send)
+        return await self.django_app(scope, receive, send)
+
+    # ============ BOT ============
+
+    def _load_bot(self):
+        # bot.py import paytida Bot/Dispatcher yaratadi — faqat webhook rejimida
+        if self._dp is None:
+            from bot import bot, dp
+            self._bot, self._dp = bot, dp
+        if self._inbox is None:
+            self._inbox = WebhookInbox(
+                self._bot, self._dp,
+                lease_ttl=settings.BOT_WEBHOOK_LEASE_TTL,
+                poll_interval=settings.BOT_WEBHOOK_POLL_INTERVAL,
+                dedup_window=self.dedup_window,
+            )
+        return self._bot, self._dp
+
+    # ============ LIFESPAN ============
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    bot, dp = self._load_bot()
+                    await bot.set_webhook(
+                        url=webhook_url(),
+                        secret_token=self.secret or None,
+                        allowed_updates=dp.resolve_used_update_types(),
+                    )
+                    await dp.emit_startup(bot=bot)
+                    await self._inbox.start()
+                    logger.info(f"Telegram webhook o'rnatildi: {webhook_url()}")
+                except Exception as e:
+                    # Sayt bot sababli to'xtamasligi kerak
+                    logger.error(f"Telegram webhook o'rnatilmadi: {e}", exc_info=True)
+                await send({'type': 'lifespan.startup.complete'})
+
+            elif message['type'] == 'lifespan.shutdown':
+                # Navbatdan olish to'xtatiladi (lease bo'shatiladi), olinganlari
+                # dp.shutdown da (ChatScheduler.stop) tugatiladi
+                if self._dp is not None:
+                    try:
+                        await self._inbox.stop()
+                        await self._dp.emit_shutdown(bot=self._bot)
+                        await self._bot.session.close()
+                    except Exception as e:
+                        logger.error(f"Bot shutdown xatosi: {e}")
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # ============ WEBHOOK ============
+
+    async def _webhook(self, scope, receive, send):
+        if scope['method'] != 'POST':
+            return await self._respond(send, 405)
+
+        headers = dict(scope['headers'])
+        token = headers.get(SECRET_HEADER, b'').decode('latin-1')
+        if not self.secret or not hmac.compare_digest(token, self.secret):
+            logger.warning("Telegram webhook: noto'g'ri secret token")
+            return await self._respond(send, 403)
+
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if len(body) > MAX_BODY_SIZE:
+                return await self._respond(send, 413)
+
+        from aiogram.types import Update
+
+        bot, dp = self._load_bot()
+        try:
+            data = json.loads(body)
+            update_id = int(data['update_id'])
+            update = Update.model_validate(data, context={'bot': bot})
+        except (ValueError, KeyError, TypeError):
+            return await self._respond(send, 400)
+
+        try:
+            await self._inbox.put(update_id, data, update)
+        except Exception as e:
+            # dp ga ham, navbatga ham tushmadi — Telegram qayta yuborsin
+            logger.error(f"Telegram webhook: update {update_id} qabul qilinmadi: {e}", exc_info=True)
+            return await self._respond(send, 500)
+
+        return await self._respond(send, 200)
+
+    @staticmethod
+    async def _respond(send, status: int) -> None:
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'text/plain'), (b'content-length', b'0')],
+        })
+        await send({'type': 'http.response.body', 'body': b''})
@@ -28,6 +28,8 @@ from urllib.parse import unquote
 # ========== ЛОКАЛЬНЫЕ ИМПОРТЫ ==========
 from .models import *
 from main.services.amocrm.token_manager import TokenManager
+from main.services.http_client import HttpClient
+from main.services.media_index import MediaIndex
 logger = logging.getLogger('django')
 
 # ========== НАСТРОЙКИ АДМИНКИ ==========
@@ -407,39 +409,18 @@ class ContactFormAdmin(LeadManagerMixin, admin.ModelAdmin):
     # ==================== ДЕЙСТВИЯ ====================
     
     def retry_failed_leads(self, request, queryset):
-        """Повторная отправка ошибочных заявок"""
-        logger = logging.getLogger('django')
+        """Повторная отправка ошибочных заявок (фоновая пакетная задача)"""
+        from main.services.amocrm import LeadResendJobRunner
         
-        failed_leads = queryset.filter(amocrm_status='failed')
+        job = LeadResendJobRunner.create_job(queryset, user=request.user)
         
-        if not failed_leads.exists():
-            self.message_user(request, 'Нет ошибочных заявок для повторной отправки', level=messages.WARNING)
+        if job is None:
+            self.message_user(request, 'Нет ошибочных заявок для повторной отправки (заявки без уведомления в Telegram ещё повторяет очередь отправки)', level=messages.WARNING)
             return
         
-        success_count = 0
-        fail_count = 0
-        
-        for lead in failed_leads:
-            try:
-                lead.amocrm_status = 'pending'
-                lead.amocrm_error = None
-                lead.save()
-                
-                LeadSender.send_lead(lead)
-                lead.refresh_from_db()
-                
-                if lead.amocrm_status == 'sent':
-                    success_count += 1
-                else:
-                    fail_count += 1
-            except Exception as e:
-                logger.error(f"Error retrying lead {lead.id}: {str(e)}", exc_info=True)
-                fail_count += 1
+        LeadResendJobRunner.start_async(job)
         
-        if success_count > 0:
-            self.message_user(request, f'Успешно отправлено: {success_count}', level=messages.SUCCESS)
-        if fail_count > 0:
-            self.message_user(request, f'Ошибка отправки: {fail_count}', level=messages.ERROR)
+        return redirect('admin:contactform_resend_job', job_id=job.pk)
     
     retry_failed_leads.short_description = 'Повторно отправить ошибочные заявки'
     
@@ -607,9 +588,36 @@ class ContactFormAdmin(LeadManagerMixin, admin.ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path('<int:object_id>/quick-update/', self.admin_site.admin_view(self.quick_update_view), name='contactform_quick_update'),
+            path('resend-jobs/<int:job_id>/', self.admin_site.admin_view(self.resend_job_view), name='contactform_resend_job'),
         ]
         return custom_urls + urls
 
+    def resend_job_view(self, request, job_id):
+        """Прогресс пакетной переотправки (HTML или JSON для автообновления)"""
+        job = LeadResendJob.objects.filter(pk=job_id).first()
+        if job is None:
+            messages.error(request, f'Задача переотправки #{job_id} не найдена')
+            return redirect('admin:main_contactform_changelist')
+        
+        if request.GET.get('format') == 'json':
+            return JsonResponse({
+                'status': job.status,
+                'status_display': job.get_status_display(),
+                'total': job.total,
+                'processed': job.processed,
+                'sent': job.sent_count,
+                'failed': job.failed_count,
+                'percent': job.progress_percent,
+                'error': job.error,
+            })
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f'Переотправка заявок #{job.pk}',
+            'job': job,
+        }
+        return render(request, 'main/contactform/resend_job.html', context)
+
     def quick_update_view(self, request, object_id):
         """AJAX автосохранение статуса/приоритета/менеджера"""
         import json
@@ -808,6 +816,21 @@ class ProductCategoryFilter(admin.SimpleListFilter):
         return queryset
 
 
+class MissingImageFilter(admin.SimpleListFilter):
+    """Товары, у которых файл изображения отсутствует на диске (по индексу медиа)"""
+    title = 'Файл изображения'
+    parameter_name = 'image_file'
+
+    def lookups(self, request, model_admin):
+        return [('missing', 'Нет файла')]
+
+    def queryset(self, request, queryset):
+        if self.value() == 'missing':
+            names = MediaIndex.missing_names()
+            return queryset.filter(Q(main_image__in=names) | Q(card_image__in=names))
+        return queryset
+
+
 class ParameterCategoryFilter(admin.SimpleListFilter):
     """Фильтр параметров по категории (для ProductAdmin)"""
     title = 'Категория параметра'
@@ -919,12 +942,12 @@ class ProductGalleryInline(admin.TabularInline):
 @admin.register(Product)
 class ProductAdmin(ContentAdminMixin, CustomReversionMixin, VersionAdmin, TabbedTranslationAdmin):
     list_display = ['thumbnail', 'title', 'category_display', 'is_active', 'is_featured', 'slider_order', 'order']
-    list_filter = [ProductCategoryFilter, 'is_active', 'is_featured']
+    list_filter = [ProductCategoryFilter, 'is_active', 'is_featured', MissingImageFilter]
     search_fields = ['title', 'slug']
     list_editable = ['is_active', 'is_featured', 'slider_order', 'order']
     prepopulated_fields = {'slug': ('title',)}
     history_latest_first = True
-    actions = ['add_to_slider', 'remove_from_slider']
+    actions = ['add_to_slider', 'remove_from_slider', 'rebuild_media_index']
     
     list_per_page = 15
     show_full_result_count = False
@@ -981,6 +1004,15 @@ class ProductAdmin(ContentAdminMixin, CustomReversionMixin, VersionAdmin, Tabbed
         self.message_user(request, f'❌ {updated} продуктов убрано из слайдера')
     remove_from_slider.short_description = '❌ Убрать из слайдера'
 
+    def rebuild_media_index(self, request, queryset):
+        from main.services.bot_service import BotService
+
+        MediaIndex.build()
+        BotService.clear_bot_cache()
+        missing = len(MediaIndex.missing_names())
+        self.message_user(request, f'🔄 Индекс изображений пересобран, нет файлов: {missing}')
+    rebuild_media_index.short_description = '🔄 Перепроверить файлы изображений'
+
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
         deleted_count = Version.objects.get_deleted(self.model).count()
@@ -990,6 +1022,13 @@ class ProductAdmin(ContentAdminMixin, CustomReversionMixin, VersionAdmin, Tabbed
         featured_count = Product.objects.filter(is_featured=True, is_active=True).count()
         extra_context['featured_count'] = featured_count
         extra_context['show_slider_info'] = True
+        missing = MediaIndex.missing_names() if request.method == 'GET' else None
+        if missing and request.GET.get(MissingImageFilter.parameter_name) != 'missing':
+            messages.warning(request, format_html(
+                'Нет файлов изображений на диске: {} (бот показывает такие машины без фото). '
+                '<a href="?{}=missing">Показать товары</a>',
+                len(missing), MissingImageFilter.parameter_name,
+            ))
         return super().changelist_view(request, extra_context)
     
     def get_urls(self):
@@ -1180,6 +1219,8 @@ class AmoCRMTokenAdmin(AmoCRMAdminMixin, admin.ModelAdmin):
             'title': 'Логи ошибок amoCRM',
             'amocrm_logs': amocrm_logs,
             'errors_logs': errors_logs,
+            # Задержки и повторы внешних запросов (HttpClient) этого процесса
+            'http_metrics': sorted(HttpClient.get_metrics().items()),
         }
         return render(request, 'main/amocrm_logs.html', context)
     
@@ -1432,6 +1473,7 @@ class TelegramUserAdmin(admin.ModelAdmin):
     readonly_fields = ['telegram_id', 'username', 'first_name', 'phone', 'region', 'language', 'age', 'created_at']
     ordering = ['-created_at']
     list_per_page = 50
+    actions = ['send_broadcast']
 
     def formatted_created_at(self, obj):
         if obj.created_at:
@@ -1444,6 +1486,127 @@ class TelegramUserAdmin(admin.ModelAdmin):
     formatted_created_at.short_description = "Ro'yxatdan o'tgan sana"
     formatted_created_at.admin_order_field = 'created_at' # Saralash ishlashi uchun
 
+    # --- Bot statistikasi ---
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('bot-stats/', self.admin_site.admin_view(self.bot_stats_view), name='telegramuser_bot_stats'),
+        ]
+        return custom_urls + urls
+
+    def bot_stats_view(self, request):
+        """Bot kechikish statistikasi (har bot jarayoni umumiy cache ga yozadi, bu yerda birlashtiriladi)"""
+        from main.services.bot_service import BotService
+
+        stats = BotService.get_metrics()
+        if request.GET.get('format') == 'json':
+            return JsonResponse(stats or {})
+
+        summary, groups = [], []
+        if stats:
+            summary = [("Update (to'liq)", stats['updates']), ("DB chaqiruvlari", stats['db'])]
+            if 'queue' in stats:
+                summary.append(("Navbatda kutish", stats['queue']['wait']))
+            groups = [
+                ('Handlerlar', stats['handlers']),
+                ('FSM holatlari', stats['states']),
+                ('Telegram API', stats['api']),
+            ]
+        context = {
+            **self.admin_site.each_context(request),
+            'title': "Bot statistikasi",
+            'stats': stats,
+            'summary': summary,
+            'groups': groups,
+        }
+        return render(request, 'main/telegramuser/bot_stats.html', context)
+
+    # --- Ommaviy xabar ---
+    def send_broadcast(self, request, queryset):
+        from main.services.telegram import BotBroadcastRunner
+
+        if 'apply' in request.POST:
+            form = BotBroadcastForm(request.POST)
+            if form.is_valid():
+                try:
+                    job = BotBroadcastRunner.create_job(form.cleaned_data['text'], users=queryset, user=request.user)
+                except ValueError as e:
+                    # BOT_TOKEN Telegram tomonidan qabul qilinmadi
+                    form.add_error(None, str(e))
+                else:
+                    BotBroadcastRunner.start_async(job)
+                    self.message_user(
+                        request, f"Ommaviy xabar #{job.pk} yuborilmoqda: {job.total} ta foydalanuvchi", messages.SUCCESS
+                    )
+                    return redirect('admin:main_botbroadcast_change', job.pk)
+        else:
+            form = BotBroadcastForm()
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': "Ommaviy xabar yuborish",
+            'opts': self.model._meta,
+            'form': form,
+            'queryset': queryset,
+            'count': queryset.count(),
+            'select_across': request.POST.get('select_across', '0'),
+            'action_checkbox_name': admin.helpers.ACTION_CHECKBOX_NAME,
+        }
+        return render(request, 'main/telegramuser/broadcast_form.html', context)
+    send_broadcast.short_description = "Tanlanganlarga bot orqali xabar yuborish"
+
+
+class BotBroadcastForm(forms.Form):
+    text = forms.CharField(
+        label="Xabar matni",
+        widget=forms.Textarea(attrs={'rows': 8, 'cols': 80}),
+        help_text="Telegram HTML formati: <b>, <i>, <a href>"
+    )
+
+    def clean_text(self):
+        from main.services.telegram.broadcast import validate_text
+
+        text = self.cleaned_data['text']
+        # Noto'g'ri belgilash (can't parse entities) har bir foydalanuvchida xato beradi
+        try:
+            validate_text(text)
+        except ValueError as e:
+            raise forms.ValidationError(str(e))
+        return text
+
+
+@admin.register(BotBroadcast)
+class BotBroadcastAdmin(admin.ModelAdmin):
+    list_display = ['id', 'short_text', 'language', 'status', 'total', 'delivered_count', 'blocked_count', 'failed_count', 'created_at']
+    list_filter = ['status', 'language']
+    readonly_fields = [
+        'text', 'language', 'status', 'total', 'last_user_id', 'delivered_count', 'blocked_count',
+        'failed_count', 'error', 'created_by', 'created_at', 'updated_at', 'finished_at',
+    ]
+    exclude = ['user_ids']
+    actions = ['resume_broadcasts']
+
+    def has_add_permission(self, request):
+        # Yaratish — Telegram foydalanuvchilar ro'yxatidagi amal yoki manage.py send_broadcast
+        return False
+
+    def short_text(self, obj):
+        return obj.text[:60]
+    short_text.short_description = "Xabar"
+
+    def resume_broadcasts(self, request, queryset):
+        from main.services.telegram import BotBroadcastRunner
+
+        jobs = list(queryset.filter(status='failed'))
+        BotBroadcast.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status='pending', error='', finished_at=None
+        )
+        for job in jobs:
+            # Nazorat nuqtasidan davom etadi — yuborilganlarga qayta yuborilmaydi
+            BotBroadcastRunner.start_async(job)
+        self.message_user(request, f"Davom ettirildi: {len(jobs)} ta xabar", messages.SUCCESS)
+    resume_broadcasts.short_description = "Xato bilan to'xtaganlarni davom ettirish"
+
 
 
 
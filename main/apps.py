@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.conf import settings
 import threading
 import os
 
@@ -43,5 +44,15 @@ class MainConfig(AppConfig):
             finally:
                 loop.close()
 
-        thread = threading.Thread(target=start_bot, daemon=True, name="TelegramBot")
-        thread.start()
\ No newline at end of file
+        # Webhook rejimida update lar ASGI orqali keladi (myproject/asgi.py)
+        if settings.BOT_MODE == 'polling':
+            thread = threading.Thread(target=start_bot, daemon=True, name="TelegramBot")
+            thread.start()
+
+        # Outbox: local runserver da zayavkalar fon rejimida yuborilsin
+        def start_outbox():
+            from main.services.lead_outbox import LeadOutboxProcessor
+            LeadOutboxProcessor.run_forever()
+
+        outbox_thread = threading.Thread(target=start_outbox, daemon=True, name="LeadOutbox")
+        outbox_thread.start()
@@ -0,0 +1,71 @@
+"""
+Быстрая сериализация JSON: orjson, если установлен, иначе стандартный json.
+
+- JSONRenderer / JSONParser — замена стандартных классов DRF (settings.REST_FRAMEWORK)
+- dumps() — JSON для встраивания в шаблоны (slider_products, dealers_json, ...)
+
+Типы, которых orjson не знает (ленивые строки gettext_lazy, Decimal, даты),
+сериализуются энкодером DRF — результат тот же, что и со стандартным JSONRenderer.
+
+Отличие: NaN и ±Infinity orjson пишет как null, а стандартный рендерер
+(STRICT_JSON) выбрасывает ValueError. Проверка потребовала бы обхода всех
+данных в Python и съела бы выигрыш; в API таких значений нет (дробные
+числа в моделях — DecimalField). Без orjson поведение стандартное.
+Сравнение скорости: python manage.py benchmark_json
+"""
+
+import json
+
+from django.conf import settings
+from rest_framework import parsers, renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson не обязателен — работает и на стандартном json
+    orjson = None
+
+if orjson is not None:
+    # Даты — через энкодер DRF ('Z' вместо +00:00, как у стандартного рендерера)
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    return _encoder.default(obj)
+
+
+def dumps(obj):
+    """JSON-строка без экранирования кириллицы (как json.dumps(..., ensure_ascii=False))"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS).decode()
+    return json.dumps(obj, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer на orjson; отступы (indent в Accept) — стандартным рендерером"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.ensure_ascii or not self.compact or \
+                self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        body = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        # Как DRF: U+2028/U+2029 экранируются (допустимы в JSON, но не в JS-строках)
+        return body.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class JSONParser(parsers.JSONParser):
+    """JSONParser на orjson (тело в UTF-8)"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
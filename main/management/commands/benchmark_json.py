@@ -0,0 +1,74 @@
+import io
+import json
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.utils import translation
+from rest_framework import parsers, renderers
+
+from main import fast_json
+from main.models import Product
+from main.serializers import ProductCardSerializer
+from main.views import _dealers_payload
+
+
+class Command(BaseCommand):
+    help = 'Сравнение стандартного json и main/fast_json.py (orjson) на данных списка товаров и дилеров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=500, help='Повторов на замер (по умолчанию 500)')
+        parser.add_argument(
+            '--copies', type=int, default=1,
+            help='Размножить записи N раз — оценка на каталоге побольше (по умолчанию 1)'
+        )
+        parser.add_argument('--lang', default='uz', help='Язык данных (по умолчанию uz)')
+
+    def handle(self, *args, **options):
+        number, copies = options['number'], options['copies']
+        if fast_json.orjson is None:
+            self.stdout.write(self.style.WARNING('orjson не установлен — fast_json работает на стандартном json'))
+
+        with translation.override(options['lang']):
+            products = ProductCardSerializer(
+                Product.objects.filter(is_active=True).select_related('category')
+                .prefetch_related('card_specs__icon').order_by('order', 'title'),
+                many=True,
+            ).data
+            dealers = _dealers_payload(options['lang'])
+
+        # Страница API: {'count', 'next', 'previous', 'results'} как у PageNumberPagination
+        products_page = {'count': len(products) * copies, 'next': None, 'previous': None,
+                         'results': list(products) * copies}
+        dealers = dealers * copies
+
+        stock_renderer, fast_renderer = renderers.JSONRenderer(), fast_json.JSONRenderer()
+        stock_parser, fast_parser = parsers.JSONParser(), fast_json.JSONParser()
+        products_body = stock_renderer.render(products_page)
+
+        self._compare(
+            f"API товаров: рендер ({len(products_page['results'])} шт., {len(products_body)} байт)",
+            lambda: stock_renderer.render(products_page),
+            lambda: fast_renderer.render(products_page),
+            number,
+        )
+        self._compare(
+            'API товаров: парсинг',
+            lambda: stock_parser.parse(io.BytesIO(products_body)),
+            lambda: fast_parser.parse(io.BytesIO(products_body)),
+            number,
+        )
+        self._compare(
+            f'Дилеры в шаблоне ({len(dealers)} шт., {len(fast_json.dumps(dealers).encode())} байт)',
+            lambda: json.dumps(dealers, ensure_ascii=False),
+            lambda: fast_json.dumps(dealers),
+            number,
+        )
+
+    def _compare(self, title, stock, fast, number):
+        stock_ms = min(timeit.repeat(stock, number=number, repeat=3)) / number * 1000
+        fast_ms = min(timeit.repeat(fast, number=number, repeat=3)) / number * 1000
+        self.stdout.write(
+            f'{title}\n'
+            f'  json:      {stock_ms:.4f} мс\n'
+            f'  fast_json: {fast_ms:.4f} мс  (x{stock_ms / fast_ms:.1f})'
+        )
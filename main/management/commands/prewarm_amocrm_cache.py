@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from main.services.amocrm import LeadSender, TokenManager
+
+
+class Command(BaseCommand):
+    help = 'Прогрев кэша статусов воронки amoCRM (чтобы отправка лида делала один запрос)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pipeline',
+            type=int,
+            action='append',
+            help='ID воронки (по умолчанию AMOCRM_PIPELINE_ID); можно указать несколько раз'
+        )
+
+    def handle(self, *args, **options):
+        pipeline_ids = options['pipeline'] or [settings.AMOCRM_PIPELINE_ID]
+
+        # Кэш в памяти процесса команды исчезает вместе с ним — воркерам прогрев не виден
+        backend = caches[DEFAULT_CACHE_ALIAS]
+        if isinstance(backend, (LocMemCache, DummyCache)):
+            self.stdout.write(self.style.ERROR(
+                f'Кэш {type(backend).__name__} не общий между процессами — прогрев бесполезен '
+                f'(нужен CACHE_BACKEND=sqlite/file/redis)'
+            ))
+            return
+
+        try:
+            access_token = TokenManager.get_valid_token()
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Не удалось получить токен amoCRM: {e}'))
+            return
+
+        for pipeline_id in pipeline_ids:
+            meta = LeadSender.fetch_pipeline_meta(access_token, pipeline_id)
+            if meta is None:
+                self.stdout.write(self.style.ERROR(f'Воронка {pipeline_id}: ошибка загрузки статусов'))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f"Воронка {pipeline_id}: статусов {len(meta['status_ids'])}, "
+                f"редактируемый статус {meta['editable_status_id']} "
+                f"(TTL {settings.AMOCRM_PIPELINE_CACHE_TTL} сек)"
+            ))
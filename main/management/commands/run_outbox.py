@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.services.amocrm.bulk_resend import LeadResendJobRunner
+from main.services.lead_outbox import LeadOutboxProcessor
+
+
+class Command(BaseCommand):
+    help = 'Фоновая отправка заявок из очереди в amoCRM и Telegram (и пакетная переотправка)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать одну пачку и выйти (для запуска из cron)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.LEAD_OUTBOX_BATCH_SIZE,
+            help='Сколько заявок брать за один проход'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=settings.LEAD_OUTBOX_POLL_INTERVAL,
+            help='Пауза (сек) при пустой очереди'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        if options['once']:
+            total = 0
+            while True:
+                processed = LeadOutboxProcessor.drain(batch_size)
+                total += processed
+                if processed < batch_size:
+                    break
+            jobs = LeadResendJobRunner.run_pending()
+            self.stdout.write(self.style.SUCCESS(f'Обработано заявок: {total}, задач переотправки: {jobs}'))
+            return
+
+        self.stdout.write(self.style.SUCCESS('Outbox воркер запущен (Ctrl+C для остановки)'))
+        try:
+            LeadOutboxProcessor.run_forever(batch_size=batch_size, poll_interval=options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Outbox воркер остановлен')
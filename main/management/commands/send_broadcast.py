@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.models import BotBroadcast
+from main.services.telegram import BotBroadcastRunner
+
+
+class Command(BaseCommand):
+    help = 'Рассылка сообщения пользователям Telegram-бота (с учётом лимитов Telegram)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--text',
+            help='Текст сообщения (HTML); создаёт новую рассылку и выполняет её'
+        )
+        parser.add_argument(
+            '--language',
+            choices=['uz', 'ru', 'en'],
+            help='Только пользователям с этим языком'
+        )
+        parser.add_argument(
+            '--pending',
+            action='store_true',
+            help='Выполнить ожидающие и продолжить прерванные рассылки (для cron)'
+        )
+
+    def handle(self, *args, **options):
+        if options['pending']:
+            jobs = BotBroadcastRunner.run_pending()
+            self.stdout.write(self.style.SUCCESS(f'Выполнено рассылок: {jobs}'))
+            return
+
+        if not options['text']:
+            raise CommandError('Укажите --text или --pending')
+
+        try:
+            job = BotBroadcastRunner.create_job(options['text'], language=options['language'])
+        except ValueError as e:
+            raise CommandError(f'Рассылка не создана: {e}')
+        self.stdout.write(f'Рассылка #{job.pk}: получателей {job.total}')
+
+        BotBroadcastRunner.run(job.pk)
+
+        job = BotBroadcast.objects.get(pk=job.pk)
+        summary = (
+            f'Рассылка #{job.pk} — {job.get_status_display()}: доставлено {job.delivered_count}, '
+            f'заблокировали бота {job.blocked_count}, ошибок {job.failed_count}'
+        )
+        self.stdout.write(self.style.SUCCESS(summary) if job.status == 'done' else self.style.ERROR(summary))
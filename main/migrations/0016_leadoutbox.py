@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-17 19:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_remove_telegramuser_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток отправки')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Время, после которого воркер снова возьмёт заявку', verbose_name='Следующая попытка')),
+                ('telegram_notified', models.BooleanField(default=False, verbose_name='Уведомление в Telegram отправлено')),
+                ('is_done', models.BooleanField(default=False, verbose_name='Обработано')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('contact_form', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='outbox', to='main.contactform', verbose_name='Заявка')),
+            ],
+            options={
+                'verbose_name': 'Очередь отправки заявки',
+                'verbose_name_plural': 'Очередь отправки заявок',
+                'ordering': ['next_attempt_at'],
+                'indexes': [models.Index(fields=['is_done', 'next_attempt_at'], name='leadoutbox_due_idx')],
+            },
+        ),
+    ]
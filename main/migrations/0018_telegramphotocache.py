@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-17 19:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0017_leadresendjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelegramPhotoCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=30, verbose_name='Rasm maydoni')),
+                ('image_hash', models.CharField(help_text="Fayl mazmunining SHA-256 hash i: rasm o'zgarsa, file_id eskiradi", max_length=64, verbose_name='Rasm hash')),
+                ('file_id', models.CharField(max_length=255, verbose_name='Telegram file_id')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='telegram_photos', to='main.product', verbose_name='Avtomobil')),
+            ],
+            options={
+                'verbose_name': 'Telegram rasm cache',
+                'verbose_name_plural': 'Telegram rasm cache',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='telegramphotocache',
+            constraint=models.UniqueConstraint(fields=('product', 'field'), name='telegramphoto_product_field_uniq'),
+        ),
+    ]
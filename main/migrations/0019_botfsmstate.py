@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-17 19:41
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0018_telegramphotocache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BotFSMState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True, verbose_name='Kalit')),
+                ('state', models.CharField(blank=True, max_length=255, null=True, verbose_name='Holat')),
+                ('data', models.JSONField(blank=True, default=dict, verbose_name="Ma'lumotlar")),
+                ('updated_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Yangilangan')),
+            ],
+            options={
+                'verbose_name': 'Bot FSM holati',
+                'verbose_name_plural': 'Bot FSM holatlari',
+            },
+        ),
+    ]
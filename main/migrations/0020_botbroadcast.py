@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-17 19:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('main', '0019_botfsmstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BotBroadcast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(help_text='Telegram HTML formati: <b>, <i>, <a href>', verbose_name='Xabar matni')),
+                ('language', models.CharField(blank=True, default='', help_text="Bo'sh — barcha tillar", max_length=10, verbose_name='Til')),
+                ('user_ids', models.JSONField(blank=True, help_text="TelegramUser ID lari; bo'sh — barcha foydalanuvchilar", null=True, verbose_name='Tanlangan foydalanuvchilar')),
+                ('status', models.CharField(choices=[('pending', 'Navbatda'), ('running', 'Yuborilmoqda'), ('done', 'Yakunlandi'), ('failed', 'Xato')], db_index=True, default='pending', max_length=20, verbose_name='Status')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Jami')),
+                ('last_user_id', models.PositiveIntegerField(default=0, help_text='Nazorat nuqtasi: qayta ishga tushganda shu ID dan keyingilarga yuboriladi', verbose_name='Oxirgi ishlangan foydalanuvchi')),
+                ('delivered_count', models.PositiveIntegerField(default=0, verbose_name='Yetkazildi')),
+                ('failed_count', models.PositiveIntegerField(default=0, verbose_name='Xato')),
+                ('blocked_count', models.PositiveIntegerField(default=0, verbose_name='Botni bloklagan')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Xato matni')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Yakunlangan')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bot_broadcasts', to=settings.AUTH_USER_MODEL, verbose_name='Yaratgan')),
+            ],
+            options={
+                'verbose_name': 'Ommaviy xabar',
+                'verbose_name_plural': 'Ommaviy xabarlar',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
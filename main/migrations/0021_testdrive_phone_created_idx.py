@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0020_botbroadcast'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='testdriverequest',
+            index=models.Index(fields=['phone', 'created_at'], name='testdrive_phone_created_idx'),
+        ),
+    ]
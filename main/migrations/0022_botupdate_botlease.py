@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:36
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0021_testdrive_phone_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BotLease',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Nomi')),
+                ('owner', models.CharField(max_length=255, verbose_name='Egasi')),
+                ('expires_at', models.DateTimeField(verbose_name='Tugash vaqti')),
+            ],
+            options={
+                'verbose_name': 'Bot lease',
+                'verbose_name_plural': 'Bot lease lari',
+            },
+        ),
+        migrations.CreateModel(
+            name='BotUpdate',
+            fields=[
+                ('update_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Update ID')),
+                ('data', models.JSONField(verbose_name="Ma'lumotlar")),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Qabul qilingan')),
+                ('taken_at', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Ishlashga olingan')),
+            ],
+            options={
+                'verbose_name': 'Bot update',
+                'verbose_name_plural': 'Bot update lari',
+            },
+        ),
+    ]
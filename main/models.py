@@ -533,6 +533,78 @@ class ContactForm(models.Model):
     def __str__(self):
         return f"{self.name} - {self.phone} ({self.created_at.strftime('%d.%m.%Y')})"
 
+
+class LeadOutbox(models.Model):
+    """Очередь фоновой отправки заявок в amoCRM и Telegram"""
+    contact_form = models.OneToOneField(
+        ContactForm,
+        on_delete=models.CASCADE,
+        related_name='outbox',
+        verbose_name='Заявка'
+    )
+    attempts = models.PositiveSmallIntegerField("Попыток отправки", default=0)
+    next_attempt_at = models.DateTimeField(
+        "Следующая попытка",
+        default=timezone.now,
+        help_text="Время, после которого воркер снова возьмёт заявку"
+    )
+    telegram_notified = models.BooleanField("Уведомление в Telegram отправлено", default=False)
+    is_done = models.BooleanField("Обработано", default=False)
+    created_at = models.DateTimeField("Создано", auto_now_add=True)
+    updated_at = models.DateTimeField("Обновлено", auto_now=True)
+
+    class Meta:
+        verbose_name = "Очередь отправки заявки"
+        verbose_name_plural = "Очередь отправки заявок"
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['is_done', 'next_attempt_at'], name='leadoutbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Outbox #{self.contact_form_id} ({self.attempts})"
+
+
+class LeadResendJob(models.Model):
+    """Фоновая пакетная переотправка ошибочных заявок в amoCRM"""
+    STATUS_CHOICES = [
+        ('pending', 'В очереди'),
+        ('running', 'Выполняется'),
+        ('done', 'Завершено'),
+        ('failed', 'Ошибка'),
+    ]
+
+    status = models.CharField("Статус", max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+    lead_ids = models.JSONField("ID заявок", default=list)
+    total = models.PositiveIntegerField("Всего", default=0)
+    processed = models.PositiveIntegerField("Обработано", default=0)
+    sent_count = models.PositiveIntegerField("Отправлено", default=0)
+    failed_count = models.PositiveIntegerField("Ошибок", default=0)
+    error = models.TextField("Ошибка", blank=True, default='')
+    created_by = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='lead_resend_jobs',
+        verbose_name='Запустил'
+    )
+    created_at = models.DateTimeField("Создано", auto_now_add=True)
+    updated_at = models.DateTimeField("Обновлено", auto_now=True)
+    finished_at = models.DateTimeField("Завершено", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Переотправка заявок"
+        verbose_name_plural = "Переотправка заявок"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Переотправка #{self.pk}: {self.processed}/{self.total}"
+
+    @property
+    def progress_percent(self):
+        return int(self.processed * 100 / self.total) if self.total else 100
+
 # ========== 05. ВАКАНСИИ ==========
 
 class Vacancy(models.Model):
@@ -894,6 +966,154 @@ class TelegramUser(models.Model):
         return f"@{self.username or self.telegram_id} - {self.phone or '-'}"
 
 
+class TelegramPhotoCache(models.Model):
+    """Telegram serverdagi rasm file_id si — bot rasmni qayta yuklamasligi uchun"""
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='telegram_photos',
+        verbose_name="Avtomobil"
+    )
+    field = models.CharField("Rasm maydoni", max_length=30)
+    image_hash = models.CharField(
+        "Rasm hash",
+        max_length=64,
+        help_text="Fayl mazmunining SHA-256 hash i: rasm o'zgarsa, file_id eskiradi"
+    )
+    file_id = models.CharField("Telegram file_id", max_length=255)
+    updated_at = models.DateTimeField("Yangilangan", auto_now=True)
+
+    class Meta:
+        verbose_name = "Telegram rasm cache"
+        verbose_name_plural = "Telegram rasm cache"
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'field'], name='telegramphoto_product_field_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}:{self.field}"
+
+
+class BotFSMState(models.Model):
+    """Bot suhbat holati (aiogram FSM) — bot qayta ishga tushganda yo'qolmasligi uchun"""
+
+    key = models.CharField("Kalit", max_length=255, unique=True)
+    state = models.CharField("Holat", max_length=255, blank=True, null=True)
+    data = models.JSONField("Ma'lumotlar", default=dict, blank=True)
+    updated_at = models.DateTimeField("Yangilangan", default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = "Bot FSM holati"
+        verbose_name_plural = "Bot FSM holatlari"
+
+    def __str__(self):
+        return f"{self.key} - {self.state or '-'}"
+
+
+class BotUpdate(models.Model):
+    """Webhook orqali kelgan Telegram update — barcha ASGI workerlardan bitta jarayon tartib bilan oladi"""
+
+    update_id = models.BigIntegerField("Update ID", primary_key=True)
+    data = models.JSONField("Ma'lumotlar")
+    received_at = models.DateTimeField("Qabul qilingan", default=timezone.now)
+    taken_at = models.DateTimeField("Ishlashga olingan", null=True, blank=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Bot update"
+        verbose_name_plural = "Bot update lari"
+
+    def __str__(self):
+        return f"Update #{self.update_id}"
+
+
+class BotLease(models.Model):
+    """Bir nechta jarayondan faqat bittasi bajaradigan ish egasi (muddati tugasa boshqasi oladi)"""
+
+    name = models.CharField("Nomi", max_length=100, primary_key=True)
+    owner = models.CharField("Egasi", max_length=255)
+    expires_at = models.DateTimeField("Tugash vaqti")
+
+    class Meta:
+        verbose_name = "Bot lease"
+        verbose_name_plural = "Bot lease lari"
+
+    def __str__(self):
+        return f"{self.name}: {self.owner}"
+
+
+class BotBroadcast(models.Model):
+    """Bot foydalanuvchilariga ommaviy xabar (Telegram limitlariga rioya qilib yuboriladi)"""
+    STATUS_CHOICES = [
+        ('pending', 'Navbatda'),
+        ('running', 'Yuborilmoqda'),
+        ('done', 'Yakunlandi'),
+        ('failed', 'Xato'),
+    ]
+
+    text = models.TextField("Xabar matni", help_text="Telegram HTML formati: <b>, <i>, <a href>")
+    language = models.CharField(
+        "Til",
+        max_length=10,
+        blank=True,
+        default='',
+        help_text="Bo'sh — barcha tillar"
+    )
+    user_ids = models.JSONField(
+        "Tanlangan foydalanuvchilar",
+        null=True,
+        blank=True,
+        help_text="TelegramUser ID lari; bo'sh — barcha foydalanuvchilar"
+    )
+    status = models.CharField("Status", max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+    total = models.PositiveIntegerField("Jami", default=0)
+    last_user_id = models.PositiveIntegerField(
+        "Oxirgi ishlangan foydalanuvchi",
+        default=0,
+        help_text="Nazorat nuqtasi: qayta ishga tushganda shu ID dan keyingilarga yuboriladi"
+    )
+    delivered_count = models.PositiveIntegerField("Yetkazildi", default=0)
+    failed_count = models.PositiveIntegerField("Xato", default=0)
+    blocked_count = models.PositiveIntegerField("Botni bloklagan", default=0)
+    error = models.TextField("Xato matni", blank=True, default='')
+    created_by = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='bot_broadcasts',
+        verbose_name='Yaratgan'
+    )
+    created_at = models.DateTimeField("Yaratilgan", auto_now_add=True)
+    updated_at = models.DateTimeField("Yangilangan", auto_now=True)
+    finished_at = models.DateTimeField("Yakunlangan", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Ommaviy xabar"
+        verbose_name_plural = "Ommaviy xabarlar"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Xabar #{self.pk}: {self.processed}/{self.total}"
+
+    @property
+    def processed(self):
+        return self.delivered_count + self.failed_count + self.blocked_count
+
+    @property
+    def progress_percent(self):
+        return int(self.processed * 100 / self.total) if self.total else 100
+
+    def recipients(self):
+        """Qabul qiluvchilar (ID bo'yicha tartiblangan — nazorat nuqtasi uchun)"""
+        users = TelegramUser.objects.all()
+        if self.user_ids is not None:
+            users = users.filter(pk__in=self.user_ids)
+        if self.language:
+            users = users.filter(language=self.language)
+        return users.order_by('pk')
+
+
 # ========== 09. ТЕСТ-ДРАЙВ ==========
 
 TEST_DRIVE_STATUS_CHOICES = [
@@ -970,6 +1190,10 @@ class TestDriveRequest(models.Model):
         verbose_name = "Заявки - Тест-драйв"
         verbose_name_plural = "Заявки - Тест-драйвы"
         ordering = ['-created_at']
+        indexes = [
+            # Дневной лимит заявок на номер (BotService.create_test_drive_request)
+            models.Index(fields=['phone', 'created_at'], name='testdrive_phone_created_idx'),
+        ]
 
     def __str__(self):
         product_name = self.product.title if self.product else "—"
@@ -1,11 +1,13 @@
 # main/serializers.py
+from django.db.models import Prefetch
 from rest_framework import serializers
-from main.serializers_base import LanguageSerializerMixin
+from main.serializers_base import LanguageSerializerMixin, MediaUrlMixin
 
 from .models import (
     TelegramUser, Dealer, DealerImage, BranchManager,
     News, NewsBlock, ContactForm, JobApplication,
-    Product, FeatureIcon, ProductCardSpec, ProductParameter, ProductFeature, ProductGallery, ProductCategory,
+    Product, FeatureIcon, ProductCardSpec, ParameterCategory, ProductParameter, ProductFeature, ProductGallery,
+    ProductCategory,
     Vacancy, VacancyResponsibility, VacancyRequirement, VacancyCondition, VacancyIdealCandidate,
     Review, TestDriveRequest
 )
@@ -131,7 +133,7 @@ class JobApplicationSerializer(serializers.ModelSerializer):
 
 # ========== ПРОДУКТЫ ==========
 
-class FeatureIconSerializer(serializers.ModelSerializer):
+class FeatureIconSerializer(MediaUrlMixin, serializers.ModelSerializer):
     """Иконки для характеристик"""
     icon_url = serializers.SerializerMethodField()
 
@@ -140,12 +142,7 @@ class FeatureIconSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'icon_url']
 
     def get_icon_url(self, obj):
-        request = self.context.get('request')
-        if obj.icon:
-            if request:
-                return request.build_absolute_uri(obj.icon.url)
-            return obj.icon.url
-        return None
+        return self.media_url(obj.icon)
 
 
 class ProductCardSpecSerializer(serializers.ModelSerializer):
@@ -157,7 +154,7 @@ class ProductCardSpecSerializer(serializers.ModelSerializer):
         fields = ['id', 'icon', 'value', 'order']
 
 
-class ProductCardSerializer(LanguageSerializerMixin, serializers.ModelSerializer):
+class ProductCardSerializer(LanguageSerializerMixin, MediaUrlMixin, serializers.ModelSerializer):
     """Карточки продуктов для списка"""
     card_specs = ProductCardSpecSerializer(many=True, read_only=True)
     image_url = serializers.SerializerMethodField()
@@ -176,8 +173,7 @@ class ProductCardSerializer(LanguageSerializerMixin, serializers.ModelSerializer
     def get_category(self, obj):
         """Возвращает одну категорию"""
         if obj.category and obj.category.is_active:
-            language = self.get_current_language()  # ✅ Теперь работает
-            name = getattr(obj.category, f'name_{language}', None) or obj.category.name
+            name = self.translated(obj.category, 'name')
             return {
                 'id': obj.category.id,
                 'slug': obj.category.slug,
@@ -187,13 +183,7 @@ class ProductCardSerializer(LanguageSerializerMixin, serializers.ModelSerializer
     
     def get_image_url(self, obj):
         """Возвращает URL изображения для карточки"""
-        image = obj.card_image if obj.card_image else obj.main_image
-        if image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(image.url)
-            return image.url
-        return None
+        return self.media_url(obj.card_image or obj.main_image)
 
 class ProductFeatureSerializer(LanguageSerializerMixin, serializers.ModelSerializer):
     """8 характеристик с иконками"""
@@ -205,11 +195,10 @@ class ProductFeatureSerializer(LanguageSerializerMixin, serializers.ModelSeriali
         fields = ['id', 'icon', 'name', 'order']
     
     def get_name(self, obj):
-        lang = self.get_current_language()
-        return getattr(obj, f'name_{lang}', None) or obj.name
+        return self.translated(obj, 'name')
 
 
-class ProductGallerySerializer(serializers.ModelSerializer):
+class ProductGallerySerializer(MediaUrlMixin, serializers.ModelSerializer):
     """Галерея продукта"""
     image_url = serializers.SerializerMethodField()
     
@@ -218,15 +207,10 @@ class ProductGallerySerializer(serializers.ModelSerializer):
         fields = ['id', 'image_url', 'order']
     
     def get_image_url(self, obj):
-        if obj.image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            return obj.image.url
-        return None
+        return self.media_url(obj.image)
 
 
-class ProductDetailSerializer(LanguageSerializerMixin, serializers.ModelSerializer):
+class ProductDetailSerializer(LanguageSerializerMixin, MediaUrlMixin, serializers.ModelSerializer):
     """Детальная страница продукта"""
     card_specs = ProductCardSpecSerializer(many=True, read_only=True)
     spec_groups = serializers.SerializerMethodField()
@@ -249,9 +233,8 @@ class ProductDetailSerializer(LanguageSerializerMixin, serializers.ModelSerializ
 
     def get_category(self, obj):
         if obj.category and obj.category.is_active:
-            language = self.get_current_language()
-            name = getattr(obj.category, f'name_{language}', None) or obj.category.name
-            description = getattr(obj.category, f'description_{language}', None) or obj.category.description or ''
+            name = self.translated(obj.category, 'name')
+            description = self.translated(obj.category, 'description')
             return {
                 'id': obj.category.id,
                 'slug': obj.category.slug,
@@ -261,16 +244,16 @@ class ProductDetailSerializer(LanguageSerializerMixin, serializers.ModelSerializ
         return None
 
     def get_title(self, obj):
-        lang = self.get_current_language()
-        return getattr(obj, f'title_{lang}', None) or obj.title
+        return self.translated(obj, 'title')
 
     def get_spec_groups(self, obj):
-        language = self.get_current_language()
+        category_name = self.accessor(ParameterCategory, 'name')
+        param_text = self.accessor(ProductParameter, 'text')
 
         # ✅ ДИНАМИК: ParameterCategory ForeignKey dan nom olish
-        parameters = obj.parameters.select_related('category').all().order_by(
-            'category__order', 'order'
-        )
+        # parameters (category bilan) ProductViewSet da prefetch qilingan — qayta so'rov yo'q;
+        # tartib Meta.ordering dan (category__order, order)
+        parameters = obj.parameters.all()
 
         grouped = {}
         order_map = {}
@@ -285,7 +268,7 @@ class ProductDetailSerializer(LanguageSerializerMixin, serializers.ModelSerializ
             else:
                 cat_key = cat_obj.id
                 # 3 tilda nom olish
-                cat_name = getattr(cat_obj, f'name_{language}', None) or cat_obj.name or '—'
+                cat_name = category_name(cat_obj, '—')
                 cat_order = cat_obj.order
 
             if cat_key not in grouped:
@@ -295,7 +278,7 @@ class ProductDetailSerializer(LanguageSerializerMixin, serializers.ModelSerializ
                 }
                 order_map[cat_key] = cat_order
 
-            text_value = getattr(param, f'text_{language}', None) or param.text or ''
+            text_value = param_text(param)
             grouped[cat_key]['parameters'].append({
                 'id': param.id,
                 'text': text_value,
@@ -311,22 +294,12 @@ class ProductDetailSerializer(LanguageSerializerMixin, serializers.ModelSerializ
         return result
 
     def get_main_image_url(self, obj):
-        if obj.main_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.main_image.url)
-            return obj.main_image.url
-        return None
+        return self.media_url(obj.main_image)
 
     def get_card_image_url(self, obj):
-        if obj.card_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.card_image.url)
-            return obj.card_image.url
-        return None
+        return self.media_url(obj.card_image)
 
-class ProductCategorySerializer(LanguageSerializerMixin, serializers.ModelSerializer):
+class ProductCategorySerializer(LanguageSerializerMixin, MediaUrlMixin, serializers.ModelSerializer):
     """Сериализатор для категорий продуктов"""
     name = serializers.SerializerMethodField()
     description = serializers.SerializerMethodField()
@@ -338,22 +311,15 @@ class ProductCategorySerializer(LanguageSerializerMixin, serializers.ModelSerial
     
     def get_name(self, obj):
         """Название на текущем языке"""
-        lang = self.get_current_language()
-        return getattr(obj, f'name_{lang}', None) or obj.name
+        return self.translated(obj, 'name')
     
     def get_description(self, obj):
         """Описание на текущем языке"""
-        lang = self.get_current_language()
-        return getattr(obj, f'description_{lang}', None) or obj.description or ''
+        return self.translated(obj, 'description')
     
     def get_hero_image_url(self, obj):
         """URL фонового изображения"""
-        if obj.hero_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.hero_image.url)
-            return obj.hero_image.url
-        return None
+        return self.media_url(obj.hero_image)
     
 # ========== СЕРИАЛИЗАТОР ДЛЯ ВАКАНСИЙ ==========
 
@@ -366,7 +332,7 @@ class VacancySerializer(LanguageSerializerMixin, serializers.ModelSerializer):
     requirements = serializers.SerializerMethodField()
     conditions = serializers.SerializerMethodField()
     ideal_candidates = serializers.SerializerMethodField()
-    
+
     class Meta:
         model = Vacancy
         fields = [
@@ -374,68 +340,52 @@ class VacancySerializer(LanguageSerializerMixin, serializers.ModelSerializer):
             'responsibilities', 'requirements', 'conditions', 'ideal_candidates',
             'is_active', 'created_at'
         ]
-    
+
+    @staticmethod
+    def eager_queryset(queryset):
+        """
+        Вложенные списки одним запросом на связь, уже отсортированные по order.
+        Геттеры ниже читают только .all() — не сбрасывают prefetch
+        """
+        return queryset.prefetch_related(
+            Prefetch('responsibilities', queryset=VacancyResponsibility.objects.order_by('order')),
+            Prefetch('requirements', queryset=VacancyRequirement.objects.order_by('order')),
+            Prefetch('conditions', queryset=VacancyCondition.objects.order_by('order')),
+            Prefetch('ideal_candidates', queryset=VacancyIdealCandidate.objects.order_by('order')),
+        )
+
+    def _items(self, related, fields=('text',)):
+        getters = {field: self.accessor(related.model, field) for field in fields}
+        return [
+            {'id': item.id, **{field: get(item) for field, get in getters.items()}}
+            for item in related.all()
+        ]
+
     def get_title(self, obj):
-        lang = self.get_current_language()  
-        return getattr(obj, f'title_{lang}', None) or obj.title
-    
+        return self.translated(obj, 'title')
+
     def get_short_description(self, obj):
-        lang = self.get_current_language()  
-        return getattr(obj, f'short_description_{lang}', None) or obj.short_description or ''
-    
+        return self.translated(obj, 'short_description')
+
     def get_contact_info(self, obj):
-        lang = self.get_current_language()  
-        return getattr(obj, f'contact_info_{lang}', None) or obj.contact_info or ''
-    
+        return self.translated(obj, 'contact_info')
+
     def get_responsibilities(self, obj):
-        lang = self.get_current_language()  
-        responsibilities = obj.responsibilities.all().order_by('order')
-        return [
-            {
-                'id': item.id, 
-                'title': getattr(item, f'title_{lang}', None) or item.title or '', 
-                'text': getattr(item, f'text_{lang}', None) or item.text or ''
-            } 
-            for item in responsibilities
-        ]
-    
+        return self._items(obj.responsibilities, fields=('title', 'text'))
+
     def get_requirements(self, obj):
-        lang = self.get_current_language()  
-        requirements = obj.requirements.all().order_by('order')
-        return [
-            {
-                'id': item.id, 
-                'text': getattr(item, f'text_{lang}', None) or item.text or ''
-            } 
-            for item in requirements
-        ]
-    
+        return self._items(obj.requirements)
+
     def get_conditions(self, obj):
-        lang = self.get_current_language()  
-        conditions = obj.conditions.all().order_by('order')
-        return [
-            {
-                'id': item.id, 
-                'text': getattr(item, f'text_{lang}', None) or item.text or ''
-            } 
-            for item in conditions
-        ]
-    
+        return self._items(obj.conditions)
+
     def get_ideal_candidates(self, obj):
-        lang = self.get_current_language()
-        candidates = obj.ideal_candidates.all().order_by('order')
-        return [
-            {
-                'id': item.id,
-                'text': getattr(item, f'text_{lang}', None) or item.text or ''
-            }
-            for item in candidates
-        ]
+        return self._items(obj.ideal_candidates)
 
 
 # ========== ОТЗЫВЫ КЛИЕНТОВ ==========
 
-class ReviewListSerializer(serializers.ModelSerializer):
+class ReviewListSerializer(MediaUrlMixin, serializers.ModelSerializer):
     """Сериализатор для отображения одобренных отзывов"""
     avatar_url = serializers.SerializerMethodField()
 
@@ -444,12 +394,7 @@ class ReviewListSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'rating', 'text', 'avatar_url', 'is_verified', 'created_at']
 
     def get_avatar_url(self, obj):
-        if obj.avatar:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.avatar.url)
-            return obj.avatar.url
-        return None
+        return self.media_url(obj.avatar)
 
 
 class ReviewCreateSerializer(serializers.ModelSerializer):
@@ -496,12 +441,13 @@ class ReviewCreateSerializer(serializers.ModelSerializer):
     def validate_recaptcha_token(self, value):
         import requests
         from django.conf import settings
+        from main.services.http_client import HttpClient
         secret_key = getattr(settings, 'RECAPTCHA_SECRET_KEY', '')
         if not secret_key:
             logger.warning("RECAPTCHA_SECRET_KEY не настроен, пропуск проверки")
             return value
         try:
-            resp = requests.post(
+            resp = HttpClient.post(
                 'https://www.google.com/recaptcha/api/siteverify',
                 data={'secret': secret_key, 'response': value},
                 timeout=5
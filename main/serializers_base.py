@@ -1,7 +1,14 @@
 # main/serializers_base.py
 
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.encoding import filepath_to_uri
 from django.utils.translation import get_language
 
+from main.translation_access import accessor, translated
+
 
 class LanguageSerializerMixin:
     """
@@ -22,4 +29,63 @@ class LanguageSerializerMixin:
             >>> self.get_current_language()
             'uz'
         """
-        return get_language() or 'uz'
\ No newline at end of file
+        return get_language() or 'uz'
+
+    def translated(self, obj, field, default=''):
+        """Joriy tildagi maydon qiymati (main/translation_access.py jadvalidan)."""
+        return translated(obj, field, self.get_current_language(), default)
+
+    def accessor(self, model, field):
+        """Ro'yxat uchun: joriy tildagi accessor (siklda qayta qidirilmaydi)."""
+        return accessor(model, field, self.get_current_language())
+
+
+class MediaUrlBuilder:
+    """
+    So'rov davomida media fayllarning to'liq URL larini yasash.
+
+    request.build_absolute_uri(obj.image.url) har rasm uchun host/sxemani qayta
+    aniqlaydi va storage.url() ni chaqiradi. Bu yerda baza (MEDIA_CDN_URL yoki
+    so'rov hosti + MEDIA_URL) bir marta hisoblanadi, fayl nomi esa unga oddiy
+    qo'shiladi. MEDIA_URL dagi FileSystemStorage bo'lmagan storage lar uchun
+    avvalgidek file.url ishlatiladi.
+    """
+
+    def __init__(self, request=None):
+        self.request = request
+        base = settings.MEDIA_CDN_URL or settings.MEDIA_URL
+        if request is not None and not urlsplit(base).netloc:
+            base = request.build_absolute_uri(base)
+        self.base = base.rstrip('/') + '/'
+        # storage -> to'g'ridan-to'g'ri qo'shsa bo'ladimi
+        self._direct = {}
+
+    def _is_direct(self, storage):
+        direct = self._direct.get(storage)
+        if direct is None:
+            direct = self._direct[storage] = (
+                isinstance(storage, FileSystemStorage) and storage.base_url == settings.MEDIA_URL
+            )
+        return direct
+
+    def __call__(self, file):
+        """FieldFile -> to'liq URL (fayl bo'lmasa None)."""
+        if not file:
+            return None
+        if self._is_direct(file.storage):
+            return self.base + filepath_to_uri(file.name).lstrip('/')
+        url = file.url
+        if self.request is not None:
+            return self.request.build_absolute_uri(url)
+        return url
+
+
+class MediaUrlMixin:
+    """Serializer-lar uchun: bitta so'rov (root serializer) ga bitta MediaUrlBuilder."""
+
+    def media_url(self, file):
+        context = self.context
+        builder = context.get('media_url_builder')
+        if builder is None:
+            builder = context['media_url_builder'] = MediaUrlBuilder(context.get('request'))
+        return builder(file)
@@ -1,4 +1,5 @@
 from .token_manager import TokenManager
 from .lead_sender import LeadSender
+from .bulk_resend import LeadResendJobRunner
 
-__all__ = ['TokenManager', 'LeadSender']
\ No newline at end of file
+__all__ = ['TokenManager', 'LeadSender', 'LeadResendJobRunner']
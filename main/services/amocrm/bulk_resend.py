@@ -0,0 +1,126 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from main.models import ContactForm, LeadOutbox, LeadResendJob
+from main.services.amocrm.lead_sender import LeadSender
+
+logger = logging.getLogger('amocrm')
+
+
+class LeadResendJobRunner:
+    """Фоновая пакетная переотправка ошибочных заявок (LeadResendJob)"""
+
+    # Задача в статусе running без обновлений дольше этого времени считается брошенной
+    STALE_AFTER = timedelta(minutes=10)
+
+    @staticmethod
+    def create_job(queryset, user=None):
+        """
+        Создать задачу по ошибочным заявкам из queryset. None — если переотправлять нечего.
+
+        Заявки, по которым outbox ещё не отправил уведомление в Telegram, остаются
+        за outbox-воркером (он повторяет и amoCRM, и Telegram).
+        """
+        with transaction.atomic():
+            failed_ids = list(queryset.filter(amocrm_status='failed').values_list('pk', flat=True))
+            open_entries = {
+                entry.contact_form_id: entry
+                for entry in LeadOutbox.objects.select_for_update().filter(
+                    contact_form_id__in=failed_ids, is_done=False
+                )
+            }
+            # Уведомление в Telegram ещё не ушло — заявку целиком (amoCRM + Telegram)
+            # доводит outbox-воркер; задача её не берёт, иначе лид создастся дважды
+            lead_ids = [
+                pk for pk in failed_ids
+                if pk not in open_entries or open_entries[pk].telegram_notified
+            ]
+            if not lead_ids:
+                return None
+
+            # Остальные заявки outbox больше не повторяет — amoCRM переотправляет задача
+            LeadOutbox.objects.filter(
+                contact_form_id__in=lead_ids, is_done=False
+            ).update(is_done=True)
+
+            return LeadResendJob.objects.create(
+                lead_ids=lead_ids,
+                total=len(lead_ids),
+                created_by=user if user and user.is_authenticated else None,
+            )
+
+    @classmethod
+    def start_async(cls, job):
+        """Запустить задачу в фоновом потоке (если поток не успеет — её заберёт run_outbox)"""
+        thread = threading.Thread(
+            target=cls.run, args=(job.pk,), daemon=True, name=f"LeadResendJob-{job.pk}"
+        )
+        thread.start()
+        return thread
+
+    @classmethod
+    def _claim(cls, job_id):
+        """Атомарно перевести задачу в running — выполняет только один процесс"""
+        stale_before = timezone.now() - cls.STALE_AFTER
+        return LeadResendJob.objects.filter(
+            Q(status='pending') | Q(status='running', updated_at__lt=stale_before),
+            pk=job_id,
+        ).update(status='running', updated_at=timezone.now()) == 1
+
+    @classmethod
+    def run(cls, job_id):
+        close_old_connections()
+        try:
+            if not cls._claim(job_id):
+                return
+
+            job = LeadResendJob.objects.get(pk=job_id)
+            leads = list(ContactForm.objects.filter(pk__in=job.lead_ids, amocrm_status='failed'))
+
+            # При перезапуске брошенной задачи уже отправленные заявки не повторяем
+            LeadResendJob.objects.filter(pk=job_id).update(
+                processed=job.total - len(leads), sent_count=0, failed_count=0
+            )
+
+            def on_chunk(sent, failed):
+                LeadResendJob.objects.filter(pk=job_id).update(
+                    processed=F('processed') + sent + failed,
+                    sent_count=F('sent_count') + sent,
+                    failed_count=F('failed_count') + failed,
+                    updated_at=timezone.now(),
+                )
+
+            LeadSender.send_leads_bulk(leads, on_chunk=on_chunk)
+
+            LeadResendJob.objects.filter(pk=job_id).update(
+                status='done', finished_at=timezone.now(), updated_at=timezone.now()
+            )
+
+        except Exception as e:
+            logger.error(f"Переотправка #{job_id}: {type(e).__name__}: {e}", exc_info=True)
+            LeadResendJob.objects.filter(pk=job_id).update(
+                status='failed',
+                error=f"{type(e).__name__}: {e}"[:1000],
+                finished_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+        finally:
+            close_old_connections()
+
+    @classmethod
+    def run_pending(cls):
+        """Выполнить ожидающие и брошенные задачи (вызывается из run_outbox)"""
+        stale_before = timezone.now() - cls.STALE_AFTER
+        job_ids = list(
+            LeadResendJob.objects.filter(
+                Q(status='pending') | Q(status='running', updated_at__lt=stale_before)
+            ).order_by('created_at').values_list('pk', flat=True)
+        )
+        for job_id in job_ids:
+            cls.run(job_id)
+        return len(job_ids)
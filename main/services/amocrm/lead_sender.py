@@ -2,8 +2,10 @@ import requests
 import logging
 from django.utils import timezone
 from django.conf import settings
-from main.models import AmoCRMToken
+from django.core.cache import cache
+from main.models import ContactForm
 from main.services.amocrm.token_manager import TokenManager
+from main.services.http_client import HttpClient
 
 logger = logging.getLogger('amocrm')
 
@@ -17,14 +19,11 @@ class LeadSender:
             return
 
         try:
-            token_obj = AmoCRMToken.get_instance()
-
-            if token_obj.is_expired():
-                TokenManager.refresh_token(token_obj)
-                token_obj.refresh_from_db()
+            # Токен из памяти процесса; обновление — под блокировкой строки AmoCRMToken
+            access_token = TokenManager.get_valid_token()
 
             pipeline_id = settings.AMOCRM_PIPELINE_ID
-            editable_status = cls._get_editable_status_for_pipeline(token_obj.access_token, pipeline_id)
+            editable_status = cls._get_editable_status_for_pipeline(access_token, pipeline_id)
             
             if editable_status:
                 status_to_use = editable_status
@@ -34,11 +33,11 @@ class LeadSender:
             lead_data = cls._prepare_lead_data(contact_form, pipeline_id, status_to_use)
 
             headers = {
-                'Authorization': f'Bearer {token_obj.access_token}',
+                'Authorization': f'Bearer {access_token}',
                 'Content-Type': 'application/json'
             }
 
-            response = requests.post(
+            response = HttpClient.post(
                 f'https://{settings.AMOCRM_SUBDOMAIN}.amocrm.ru/api/v4/leads/complex',
                 json=lead_data,
                 headers=headers,
@@ -58,6 +57,10 @@ class LeadSender:
                     raise ValueError("ID Р В Р’В Р вЂ™Р’В»Р В Р’В Р РЋРІР‚Р В Р’В Р СћРІР‚Р В Р’В Р вЂ™Р’В° Р В Р’В Р В РІР‚В¦Р В Р’В Р вЂ™Р’Вµ Р В Р’В Р В РІР‚В¦Р В Р’В Р вЂ™Р’В°Р В Р’В Р Р†РІР‚С›РІР‚вЂњР В Р’В Р СћРІР‚Р В Р’В Р вЂ™Р’ВµР В Р’В Р В РІР‚В¦ Р В Р’В Р В РІР‚В  Р В Р’В Р РЋРІР‚СћР В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р В РІР‚В Р В Р’В Р вЂ™Р’ВµР В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р вЂ™Р’Вµ amoCRM")
             else:
                 error_text = cls._parse_error_response(response)
+                if cls._is_status_error(response):
+                    cls.invalidate_pipeline_cache(pipeline_id)
+                if response.status_code == 401:
+                    TokenManager.invalidate_cache()
                 logger.error(f"Р В Р вЂ Р РЋРЎС™Р В Р вЂ° Р В Р’В Р РЋРІР‚С”Р В Р Р‹Р Р†РІР‚С™Р’В¬Р В Р’В Р РЋРІР‚Р В Р’В Р вЂ™Р’В±Р В Р’В Р РЋРІР‚СњР В Р’В Р вЂ™Р’В° amoCRM {response.status_code}: {error_text}")  
                 contact_form.amocrm_status = 'failed'
                 contact_form.amocrm_error = error_text[:500]
@@ -84,24 +87,178 @@ class LeadSender:
             contact_form.amocrm_error = error_text[:500]
             contact_form.save()
 
+    @classmethod
+    def send_leads_bulk(cls, contact_forms, chunk_size=None, on_chunk=None):
+        """
+        Пакетная отправка: до chunk_size лидов в одном запросе /leads/complex.
+        Результаты каждой пачки записываются одним bulk_update.
+        on_chunk(sent, failed) вызывается после каждой пачки (для прогресса).
+        """
+        chunk_size = chunk_size or settings.AMOCRM_BULK_CHUNK_SIZE
+        contact_forms = [
+            cf for cf in contact_forms
+            if not (cf.amocrm_status == 'sent' and cf.amocrm_lead_id)
+        ]
+        if not contact_forms:
+            return 0, 0
+
+        access_token = TokenManager.get_valid_token()
+
+        pipeline_id = settings.AMOCRM_PIPELINE_ID
+        status_to_use = (
+            cls._get_editable_status_for_pipeline(access_token, pipeline_id)
+            or settings.AMOCRM_STATUS_ID
+        )
+        headers = {
+            'Authorization': f'Bearer {access_token}',
+            'Content-Type': 'application/json'
+        }
+
+        total_sent = total_failed = 0
+        for start in range(0, len(contact_forms), chunk_size):
+            chunk = contact_forms[start:start + chunk_size]
+            sent = cls._send_chunk(chunk, headers, pipeline_id, status_to_use)
+            total_sent += sent
+            total_failed += len(chunk) - sent
+            if on_chunk:
+                on_chunk(sent, len(chunk) - sent)
+
+        return total_sent, total_failed
+
+    @classmethod
+    def _send_chunk(cls, chunk, headers, pipeline_id, status_id):
+        """Одна пачка лидов → один POST и один bulk_update. Возвращает число отправленных"""
+        payload = []
+        for contact_form in chunk:
+            lead = cls._prepare_lead_data(contact_form, pipeline_id, status_id)[0]
+            lead['request_id'] = str(contact_form.pk)
+            payload.append(lead)
+
+        lead_ids = {}
+        error_text = None
+        try:
+            response = HttpClient.post(
+                f'https://{settings.AMOCRM_SUBDOMAIN}.amocrm.ru/api/v4/leads/complex',
+                json=payload,
+                headers=headers,
+                timeout=30
+            )
+            if response.status_code in [200, 201]:
+                lead_ids = cls._map_bulk_lead_ids(response.json(), chunk)
+                error_text = "ID лида не найден в ответе amoCRM"
+            else:
+                error_text = cls._parse_error_response(response)
+                if cls._is_status_error(response):
+                    cls.invalidate_pipeline_cache(pipeline_id)
+                if response.status_code == 401:
+                    TokenManager.invalidate_cache()
+                logger.error(f"amoCRM bulk {response.status_code}: {error_text}")
+        except requests.exceptions.RequestException as e:
+            error_text = f"Ошибка соединения: {str(e)}"
+            logger.error(f"amoCRM bulk: {error_text}")
+        except Exception as e:
+            error_text = f"{type(e).__name__}: {str(e)}"
+            logger.error(f"amoCRM bulk: {error_text}", exc_info=True)
+
+        now = timezone.now()
+        sent = 0
+        for contact_form in chunk:
+            lead_id = lead_ids.get(contact_form.pk)
+            if lead_id:
+                contact_form.amocrm_status = 'sent'
+                contact_form.amocrm_lead_id = lead_id
+                contact_form.amocrm_sent_at = now
+                contact_form.amocrm_error = None
+                sent += 1
+            else:
+                contact_form.amocrm_status = 'failed'
+                contact_form.amocrm_error = (error_text or '')[:500]
+
+        ContactForm.objects.bulk_update(
+            chunk, ['amocrm_status', 'amocrm_lead_id', 'amocrm_sent_at', 'amocrm_error']
+        )
+        return sent
+
     @staticmethod
-    def _get_editable_status_for_pipeline(access_token, pipeline_id):
+    def _map_bulk_lead_ids(result, chunk):
+        """{pk заявки: id лида} по request_id из ответа (или по порядку, если его нет)"""
+        lead_ids = {}
+        if not isinstance(result, list):
+            return lead_ids
+        for index, item in enumerate(result):
+            if not isinstance(item, dict) or not item.get('id'):
+                continue
+            request_id = item.get('request_id')
+            if isinstance(request_id, list):
+                request_id = request_id[0] if request_id else None
+            try:
+                pk = int(request_id)
+            except (TypeError, ValueError):
+                pk = chunk[index].pk if index < len(chunk) else None
+            if pk is not None:
+                lead_ids[pk] = item['id']
+        return lead_ids
+
+    @staticmethod
+    def _pipeline_cache_key(pipeline_id):
+        return f'amocrm:pipeline:{pipeline_id}'
+
+    @classmethod
+    def _get_editable_status_for_pipeline(cls, access_token, pipeline_id):
         """Р В Р’В Р Р†Р вЂљРІвЂћСћР В Р’В Р РЋРІР‚СћР В Р’В Р вЂ™Р’В·Р В Р’В Р В РІР‚В Р В Р Р‹Р В РІР‚С™Р В Р’В Р вЂ™Р’В°Р В Р Р‹Р Р†Р вЂљР’В°Р В Р’В Р вЂ™Р’В°Р В Р’В Р вЂ™Р’ВµР В Р Р‹Р Р†Р вЂљРЎв„ў Р В Р’В Р РЋРІР‚вЂќР В Р’В Р вЂ™Р’ВµР В Р Р‹Р В РІР‚С™Р В Р’В Р В РІР‚В Р В Р Р‹Р Р†Р вЂљРІвЂћвЂ“Р В Р’В Р Р†РІР‚С›РІР‚вЂњ is_editable=True status_id Р В Р’В Р СћРІР‚Р В Р’В Р вЂ™Р’В»Р В Р Р‹Р В Р РЏ pipeline"""
+        meta = cache.get(cls._pipeline_cache_key(pipeline_id))
+        if meta is None:
+            meta = cls.fetch_pipeline_meta(access_token, pipeline_id)
+        return meta['editable_status_id'] if meta else None
+
+    @classmethod
+    def fetch_pipeline_meta(cls, access_token, pipeline_id):
+        """Загрузить статусы воронки из amoCRM и положить в кэш на AMOCRM_PIPELINE_CACHE_TTL"""
         try:
             url = f'https://{settings.AMOCRM_SUBDOMAIN}.amocrm.ru/api/v4/leads/pipelines/{pipeline_id}/statuses'
             headers = {'Authorization': f'Bearer {access_token}'}
-            resp = requests.get(url, headers=headers, timeout=10)
+            resp = HttpClient.get(url, headers=headers, timeout=10)
             resp.raise_for_status()
             data = resp.json()
             statuses = data.get('_embedded', {}).get('statuses', [])
+            editable_status_id = None
             for s in statuses:
                 if s.get('is_editable', False):
-                    return s.get('id')
-            return None
+                    editable_status_id = s.get('id')
+                    break
+            meta = {
+                'editable_status_id': editable_status_id,
+                'status_ids': [s.get('id') for s in statuses],
+            }
+            cache.set(cls._pipeline_cache_key(pipeline_id), meta, settings.AMOCRM_PIPELINE_CACHE_TTL)
+            return meta
         except Exception as e:
             logger.error(f"Р В Р’В Р РЋРЎС™Р В Р’В Р вЂ™Р’Вµ Р В Р Р‹Р РЋРІР‚СљР В Р’В Р СћРІР‚Р В Р’В Р вЂ™Р’В°Р В Р’В Р вЂ™Р’В»Р В Р’В Р РЋРІР‚СћР В Р Р‹Р В РЎвЂњР В Р Р‹Р В Р вЂ° Р В Р’В Р РЋРІР‚вЂќР В Р’В Р РЋРІР‚СћР В Р’В Р вЂ™Р’В»Р В Р Р‹Р РЋРІР‚СљР В Р Р‹Р Р†Р вЂљР Р‹Р В Р’В Р РЋРІР‚Р В Р Р‹Р Р†Р вЂљРЎв„ўР В Р Р‹Р В Р вЂ° Р В Р Р‹Р В РЎвЂњР В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р вЂ™Р’В°Р В Р Р‹Р Р†Р вЂљРЎв„ўР В Р Р‹Р РЋРІР‚СљР В Р Р‹Р В РЎвЂњР В Р Р‹Р Р†Р вЂљРІвЂћвЂ“ pipeline {pipeline_id}: {e}") 
             return None
 
+    @classmethod
+    def invalidate_pipeline_cache(cls, pipeline_id):
+        """Сбросить кэш статусов воронки (например, статус удалили в amoCRM)"""
+        cache.delete(cls._pipeline_cache_key(pipeline_id))
+
+    @staticmethod
+    def _is_status_error(response):
+        """Ошибка валидации amoCRM относится к status_id / pipeline_id лида"""
+        if response.status_code != 400:
+            return False
+        try:
+            error_data = response.json()
+        except ValueError:
+            return False
+        if not isinstance(error_data, dict):
+            return False
+        for item in error_data.get('validation-errors', []) or []:
+            for error in item.get('errors', []) or []:
+                path = str(error.get('path', ''))
+                if 'status' in path or 'pipeline' in path:
+                    return True
+        return False
+
     @staticmethod
     def _extract_lead_id(result):
         """Р В Р’В Р В Р’В Р вЂ™Р’В·Р В Р’В Р В РІР‚В Р В Р’В Р вЂ™Р’В»Р В Р’В Р вЂ™Р’ВµР В Р Р‹Р Р†Р вЂљР Р‹Р В Р’В Р вЂ™Р’ВµР В Р’В Р В РІР‚В¦Р В Р’В Р РЋРІР‚Р В Р’В Р вЂ™Р’Вµ ID Р В Р’В Р вЂ™Р’В»Р В Р’В Р РЋРІР‚Р В Р’В Р СћРІР‚Р В Р’В Р вЂ™Р’В° Р В Р’В Р РЋРІР‚Р В Р’В Р вЂ™Р’В· Р В Р’В Р РЋРІР‚СћР В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р В РІР‚В Р В Р’В Р вЂ™Р’ВµР В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р вЂ™Р’В° amoCRM"""
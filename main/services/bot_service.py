@@ -49,36 +49,156 @@ test_drive, error = BotService.create_test_drive_request({
 BotService.clear_bot_cache()
 """
 
+import time
+from datetime import timedelta
+
 from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import close_old_connections
 from django.db import transaction
+from django.db.models import Prefetch
 from django.utils import timezone
 from typing import List, Dict, Optional, Tuple, Any
-from main.models import TelegramUser, Dealer, Product, ProductCategory, TestDriveRequest
+from main.translation_access import accessor, translated
+from main.models import (TelegramUser, TelegramPhotoCache, Dealer, Product, ProductCategory,
+                         ProductFeature, TestDriveRequest)
 
 
 class BotService:
     """Service layer for Telegram bot operations using Django ORM"""
 
+    # Generation counter inside every bot: key (bot:v{gen}:...).
+    # Bumping it orphans all bot keys at once; they expire by TTL.
+    CACHE_GENERATION_KEY = 'bot:generation'
+    # Latency stats published by every bot process (Autoliga_Botfile/utils/metrics.py):
+    # one snapshot per pid under bot:metrics:{pid}, the pids under bot:metrics:pids
+    METRICS_CACHE_KEY = 'bot:metrics'
+    METRICS_PIDS_KEY = 'bot:metrics:pids'
+
+    # ========== CACHE KEYS ==========
+
+    @classmethod
+    def cache_generation(cls) -> int:
+        """Current bot cache generation (created on first use, bumped by clear_bot_cache)"""
+        generation = cache.get(cls.CACHE_GENERATION_KEY)
+        if generation is None:
+            # Seeded from the clock: if the counter is evicted, the new value
+            # never collides with a generation that still has live keys
+            cache.add(cls.CACHE_GENERATION_KEY, int(time.time()), timeout=None)
+            generation = cache.get(cls.CACHE_GENERATION_KEY, 0)
+        return generation
+
+    @classmethod
+    def cache_key(cls, *parts) -> str:
+        """Versioned bot cache key: cache_key('cars', 5, 'uz') -> 'bot:v{gen}:cars:5:uz'"""
+        return f"bot:v{cls.cache_generation()}:" + ':'.join(str(part) for part in parts)
+
+    # ========== BOT METRICS ==========
+
+    @classmethod
+    def metrics_cache_key(cls, pid) -> str:
+        return f"{cls.METRICS_CACHE_KEY}:{pid}"
+
+    @classmethod
+    def publish_metrics(cls, snapshot: Dict[str, Any], timeout: float) -> None:
+        """Store one process snapshot and keep its pid in the registry (expired pids are dropped)"""
+        cache.set(cls.metrics_cache_key(snapshot['pid']), snapshot, timeout)
+        pids = cache.get(cls.METRICS_PIDS_KEY) or []
+        alive = cache.get_many([cls.metrics_cache_key(pid) for pid in pids])
+        live_pids = [pid for pid in pids if cls.metrics_cache_key(pid) in alive]
+        if snapshot['pid'] not in live_pids:
+            live_pids.append(snapshot['pid'])
+        if live_pids != pids:
+            # Not atomic: a pid lost to a concurrent write is added back on its next publish
+            cache.set(cls.METRICS_PIDS_KEY, live_pids, None)
+
+    @classmethod
+    def get_metrics(cls) -> Optional[Dict[str, Any]]:
+        """Stats of all live bot processes merged into one snapshot (None if nothing published)"""
+        pids = cache.get(cls.METRICS_PIDS_KEY) or []
+        snapshots = list(cache.get_many([cls.metrics_cache_key(pid) for pid in pids]).values())
+        if not snapshots:
+            return None
+        return cls._merge_metrics(snapshots)
+
+    @staticmethod
+    def percentile(values: List[float], p: float) -> float:
+        """Nearest-rank percentile of sorted values (0.0 if empty)"""
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(len(values) * p))]
+
+    @classmethod
+    def _merge_series(cls, series: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge LatencySeries snapshots; p50/p95 are computed from the recent samples of all processes"""
+        count = sum(s['count'] for s in series)
+        recent = sorted(ms for s in series for ms in s.get('recent', ()))
+        return {
+            'count': count,
+            'errors': sum(s['errors'] for s in series),
+            'avg_ms': round(sum(s['avg_ms'] * s['count'] for s in series) / count, 1) if count else 0.0,
+            'p50_ms': round(cls.percentile(recent, 0.50), 1),
+            'p95_ms': round(cls.percentile(recent, 0.95), 1),
+            'max_ms': max((s['max_ms'] for s in series), default=0.0),
+        }
+
+    @classmethod
+    def _merge_metrics(cls, snapshots: List[Dict[str, Any]], slowest: int = 20) -> Dict[str, Any]:
+        def merge_group(name):
+            merged = {}
+            for snapshot in snapshots:
+                for key, series in snapshot[name].items():
+                    merged.setdefault(key, []).append(series)
+            stats = {key: cls._merge_series(series) for key, series in merged.items()}
+            return dict(sorted(stats.items(), key=lambda item: item[1]['p95_ms'], reverse=True))
+
+        queue = {'wait': cls._merge_series([s['queue']['wait'] for s in snapshots])}
+        queues = [s['queue'] for s in snapshots if 'workers' in s['queue']]
+        if queues:
+            for field in ('pending', 'max_pending', 'chats', 'busy_workers', 'workers'):
+                queue[field] = sum(q[field] for q in queues)
+            queue['max_chat_depth'] = max(q['max_chat_depth'] for q in queues)
+
+        samples = [{**sample, 'pid': s['pid']} for s in snapshots for sample in s['slowest']]
+        return {
+            'pids': sorted(s['pid'] for s in snapshots),
+            'processes': [
+                {'pid': s['pid'], 'started_at': s['started_at'], 'published_at': s['published_at']}
+                for s in sorted(snapshots, key=lambda s: s['pid'])
+            ],
+            'started_at': min(s['started_at'] for s in snapshots),
+            'published_at': max(s['published_at'] for s in snapshots),
+            'updates': cls._merge_series([s['updates'] for s in snapshots]),
+            'db': cls._merge_series([s['db'] for s in snapshots]),
+            'queue': queue,
+            'handlers': merge_group('handlers'),
+            'states': merge_group('states'),
+            'api': merge_group('api'),
+            'slowest': sorted(samples, key=lambda sample: sample['total_ms'], reverse=True)[:slowest],
+        }
+
     # ========== TELEGRAM USER MANAGEMENT ==========
 
     @staticmethod
     def get_telegram_user(telegram_id: int) -> Optional[TelegramUser]:
         """Get TelegramUser by telegram_id"""
-        close_old_connections()
         try:
             return TelegramUser.objects.get(telegram_id=telegram_id)
         except ObjectDoesNotExist:
             return None
 
+    @staticmethod
+    def get_user_language(telegram_id: int) -> Optional[str]:
+        """Saved bot language of a TelegramUser (None if unknown or not chosen)"""
+        return TelegramUser.objects.filter(
+            telegram_id=telegram_id
+        ).values_list('language', flat=True).first()
+
     @staticmethod
     def create_or_update_telegram_user(telegram_id: int, **kwargs) -> Tuple[TelegramUser, bool]:
         """
         Create or update TelegramUser
         Returns: (user, created)
         """
-        close_old_connections()
         user, created = TelegramUser.objects.get_or_create(
             telegram_id=telegram_id, defaults=kwargs
         )
@@ -101,17 +221,17 @@ class BotService:
         Get active brands/categories with caching
         Returns: [{'id': int, 'name': str}, ...]
         """
-        close_old_connections()
-        cache_key = f'bot:brands:{lang}'
+        cache_key = BotService.cache_key('brands', lang)
         cached = cache.get(cache_key)
         if cached is not None:
             return cached
 
         brands = ProductCategory.objects.filter(is_active=True).order_by('order', 'name')
+        name_of = accessor(ProductCategory, 'name', lang)
         result = [
             {
                 'id': brand.id,
-                'name': getattr(brand, f'name_{lang}', None) or brand.name
+                'name': name_of(brand)
             }
             for brand in brands
         ]
@@ -126,8 +246,7 @@ class BotService:
         Get active cars by brand with caching
         Returns: [{'id': int, 'title': str}, ...]
         """
-        close_old_connections()
-        cache_key = f'bot:cars:{brand_id}:{lang}'
+        cache_key = BotService.cache_key('cars', brand_id, lang)
         cached = cache.get(cache_key)
         if cached is not None:
             return cached
@@ -137,10 +256,11 @@ class BotService:
             is_active=True
         ).order_by('order', 'title')
 
+        title_of = accessor(Product, 'title', lang)
         result = [
             {
                 'id': car.id,
-                'title': getattr(car, f'title_{lang}', None) or car.title
+                'title': title_of(car)
             }
             for car in cars
         ]
@@ -150,29 +270,38 @@ class BotService:
     @staticmethod
     def get_car_detail(car_id: int, lang: str = "uz") -> Optional[Dict[str, Any]]:
         """
-        Get detailed car info with optimized queries
-        Uses select_related and prefetch_related
+        Get detailed car info with caching
+        Uses select_related and an ordered features prefetch (2 queries on a miss)
         """
-        close_old_connections()
+        cache_key = BotService.cache_key('car', car_id, lang)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             car = Product.objects.select_related('category').prefetch_related(
-                'features'
+                Prefetch('features', queryset=ProductFeature.objects.order_by('order'))
             ).get(id=car_id, is_active=True)
         except ObjectDoesNotExist:
             return None
 
+        result = BotService._car_detail_payload(car, lang)
+        cache.set(cache_key, result, timeout=600)
+        return result
+
+    @staticmethod
+    def _car_detail_payload(car: Product, lang: str) -> Dict[str, Any]:
+        """Car detail dict; car must come with category and ordered features prefetched"""
         # Get localized fields
-        title = getattr(car, f'title_{lang}', None) or car.title
-        price = getattr(car, f'slider_price_{lang}', None) or car.slider_price
-        power = getattr(car, f'slider_power_{lang}', None) or car.slider_power
-        fuel = getattr(car, f'slider_fuel_consumption_{lang}', None) or car.slider_fuel_consumption
-
-        # Get top 6 features
-        features = car.features.all().order_by('order')[:6]
-        feat_list = [
-            getattr(f, f'name_{lang}', None) or f.name
-            for f in features
-        ]
+        title = accessor(Product, 'title', lang)(car)
+        price = accessor(Product, 'slider_price', lang)(car)
+        power = accessor(Product, 'slider_power', lang)(car)
+        fuel = accessor(Product, 'slider_fuel_consumption', lang)(car)
+
+        # Top 6 features, sliced from the prefetched (already ordered) list
+        features = list(car.features.all())[:6]
+        name_of = accessor(ProductFeature, 'name', lang)
+        feat_list = [name_of(f) for f in features]
 
         return {
             'id': car.id,
@@ -180,7 +309,7 @@ class BotService:
             'slug': car.slug,
             'category': {
                 'id': car.category.id,
-                'name': getattr(car.category, f'name_{lang}', None) or car.category.name
+                'name': translated(car.category, 'name', lang)
             } if car.category else None,
             'main_image': car.main_image.url if car.main_image else None,
             'card_image': car.card_image.url if car.card_image else None,
@@ -191,32 +320,88 @@ class BotService:
             'features': feat_list,
         }
 
+    # ========== CATALOG SNAPSHOT ==========
+
+    @staticmethod
+    def get_catalog(lang: str = "uz") -> Dict[str, Any]:
+        """
+        Whole bot catalog for one language (the bot keeps it as an in-process snapshot)
+        All cars and their details come from a single products query + features prefetch
+        Returns: {'brands': [...], 'cars': {brand_id: [...]}, 'car_details': {car_id: {...}},
+                  'dealers': [...], 'td_data': {...}}
+        """
+        products = Product.objects.filter(is_active=True).select_related('category').prefetch_related(
+            Prefetch('features', queryset=ProductFeature.objects.order_by('order'))
+        ).order_by('order', 'title')
+
+        title_of = accessor(Product, 'title', lang)
+        cars = {}
+        car_details = {}
+        for car in products:
+            if car.category_id:
+                cars.setdefault(car.category_id, []).append({
+                    'id': car.id,
+                    'title': title_of(car)
+                })
+            car_details[car.id] = BotService._car_detail_payload(car, lang)
+
+        return {
+            'brands': BotService.get_brands(lang),
+            'cars': cars,
+            'car_details': car_details,
+            'dealers': BotService.get_dealers(lang),
+            'td_data': BotService.get_test_drive_form_data(lang),
+        }
+
+    # ========== TELEGRAM PHOTO FILE_ID ==========
+
+    @staticmethod
+    def get_photo_file_id(product_id: int, field: str, image_hash: str) -> Optional[str]:
+        """Telegram file_id of an already uploaded car photo, if the image is unchanged"""
+        return TelegramPhotoCache.objects.filter(
+            product_id=product_id, field=field, image_hash=image_hash
+        ).values_list('file_id', flat=True).first()
+
+    @staticmethod
+    def save_photo_file_id(product_id: int, field: str, image_hash: str, file_id: str) -> None:
+        """Remember file_id returned by Telegram after an upload"""
+        TelegramPhotoCache.objects.update_or_create(
+            product_id=product_id, field=field,
+            defaults={'image_hash': image_hash, 'file_id': file_id},
+        )
+
+    @staticmethod
+    def forget_photo_file_id(product_id: int, field: str) -> None:
+        """Drop a file_id Telegram no longer accepts"""
+        TelegramPhotoCache.objects.filter(product_id=product_id, field=field).delete()
+
     # ========== DEALERS ==========
 
+    @staticmethod
+    def _dealer_payload(dealer: Dealer, lang: str) -> Dict[str, Any]:
+        """Dealer dict in the given language"""
+        return {
+            'id': dealer.id,
+            'name': accessor(Dealer, 'name', lang)(dealer),
+            'region': dealer.region,
+            'address': accessor(Dealer, 'address', lang)(dealer),
+            'phone': dealer.phone,
+            'hours': accessor(Dealer, 'working_hours', lang)(dealer),
+        }
+
     @staticmethod
     def get_dealers(lang: str = "uz") -> List[Dict[str, Any]]:
         """
         Get active dealers with caching
         Returns: [{'id': int, 'name': str, 'region': str, 'address': str, 'phone': str, 'hours': str}, ...]
         """
-        close_old_connections()
-        cache_key = f'bot:dealers:{lang}'
+        cache_key = BotService.cache_key('dealers', lang)
         cached = cache.get(cache_key)
         if cached is not None:
             return cached
 
         dealers = Dealer.objects.filter(is_active=True).order_by('order', 'name')
-        result = [
-            {
-                'id': dealer.id,
-                'name': getattr(dealer, f'name_{lang}', None) or dealer.name,
-                'region': dealer.region,
-                'address': getattr(dealer, f'address_{lang}', None) or dealer.address,
-                'phone': dealer.phone,
-                'hours': getattr(dealer, f'working_hours_{lang}', None) or dealer.working_hours,
-            }
-            for dealer in dealers
-        ]
+        result = [BotService._dealer_payload(dealer, lang) for dealer in dealers]
         cache.set(cache_key, result, timeout=600)
         return result
 
@@ -227,28 +412,29 @@ class BotService:
         """
         Get data for test drive form (dealers, products, time slots)
         """
-        close_old_connections()
-        cache_key = f'bot:td_data:{lang}'
+        cache_key = BotService.cache_key('td_data', lang)
         cached = cache.get(cache_key)
         if cached is not None:
             return cached
 
         # Get dealers
         dealers = Dealer.objects.filter(is_active=True).order_by('order', 'name')
+        name_of = accessor(Dealer, 'name', lang)
         dealers_data = [
             {
                 'id': dealer.id,
-                'name': getattr(dealer, f'name_{lang}', None) or dealer.name
+                'name': name_of(dealer)
             }
             for dealer in dealers
         ]
 
         # Get products
         products = Product.objects.filter(is_active=True).order_by('order', 'title')
+        title_of = accessor(Product, 'title', lang)
         products_data = [
             {
                 'id': product.id,
-                'title': getattr(product, f'title_{lang}', None) or product.title
+                'title': title_of(product)
             }
             for product in products
         ]
@@ -266,25 +452,28 @@ class BotService:
         return result
 
     @staticmethod
-    def create_test_drive_request(data: Dict[str, Any]) -> Tuple[Optional[TestDriveRequest], Optional[str]]:
+    def create_test_drive_request(data: Dict[str, Any], notify: bool = True) -> Tuple[Optional[TestDriveRequest], Optional[str]]:
         """
         Create test drive request with validation
         Returns: (TestDriveRequest or None, error_message or None)
 
         Validation:
         - Daily limit: 2 requests per phone number
+
+        notify=False: the caller sends the group notification itself
+        (the bot queues it on its event loop, see test_drive_notification_text)
         """
-        close_old_connections()
         try:
             with transaction.atomic():
                 phone = data.get('phone', '')
 
-                # Check daily limit
+                # Check daily limit: a created_at range (not __date) uses the (phone, created_at) index
                 if phone:
-                    today = timezone.now().date()
+                    day_start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
                     today_count = TestDriveRequest.objects.filter(
                         phone=phone,
-                        created_at__date=today
+                        created_at__gte=day_start,
+                        created_at__lt=day_start + timedelta(days=1),
                     ).count()
                     if today_count >= 2:
                         return None, 'daily_limit'
@@ -292,41 +481,47 @@ class BotService:
                 # Create request
                 request_obj = TestDriveRequest.objects.create(**data)
 
-                # Send notification (optional, can be moved to caller)
-                try:
-                    from main.services.telegram import TelegramNotificationSender
-                    TelegramNotificationSender.send_test_drive_notification(request_obj)
-                except Exception as e:
-                    # Log error but don't fail the request
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.error(f"Telegram notification error: {e}")
-
-                return request_obj, None
-
         except Exception as e:
             return None, str(e)
 
-    # ========== UTILITY METHODS ==========
+        # Outside the transaction: a slow Telegram call must not hold it open
+        if notify:
+            try:
+                from main.services.telegram import TelegramNotificationSender
+                TelegramNotificationSender.send_test_drive_notification(request_obj)
+            except Exception as e:
+                # Log error but don't fail the request
+                import logging
+                logger = logging.getLogger(__name__)
+                logger.error(f"Telegram notification error: {e}")
+
+        return request_obj, None
 
     @staticmethod
-    def clear_bot_cache():
-        """Clear all bot-related cache"""
-        cache_keys = [
-            key for key in cache.keys('*')
-            if key.startswith('bot:')
-        ]
-        cache.delete_many(cache_keys)
+    def test_drive_notification_text(test_drive: TestDriveRequest) -> str:
+        """Group notification text for a created test drive request (loads dealer and product)"""
+        from main.services.telegram import TelegramNotificationSender
+        return TelegramNotificationSender.format_test_drive_message(test_drive)
+
+    # ========== UTILITY METHODS ==========
+
+    @classmethod
+    def clear_bot_cache(cls):
+        """Clear all bot-related cache (O(1): bumps the key generation)"""
+        try:
+            cache.incr(cls.CACHE_GENERATION_KEY)
+        except ValueError:
+            # No counter yet - nothing versioned was cached under it
+            cache.add(cls.CACHE_GENERATION_KEY, int(time.time()), timeout=None)
 
     @staticmethod
     def get_brand_by_id(brand_id: int, lang: str = "uz") -> Optional[Dict[str, Any]]:
         """Get single brand by ID"""
-        close_old_connections()
         try:
             brand = ProductCategory.objects.get(id=brand_id, is_active=True)
             return {
                 'id': brand.id,
-                'name': getattr(brand, f'name_{lang}', None) or brand.name,
+                'name': translated(brand, 'name', lang),
                 'slug': brand.slug
             }
         except ObjectDoesNotExist:
@@ -335,16 +530,8 @@ class BotService:
     @staticmethod
     def get_dealer_by_id(dealer_id: int, lang: str = "uz") -> Optional[Dict[str, Any]]:
         """Get single dealer by ID"""
-        close_old_connections()
         try:
             dealer = Dealer.objects.get(id=dealer_id, is_active=True)
-            return {
-                'id': dealer.id,
-                'name': getattr(dealer, f'name_{lang}', None) or dealer.name,
-                'region': dealer.region,
-                'address': getattr(dealer, f'address_{lang}', None) or dealer.address,
-                'phone': dealer.phone,
-                'hours': getattr(dealer, f'working_hours_{lang}', None) or dealer.working_hours,
-            }
+            return BotService._dealer_payload(dealer, lang)
         except ObjectDoesNotExist:
             return None
\ No newline at end of file
@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class HostMetrics:
+    """Статистика задержек запросов к одному хосту"""
+
+    def __init__(self, window=200):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent = deque(maxlen=window)
+
+    def record(self, elapsed_ms, failed, retries=0):
+        self.count += 1
+        self.retries += retries
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.recent.append(elapsed_ms)
+        if failed:
+            self.errors += 1
+
+    def snapshot(self):
+        recent = sorted(self.recent)
+
+        def percentile(p):
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(len(recent) * p))]
+
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'retries': self.retries,
+            'avg_ms': round(self.total_ms / self.count, 1) if self.count else 0.0,
+            'p50_ms': round(percentile(0.50), 1),
+            'p95_ms': round(percentile(0.95), 1),
+            'max_ms': round(self.max_ms, 1),
+        }
+
+
+class HttpClient:
+    """
+    Общий HTTP-клиент процесса для внешних интеграций (amoCRM, Telegram, reCAPTCHA).
+
+    На каждый хост — свой requests.Session с пулом keep-alive соединений,
+    таймаутами по умолчанию и политикой повторов. Повторы по статусу и обрывам
+    чтения — только для идемпотентных методов; ошибки соединения повторяются
+    для всех методов (запрос до сервера не дошёл).
+    """
+
+    _sessions = {}
+    _metrics = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _host(url):
+        parts = urlsplit(url)
+        return f'{parts.scheme}://{parts.netloc}'
+
+    @staticmethod
+    def _build_session():
+        retry = Retry(
+            total=settings.HTTP_CLIENT_RETRIES,
+            connect=settings.HTTP_CLIENT_RETRIES,
+            read=settings.HTTP_CLIENT_RETRIES,
+            status=settings.HTTP_CLIENT_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'GET', 'HEAD', 'OPTIONS'}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.HTTP_CLIENT_POOL_SIZE,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @classmethod
+    def session_for(cls, url):
+        """Пул соединений для хоста из url (создаётся один раз на процесс)"""
+        host = cls._host(url)
+        session = cls._sessions.get(host)
+        if session is None:
+            with cls._lock:
+                session = cls._sessions.get(host)
+                if session is None:
+                    session = cls._build_session()
+                    cls._sessions[host] = session
+                    cls._metrics.setdefault(host, HostMetrics())
+        return session
+
+    @classmethod
+    def request(cls, method, url, timeout=None, **kwargs):
+        """
+        Выполнить запрос через пул хоста.
+
+        timeout: число — таймаут чтения (соединение — HTTP_CLIENT_CONNECT_TIMEOUT),
+        кортеж (connect, read) — как в requests, None — значения из настроек.
+        """
+        if timeout is None:
+            timeout = (settings.HTTP_CLIENT_CONNECT_TIMEOUT, settings.HTTP_CLIENT_READ_TIMEOUT)
+        elif not isinstance(timeout, tuple):
+            timeout = (min(settings.HTTP_CLIENT_CONNECT_TIMEOUT, timeout), timeout)
+
+        session = cls.session_for(url)
+        host = cls._host(url)
+        started = time.perf_counter()
+        failed = True
+        retries = 0
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+            failed = response.status_code >= 500
+            # История повторов urllib3 (по статусу и обрывам) для этого запроса
+            history = getattr(response.raw, 'retries', None)
+            retries = len(history.history) if history is not None else 0
+            return response
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with cls._lock:
+                cls._metrics.setdefault(host, HostMetrics()).record(elapsed_ms, failed, retries)
+
+    @classmethod
+    def get(cls, url, **kwargs):
+        return cls.request('GET', url, **kwargs)
+
+    @classmethod
+    def post(cls, url, **kwargs):
+        return cls.request('POST', url, **kwargs)
+
+    @classmethod
+    def get_metrics(cls):
+        """Задержки по хостам: {host: {count, errors, retries, avg_ms, p50_ms, p95_ms, max_ms}}"""
+        with cls._lock:
+            return {host: metrics.snapshot() for host, metrics in cls._metrics.items()}
+
+    @classmethod
+    def close(cls):
+        """Закрыть все пулы (например, при завершении воркера)"""
+        with cls._lock:
+            for session in cls._sessions.values():
+                session.close()
+            cls._sessions.clear()
+            cls._metrics.clear()
@@ -0,0 +1,124 @@
+import logging
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from main.models import LeadOutbox
+
+logger = logging.getLogger('amocrm')
+
+
+class LeadOutboxProcessor:
+    """Фоновая отправка заявок из очереди LeadOutbox в amoCRM и Telegram"""
+
+    # Сколько секунд заявка «занята» воркером; если он упал — её возьмёт другой
+    LEASE_SECONDS = 300
+
+    @staticmethod
+    def enqueue(contact_form):
+        """Поставить заявку в очередь (вызывать в той же транзакции, что и INSERT)"""
+        return LeadOutbox.objects.create(contact_form=contact_form)
+
+    @staticmethod
+    def backoff_delay(attempts):
+        """Экспоненциальная задержка перед следующей попыткой (с небольшим разбросом)"""
+        base = settings.LEAD_OUTBOX_BACKOFF_BASE
+        delay = min(base * (2 ** max(attempts - 1, 0)), settings.LEAD_OUTBOX_BACKOFF_MAX)
+        return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+    @classmethod
+    def claim_batch(cls, limit):
+        """Забрать готовые к отправке заявки, чтобы параллельный воркер их не взял"""
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                LeadOutbox.objects
+                .select_for_update(skip_locked=True)
+                .filter(is_done=False, next_attempt_at__lte=now)
+                .order_by('next_attempt_at')
+                .values_list('pk', flat=True)[:limit]
+            )
+            if ids:
+                LeadOutbox.objects.filter(pk__in=ids).update(
+                    next_attempt_at=now + timedelta(seconds=cls.LEASE_SECONDS)
+                )
+        return list(
+            LeadOutbox.objects.select_related('contact_form').filter(pk__in=ids).order_by('pk')
+        )
+
+    @classmethod
+    def process(cls, entry):
+        """Одна попытка доставки: amoCRM, затем уведомление в Telegram"""
+        from main.services.amocrm.lead_sender import LeadSender
+        from main.services.telegram import TelegramNotificationSender
+
+        contact_form = entry.contact_form
+
+        # LeadSender сам пишет amocrm_status / amocrm_error
+        if contact_form.amocrm_status != 'sent':
+            try:
+                LeadSender.send_lead(contact_form)
+            except Exception as e:
+                logger.error(f"Outbox: ошибка amoCRM для лида #{contact_form.id}: {e}", exc_info=True)
+
+        entry.attempts += 1
+
+        # Уведомление уходит после первой попытки amoCRM (как и раньше — со статусом отправки)
+        if not entry.telegram_notified:
+            try:
+                sent = TelegramNotificationSender.send_lead_notification(contact_form)
+            except Exception as e:
+                logger.error(f"Outbox: ошибка Telegram для лида #{contact_form.id}: {e}", exc_info=True)
+                sent = False
+            entry.telegram_notified = sent is not False
+
+        delivered = contact_form.amocrm_status == 'sent' and entry.telegram_notified
+
+        if delivered or entry.attempts >= settings.LEAD_OUTBOX_MAX_ATTEMPTS:
+            entry.is_done = True
+            if not delivered:
+                logger.error(
+                    f"Outbox: лид #{contact_form.id} не доставлен после {entry.attempts} попыток"
+                )
+        else:
+            entry.next_attempt_at = timezone.now() + cls.backoff_delay(entry.attempts)
+
+        entry.save(update_fields=['attempts', 'telegram_notified', 'is_done', 'next_attempt_at', 'updated_at'])
+        return delivered
+
+    @classmethod
+    def drain(cls, batch_size=None):
+        """Обработать одну пачку готовых заявок. Возвращает число обработанных"""
+        batch_size = batch_size or settings.LEAD_OUTBOX_BATCH_SIZE
+        entries = cls.claim_batch(batch_size)
+        for entry in entries:
+            cls.process(entry)
+        return len(entries)
+
+    @classmethod
+    def run_forever(cls, batch_size=None, poll_interval=None, stop_event=None):
+        """Цикл воркера: разбирает очередь и задачи переотправки, пока не установлен stop_event"""
+        from main.services.amocrm.bulk_resend import LeadResendJobRunner
+
+        poll_interval = poll_interval or settings.LEAD_OUTBOX_POLL_INTERVAL
+
+        while stop_event is None or not stop_event.is_set():
+            close_old_connections()
+            try:
+                processed = cls.drain(batch_size)
+                # Пакетные переотправки из админки (если их не выполнил фоновый поток)
+                processed += LeadResendJobRunner.run_pending()
+            except Exception as e:
+                logger.error(f"Outbox: ошибка воркера: {e}", exc_info=True)
+                processed = 0
+
+            # Пустая очередь — ждём; полная пачка — сразу берём следующую
+            if not processed:
+                if stop_event is not None:
+                    stop_event.wait(poll_interval)
+                else:
+                    time.sleep(poll_interval)
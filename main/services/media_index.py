@@ -0,0 +1,134 @@
+import logging
+import os
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+from main.models import Product
+
+logger = logging.getLogger(__name__)
+
+
+class MediaIndex:
+    """
+    Индекс изображений товаров: относительный URL → путь на диске, размер, mtime.
+
+    Файловая система проверяется один раз — при построении индекса и при
+    сохранении товара (сигнал), а не на каждый показ машины в боте. Индекс
+    лежит в общем кеше: бот забирает его вместе со снапшотом каталога,
+    админка показывает товары, у которых файла нет.
+
+    Индекс — один объект в кеше, поэтому запись (сборка, обновление товара)
+    идёт под блокировкой LOCK_KEY: параллельные сохранения товаров в разных
+    процессах иначе затирали бы изменения друг друга. Блокировку не ждут —
+    обновление идёт в on_commit запроса админки: если она занята, индекс
+    сбрасывается и собирается заново при следующем чтении.
+    """
+
+    CACHE_KEY = 'bot:media_index'
+    LOCK_KEY = 'bot:media_index:lock'
+    # Ставится, когда обновление не получило блокировку: держатель не оставит свою копию индекса
+    STALE_KEY = 'bot:media_index:stale'
+    # Сек: блокировка упавшего процесса снимается сама
+    LOCK_TIMEOUT = 30
+    IMAGE_FIELDS = ('main_image', 'card_image')
+
+    @classmethod
+    @contextmanager
+    def _lock(cls):
+        """Блокировка записи индекса между процессами (cache.add), без ожидания; False — занята"""
+        token = uuid.uuid4().hex
+        if not cache.add(cls.LOCK_KEY, token, timeout=cls.LOCK_TIMEOUT):
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            if cache.get(cls.STALE_KEY):
+                # Пока индекс писали, товар сохранили ещё раз — записанная копия уже устарела
+                cache.delete_many([cls.STALE_KEY, cls.CACHE_KEY])
+            if cache.get(cls.LOCK_KEY) == token:
+                cache.delete(cls.LOCK_KEY)
+
+    @staticmethod
+    def resolve(name):
+        """Запись индекса для файла (name — путь относительно MEDIA_ROOT)"""
+        root = os.path.abspath(settings.MEDIA_ROOT)
+        path = os.path.normpath(os.path.join(root, name.lstrip('/\\')))
+        if not path.startswith(root + os.sep):
+            return {'name': name, 'path': None}
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return {'name': name, 'path': None}
+        return {'name': name, 'path': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    @classmethod
+    def _add_product(cls, index, product, recheck=False):
+        for image in (getattr(product, field) for field in cls.IMAGE_FIELDS):
+            if not image:
+                continue
+            entry = index.get(image.url)
+            if entry is None or recheck:
+                products = entry['products'] if entry else []
+                entry = index[image.url] = {**cls.resolve(image.name), 'products': products}
+            entry['products'] = sorted({*entry['products'], product.pk})
+
+    @staticmethod
+    def _drop_product(index, product_id):
+        for url in list(index):
+            products = [pk for pk in index[url]['products'] if pk != product_id]
+            if products:
+                index[url]['products'] = products
+            else:
+                del index[url]
+
+    @classmethod
+    def build(cls):
+        """Полная пересборка по всем товарам"""
+        with cls._lock() as locked:
+            index = {}
+            for product in Product.objects.only('pk', *cls.IMAGE_FIELDS).iterator():
+                cls._add_product(index, product)
+            if locked:
+                cache.set(cls.CACHE_KEY, index, timeout=None)
+            else:
+                # Индекс сейчас пишет другой процесс — результат не сохраняем, чтобы не затереть его
+                logger.warning("MediaIndex: блокировка занята, собранный индекс не сохранён")
+        return index
+
+    @classmethod
+    def get_index(cls):
+        """{url: запись}; строится при первом обращении"""
+        index = cache.get(cls.CACHE_KEY)
+        if index is None:
+            index = cls.build()
+        return index
+
+    @classmethod
+    def update_product(cls, product, deleted=False):
+        """Перепроверить файлы одного товара (post_save / post_delete)"""
+        with cls._lock() as locked:
+            if not locked:
+                # Индекс пишет другой процесс — сбрасываем, соберётся целиком при следующем чтении
+                logger.warning(f"MediaIndex: блокировка занята, индекс сброшен (товар {product.pk})")
+                cache.set(cls.STALE_KEY, True, timeout=cls.LOCK_TIMEOUT)
+                cache.delete(cls.CACHE_KEY)
+                return
+            index = cache.get(cls.CACHE_KEY)
+            if index is None:
+                # Индекса ещё нет — соберётся целиком при первом чтении
+                return
+            # Прежние картинки товара уходят из индекса, если на них никто больше не ссылается
+            cls._drop_product(index, product.pk)
+            if not deleted:
+                # Файл могли заменить под тем же именем — диск проверяется заново
+                cls._add_product(index, product, recheck=True)
+            cache.set(cls.CACHE_KEY, index, timeout=None)
+
+    @classmethod
+    def missing_names(cls):
+        """Имена файлов (как в ImageField), которых нет на диске"""
+        return sorted({entry['name'] for entry in cls.get_index().values() if entry['path'] is None})
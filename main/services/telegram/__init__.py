@@ -1,3 +1,4 @@
 from .notification_sender import TelegramNotificationSender
+from .broadcast import BotBroadcastRunner
 
-__all__ = ['TelegramNotificationSender']
\ No newline at end of file
+__all__ = ['TelegramNotificationSender', 'BotBroadcastRunner']
@@ -0,0 +1,332 @@
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from html.parser import HTMLParser
+
+import requests
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from main.models import BotBroadcast
+from main.services.http_client import HttpClient
+
+logger = logging.getLogger('django')
+
+DELIVERED = 'delivered'
+FAILED = 'failed'
+BLOCKED = 'blocked'
+
+# Теги parse_mode=HTML (https://core.telegram.org/bots/api#html-style)
+TELEGRAM_HTML_TAGS = {
+    'b', 'strong', 'i', 'em', 'u', 'ins', 's', 'strike', 'del', 'span', 'tg-spoiler',
+    'a', 'tg-emoji', 'code', 'pre', 'blockquote',
+}
+MAX_TEXT_LENGTH = 4096
+
+# Ошибки 400, которые относятся к самому сообщению, а не к получателю — повторятся у всех
+REQUEST_ERRORS = ("can't parse entities", 'message is too long', 'message text is empty', 'text must be non-empty')
+
+
+class BroadcastAborted(Exception):
+    """Ошибка запроса (текст, токен) — остальным получателям отправлять бессмысленно"""
+
+
+class _TelegramHTMLValidator(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.open_tags = []
+        self.text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in TELEGRAM_HTML_TAGS:
+            raise ValueError(f'Тег <{tag}> не поддерживается Telegram')
+        self.open_tags.append(tag)
+
+    def handle_endtag(self, tag):
+        if not self.open_tags or self.open_tags[-1] != tag:
+            raise ValueError(f'Лишний или не на месте закрывающий тег </{tag}>')
+        self.open_tags.pop()
+
+    def handle_data(self, data):
+        self.text.append(data)
+
+
+def validate_text(text):
+    """Проверить текст рассылки до отправки (разметка HTML, длина). ValueError — с причиной"""
+    if not text or not text.strip():
+        raise ValueError('Текст сообщения пустой')
+    parser = _TelegramHTMLValidator()
+    parser.feed(text)
+    parser.close()
+    if parser.open_tags:
+        raise ValueError(f'Не закрыт тег <{parser.open_tags[-1]}>')
+    # Telegram считает длину в UTF-16 после разбора разметки
+    length = len(''.join(parser.text).strip().encode('utf-16-le')) // 2
+    if length > MAX_TEXT_LENGTH:
+        raise ValueError(f'Сообщение длиннее {MAX_TEXT_LENGTH} символов ({length})')
+
+
+class TokenBucket:
+    """Потокобезопасное ведро токенов: rate токенов в секунду, не больше capacity подряд"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Дождаться и забрать один токен"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._updated:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    # Пауза после 429 ещё не закончилась
+                    wait = self._updated - now
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Остановить выдачу токенов на seconds (retry_after от Telegram)"""
+        with self._lock:
+            self._tokens = 0
+            self._updated = max(self._updated, time.monotonic() + seconds)
+
+
+class RateGovernor:
+    """Общий лимит исходящих сообщений бота + минимальный интервал между сообщениями в один чат"""
+
+    def __init__(self, rate=None, chat_interval=None):
+        self.bucket = TokenBucket(rate or settings.BOT_BROADCAST_RATE)
+        self.chat_interval = settings.BOT_BROADCAST_CHAT_INTERVAL if chat_interval is None else chat_interval
+        self._next_for_chat = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, chat_id):
+        with self._lock:
+            now = time.monotonic()
+            ready_at = max(now, self._next_for_chat.get(chat_id, 0.0))
+            self._next_for_chat[chat_id] = ready_at + self.chat_interval
+            # Чаты, в которые давно не писали, больше не ограничены
+            if len(self._next_for_chat) > 10000:
+                self._next_for_chat = {k: v for k, v in self._next_for_chat.items() if v > now}
+        if ready_at > now:
+            time.sleep(ready_at - now)
+        self.bucket.acquire()
+
+    def pause(self, seconds):
+        self.bucket.pause(seconds)
+
+
+class BotBroadcastRunner:
+    """Рассылка пользователям клиентского бота (BotBroadcast) с учётом лимитов Telegram"""
+
+    # Задача в статусе running без обновлений дольше этого времени считается брошенной
+    STALE_AFTER = timedelta(minutes=10)
+    # Сколько раз пробовать одно сообщение (429 с retry_after тоже считается)
+    MAX_ATTEMPTS = 5
+    # Как часто идущая рассылка обновляет updated_at (в том числе во время паузы после 429)
+    HEARTBEAT_INTERVAL = 60
+
+    @staticmethod
+    def check_token():
+        """getMe: BOT_TOKEN задан и принят Telegram (иначе каждая отправка — 401/404)"""
+        if not settings.BOT_TOKEN:
+            raise ValueError('BOT_TOKEN не задан')
+        try:
+            response = HttpClient.get(f"https://api.telegram.org/bot{settings.BOT_TOKEN}/getMe")
+        except requests.exceptions.RequestException as e:
+            # Сеть недоступна — не повод отказываться от рассылки, run() остановится сам
+            logger.warning(f"Рассылка: не удалось проверить BOT_TOKEN: {e}")
+            return
+        if response.status_code in (401, 404):
+            raise ValueError(f'BOT_TOKEN отклонён Telegram ({response.status_code})')
+
+    @classmethod
+    def create_job(cls, text, users=None, language='', user=None):
+        """
+        Создать рассылку: users — queryset TelegramUser (None — все пользователи).
+
+        ValueError — текст или токен не пройдут в Telegram (рассылка не создаётся).
+        """
+        validate_text(text)
+        cls.check_token()
+        job = BotBroadcast(
+            text=text,
+            language=language or '',
+            user_ids=list(users.values_list('pk', flat=True)) if users is not None else None,
+            created_by=user if user and user.is_authenticated else None,
+        )
+        job.total = job.recipients().count()
+        job.save()
+        return job
+
+    @classmethod
+    def start_async(cls, job):
+        """Запустить рассылку в фоновом потоке (прерванную продолжит send_broadcast --pending)"""
+        thread = threading.Thread(
+            target=cls.run, args=(job.pk,), daemon=True, name=f"BotBroadcast-{job.pk}"
+        )
+        thread.start()
+        return thread
+
+    @classmethod
+    def _claim(cls, job_id):
+        """Атомарно перевести рассылку в running — выполняет только один процесс"""
+        stale_before = timezone.now() - cls.STALE_AFTER
+        return BotBroadcast.objects.filter(
+            Q(status='pending') | Q(status='running', updated_at__lt=stale_before),
+            pk=job_id,
+        ).update(status='running', updated_at=timezone.now()) == 1
+
+    @classmethod
+    def _heartbeat(cls, job_id, finished):
+        """Пока рассылка идёт, обновлять updated_at — иначе run_pending сочтёт её брошенной"""
+        try:
+            while not finished.wait(cls.HEARTBEAT_INTERVAL):
+                BotBroadcast.objects.filter(pk=job_id, status='running').update(updated_at=timezone.now())
+        except Exception as e:
+            logger.error(f"Рассылка #{job_id}: heartbeat: {e}")
+        finally:
+            connection.close()
+
+    @classmethod
+    def send_message(cls, chat_id, text, governor, aborted=None):
+        """
+        Отправить одно сообщение: DELIVERED, BLOCKED (бот заблокирован / чат удалён) или FAILED.
+
+        Ошибка запроса (401/404, неверная разметка, длина) — BroadcastAborted; aborted
+        (threading.Event) выставляется, чтобы остальные потоки не отправляли.
+        """
+        url = f"https://api.telegram.org/bot{settings.BOT_TOKEN}/sendMessage"
+        payload = {
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": "HTML",
+            "disable_web_page_preview": True,
+        }
+
+        for _ in range(cls.MAX_ATTEMPTS):
+            if aborted is not None and aborted.is_set():
+                raise BroadcastAborted('рассылка остановлена')
+            governor.acquire(chat_id)
+            try:
+                response = HttpClient.post(url, json=payload)
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Рассылка: чат {chat_id}: {e}")
+                continue
+
+            if response.status_code == 200:
+                return DELIVERED
+
+            try:
+                data = response.json()
+            except ValueError:
+                data = {}
+
+            if response.status_code == 429:
+                # Flood control: ждут все потоки, а не только этот
+                retry_after = (data.get('parameters') or {}).get('retry_after', 1)
+                logger.warning(f"Рассылка: 429, пауза {retry_after} сек")
+                governor.pause(retry_after)
+                continue
+
+            description = data.get('description', '')
+            if response.status_code in (401, 404) or (
+                response.status_code == 400 and any(error in description for error in REQUEST_ERRORS)
+            ):
+                if aborted is not None:
+                    aborted.set()
+                raise BroadcastAborted(f"{response.status_code} {description[:200]}")
+            if response.status_code == 403 or 'chat not found' in description:
+                return BLOCKED
+            if response.status_code >= 500:
+                continue
+
+            logger.warning(f"Рассылка: чат {chat_id}: {response.status_code} {description[:200]}")
+            return FAILED
+
+        return FAILED
+
+    @classmethod
+    def run(cls, job_id):
+        close_old_connections()
+        finished = threading.Event()
+        try:
+            if not cls._claim(job_id):
+                return
+
+            heartbeat = threading.Thread(
+                target=cls._heartbeat, args=(job_id, finished), daemon=True, name=f"BotBroadcast-{job_id}-heartbeat"
+            )
+            heartbeat.start()
+
+            job = BotBroadcast.objects.get(pk=job_id)
+            recipients = job.recipients()
+            governor = RateGovernor()
+            aborted = threading.Event()
+            batch_size = settings.BOT_BROADCAST_BATCH_SIZE
+
+            with ThreadPoolExecutor(max_workers=settings.BOT_BROADCAST_WORKERS) as pool:
+                while True:
+                    batch = list(
+                        recipients.filter(pk__gt=job.last_user_id).values_list('pk', 'telegram_id')[:batch_size]
+                    )
+                    if not batch:
+                        break
+
+                    results = Counter(pool.map(
+                        lambda chat_id: cls.send_message(chat_id, job.text, governor, aborted),
+                        [telegram_id for _, telegram_id in batch],
+                    ))
+
+                    # Чекпоинт: после падения продолжаем со следующей пачки
+                    job.last_user_id = batch[-1][0]
+                    BotBroadcast.objects.filter(pk=job_id).update(
+                        last_user_id=job.last_user_id,
+                        delivered_count=F('delivered_count') + results[DELIVERED],
+                        failed_count=F('failed_count') + results[FAILED],
+                        blocked_count=F('blocked_count') + results[BLOCKED],
+                        updated_at=timezone.now(),
+                    )
+
+            BotBroadcast.objects.filter(pk=job_id).update(
+                status='done', finished_at=timezone.now(), updated_at=timezone.now()
+            )
+
+        except Exception as e:
+            logger.error(f"Рассылка #{job_id}: {type(e).__name__}: {e}", exc_info=True)
+            BotBroadcast.objects.filter(pk=job_id).update(
+                status='failed',
+                error=f"{type(e).__name__}: {e}"[:1000],
+                finished_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+        finally:
+            finished.set()
+            close_old_connections()
+
+    @classmethod
+    def run_pending(cls):
+        """Выполнить ожидающие и продолжить брошенные рассылки"""
+        stale_before = timezone.now() - cls.STALE_AFTER
+        job_ids = list(
+            BotBroadcast.objects.filter(
+                Q(status='pending') | Q(status='running', updated_at__lt=stale_before)
+            ).order_by('created_at').values_list('pk', flat=True)
+        )
+        for job_id in job_ids:
+            cls.run(job_id)
+        return len(job_ids)
@@ -3,6 +3,7 @@ import logging
 import json
 from django.conf import settings
 import pytz
+from main.services.http_client import HttpClient
 
 logger = logging.getLogger('django')
 
@@ -41,10 +42,11 @@ class TelegramNotificationSender:
             if reply_markup:
                 payload["reply_markup"] = reply_markup
             
-            response = requests.post(url, json=payload, timeout=5)
+            response = HttpClient.post(url, json=payload, timeout=5)
             
             if response.status_code == 200:
                 logger.info(f"Telegram Р В Р Р‹Р РЋРІР‚СљР В Р’В Р В РІР‚В Р В Р’В Р вЂ™Р’ВµР В Р’В Р СћРІР‚Р В Р’В Р РЋРІР‚СћР В Р’В Р РЋР В Р’В Р вЂ™Р’В»Р В Р’В Р вЂ™Р’ВµР В Р’В Р В РІР‚В¦Р В Р’В Р РЋРІР‚Р В Р’В Р вЂ™Р’Вµ Р В Р’В Р РЋРІР‚СћР В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р РЋРІР‚вЂќР В Р Р‹Р В РІР‚С™Р В Р’В Р вЂ™Р’В°Р В Р’В Р В РІР‚В Р В Р’В Р вЂ™Р’В»Р В Р’В Р вЂ™Р’ВµР В Р’В Р В РІР‚В¦Р В Р’В Р РЋРІР‚Сћ Р В Р’В Р СћРІР‚Р В Р’В Р вЂ™Р’В»Р В Р Р‹Р В Р РЏ Р В Р’В Р вЂ™Р’В»Р В Р’В Р РЋРІР‚Р В Р’В Р СћРІР‚Р В Р’В Р вЂ™Р’В° #{contact_form.id}")
+                return True
             else:
                 logger.error(
                     f"Р В Р’В Р РЋРІР‚С”Р В Р Р‹Р Р†РІР‚С™Р’В¬Р В Р’В Р РЋРІР‚Р В Р’В Р вЂ™Р’В±Р В Р’В Р РЋРІР‚СњР В Р’В Р вЂ™Р’В° Telegram {response.status_code} Р В Р’В Р СћРІР‚Р В Р’В Р вЂ™Р’В»Р В Р Р‹Р В Р РЏ Р В Р’В Р вЂ™Р’В»Р В Р’В Р РЋРІР‚Р В Р’В Р СћРІР‚Р В Р’В Р вЂ™Р’В° #{contact_form.id}: {response.text[:200]}"
@@ -58,6 +60,8 @@ class TelegramNotificationSender:
         
         except Exception as e:
             logger.error(f"Р В Р’В Р РЋРІвЂћСћР В Р Р‹Р В РІР‚С™Р В Р’В Р РЋРІР‚Р В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р РЋРІР‚Р В Р Р‹Р Р†Р вЂљР Р‹Р В Р’В Р вЂ™Р’ВµР В Р Р‹Р В РЎвЂњР В Р’В Р РЋРІР‚СњР В Р’В Р вЂ™Р’В°Р В Р Р‹Р В Р РЏ Р В Р’В Р РЋРІР‚СћР В Р Р‹Р Р†РІР‚С™Р’В¬Р В Р’В Р РЋРІР‚Р В Р’В Р вЂ™Р’В±Р В Р’В Р РЋРІР‚СњР В Р’В Р вЂ™Р’В° Telegram Р В Р’В Р СћРІР‚Р В Р’В Р вЂ™Р’В»Р В Р Р‹Р В Р РЏ Р В Р’В Р вЂ™Р’В»Р В Р’В Р РЋРІР‚Р В Р’В Р СћРІР‚Р В Р’В Р вЂ™Р’В° #{contact_form.id}: {str(e)}", exc_info=True)
+        
+        return False
     
     @staticmethod
     def _format_message(contact_form):
@@ -139,6 +143,29 @@ class TelegramNotificationSender:
         
         return message
     
+    @staticmethod
+    def format_test_drive_message(td):
+        """Текст уведомления о тест-драйве (td с загруженными dealer/product)"""
+        message = f"Р РЋР вЂљР РЋРЎСџР В Р РЏР В РІР‚в„– Р В Р’В Р РЋРЎС™Р В Р’В Р РЋРІР‚СћР В Р’В Р В РІР‚В Р В Р’В Р вЂ™Р’В°Р В Р Р‹Р В Р РЏ Р В Р’В Р вЂ™Р’В·Р В Р’В Р вЂ™Р’В°Р В Р Р‹Р В Р РЏР В Р’В Р В РІР‚В Р В Р’В Р РЋРІР‚СњР В Р’В Р вЂ™Р’В° Р В Р’В Р В РІР‚В¦Р В Р’В Р вЂ™Р’В° Р В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р вЂ™Р’ВµР В Р Р‹Р В РЎвЂњР В Р Р‹Р Р†Р вЂљРЎв„ў-Р В Р’В Р СћРІР‚Р В Р Р‹Р В РІР‚С™Р В Р’В Р вЂ™Р’В°Р В Р’В Р Р†РІР‚С›РІР‚вЂњР В Р’В Р В РІР‚В  #{td.id}\n"
+        message += f"\nР РЋР вЂљР РЋРЎСџР Р†Р вЂљР вЂ™Р’В¤ Р В Р’В Р РЋРІвЂћСћР В Р’В Р вЂ™Р’В»Р В Р’В Р РЋРІР‚Р В Р’В Р вЂ™Р’ВµР В Р’В Р В РІР‚В¦Р В Р Р‹Р Р†Р вЂљРЎв„ў: {td.name}"
+        message += f"\nР РЋР вЂљР РЋРЎСџР Р†Р вЂљРЎС™Р РЋРІР‚С” Р В Р’В Р РЋРЎвЂєР В Р’В Р вЂ™Р’ВµР В Р’В Р вЂ™Р’В»Р В Р’В Р вЂ™Р’ВµР В Р Р‹Р Р†Р вЂљРЎвЂєР В Р’В Р РЋРІР‚СћР В Р’В Р В РІР‚В¦: {td.phone}"
+
+        if td.dealer:
+            message += f"\nР РЋР вЂљР РЋРЎСџР В Р РЏР РЋРЎвЂє Р В Р’В Р Р†Р вЂљРЎСљР В Р’В Р РЋРІР‚Р В Р’В Р вЂ™Р’В»Р В Р’В Р вЂ™Р’ВµР В Р Р‹Р В РІР‚С™: {td.dealer.name}"
+            if td.dealer.address:
+                message += f"\nР РЋР вЂљР РЋРЎСџР Р†Р вЂљРЎС™Р В Р Р‰ Р В Р’В Р РЋРІР‚в„ўР В Р’В Р СћРІР‚Р В Р Р‹Р В РІР‚С™Р В Р’В Р вЂ™Р’ВµР В Р Р‹Р В РЎвЂњ: {td.dealer.address}"
+
+        if td.product:
+            message += f"\nР РЋР вЂљР РЋРЎСџР РЋРІвЂћСћР Р†Р вЂљРІР‚Сњ Р В Р’В Р РЋРЎв„ўР В Р’В Р РЋРІР‚СћР В Р’В Р СћРІР‚Р В Р’В Р вЂ™Р’ВµР В Р’В Р вЂ™Р’В»Р В Р Р‹Р В Р вЂ°: {td.product.title}"
+
+        message += f"\nР РЋР вЂљР РЋРЎСџР Р†Р вЂљРЎС™Р Р†Р вЂљР’В¦ Р В Р’В Р Р†Р вЂљРЎСљР В Р’В Р вЂ™Р’В°Р В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р вЂ™Р’В°: {td.preferred_date.strftime('%d.%m.%Y')}"
+        message += f"\nР РЋР вЂљР РЋРЎСџР Р†Р вЂљРЎС›Р РЋРІР‚в„ў Р В Р’В Р Р†Р вЂљРІвЂћСћР В Р Р‹Р В РІР‚С™Р В Р’В Р вЂ™Р’ВµР В Р’В Р РЋР В Р Р‹Р В Р РЏ: {td.preferred_time}"
+
+        tz = pytz.timezone(settings.TIME_ZONE)
+        created_time = td.created_at.astimezone(tz).strftime('%d.%m.%Y Р В Р’В Р В РІР‚В  %H:%M')
+        message += f"\n\nР В Р вЂ Р В Р РЏР вЂ™Р’В° {created_time}"
+        return message
+
     @classmethod
     def send_test_drive_notification(cls, td):
         """Р В Р’В Р РЋРІР‚С”Р В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р РЋРІР‚вЂќР В Р Р‹Р В РІР‚С™Р В Р’В Р вЂ™Р’В°Р В Р’В Р В РІР‚В Р В Р’В Р РЋРІР‚Р В Р Р‹Р Р†Р вЂљРЎв„ўР В Р Р‹Р В Р вЂ° Р В Р Р‹Р РЋРІР‚СљР В Р’В Р В РІР‚В Р В Р’В Р вЂ™Р’ВµР В Р’В Р СћРІР‚Р В Р’В Р РЋРІР‚СћР В Р’В Р РЋР В Р’В Р вЂ™Р’В»Р В Р’В Р вЂ™Р’ВµР В Р’В Р В РІР‚В¦Р В Р’В Р РЋРІР‚Р В Р’В Р вЂ™Р’Вµ Р В Р’В Р РЋРІР‚Сћ Р В Р’В Р В РІР‚В¦Р В Р’В Р РЋРІР‚СћР В Р’В Р В РІР‚В Р В Р’В Р РЋРІР‚СћР В Р’В Р Р†РІР‚С›РІР‚вЂњ Р В Р’В Р вЂ™Р’В·Р В Р’В Р вЂ™Р’В°Р В Р Р‹Р В Р РЏР В Р’В Р В РІР‚В Р В Р’В Р РЋРІР‚СњР В Р’В Р вЂ™Р’Вµ Р В Р’В Р В РІР‚В¦Р В Р’В Р вЂ™Р’В° Р В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р вЂ™Р’ВµР В Р Р‹Р В РЎвЂњР В Р Р‹Р Р†Р вЂљРЎв„ў-Р В Р’В Р СћРІР‚Р В Р Р‹Р В РІР‚С™Р В Р’В Р вЂ™Р’В°Р В Р’В Р Р†РІР‚С›РІР‚вЂњР В Р’В Р В РІР‚В """
@@ -150,24 +177,7 @@ class TelegramNotificationSender:
                 logger.warning("Telegram Р В Р’В Р В РІР‚В¦Р В Р’В Р вЂ™Р’В°Р В Р Р‹Р В РЎвЂњР В Р Р‹Р Р†Р вЂљРЎв„ўР В Р Р‹Р В РІР‚С™Р В Р’В Р РЋРІР‚СћР В Р’В Р Р†РІР‚С›РІР‚вЂњР В Р’В Р РЋРІР‚СњР В Р’В Р РЋРІР‚ Р В Р’В Р В РІР‚В¦Р В Р’В Р вЂ™Р’Вµ Р В Р’В Р вЂ™Р’В·Р В Р’В Р вЂ™Р’В°Р В Р’В Р СћРІР‚Р В Р’В Р вЂ™Р’В°Р В Р’В Р В РІР‚В¦Р В Р Р‹Р Р†Р вЂљРІвЂћвЂ“ Р В Р’В Р В РІР‚В  .env")
                 return
 
-            message = f"Р РЋР вЂљР РЋРЎСџР В Р РЏР В РІР‚в„– Р В Р’В Р РЋРЎС™Р В Р’В Р РЋРІР‚СћР В Р’В Р В РІР‚В Р В Р’В Р вЂ™Р’В°Р В Р Р‹Р В Р РЏ Р В Р’В Р вЂ™Р’В·Р В Р’В Р вЂ™Р’В°Р В Р Р‹Р В Р РЏР В Р’В Р В РІР‚В Р В Р’В Р РЋРІР‚СњР В Р’В Р вЂ™Р’В° Р В Р’В Р В РІР‚В¦Р В Р’В Р вЂ™Р’В° Р В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р вЂ™Р’ВµР В Р Р‹Р В РЎвЂњР В Р Р‹Р Р†Р вЂљРЎв„ў-Р В Р’В Р СћРІР‚Р В Р Р‹Р В РІР‚С™Р В Р’В Р вЂ™Р’В°Р В Р’В Р Р†РІР‚С›РІР‚вЂњР В Р’В Р В РІР‚В  #{td.id}\n"
-            message += f"\nР РЋР вЂљР РЋРЎСџР Р†Р вЂљР вЂ™Р’В¤ Р В Р’В Р РЋРІвЂћСћР В Р’В Р вЂ™Р’В»Р В Р’В Р РЋРІР‚Р В Р’В Р вЂ™Р’ВµР В Р’В Р В РІР‚В¦Р В Р Р‹Р Р†Р вЂљРЎв„ў: {td.name}"
-            message += f"\nР РЋР вЂљР РЋРЎСџР Р†Р вЂљРЎС™Р РЋРІР‚С” Р В Р’В Р РЋРЎвЂєР В Р’В Р вЂ™Р’ВµР В Р’В Р вЂ™Р’В»Р В Р’В Р вЂ™Р’ВµР В Р Р‹Р Р†Р вЂљРЎвЂєР В Р’В Р РЋРІР‚СћР В Р’В Р В РІР‚В¦: {td.phone}"
-
-            if td.dealer:
-                message += f"\nР РЋР вЂљР РЋРЎСџР В Р РЏР РЋРЎвЂє Р В Р’В Р Р†Р вЂљРЎСљР В Р’В Р РЋРІР‚Р В Р’В Р вЂ™Р’В»Р В Р’В Р вЂ™Р’ВµР В Р Р‹Р В РІР‚С™: {td.dealer.name}"
-                if td.dealer.address:
-                    message += f"\nР РЋР вЂљР РЋРЎСџР Р†Р вЂљРЎС™Р В Р Р‰ Р В Р’В Р РЋРІР‚в„ўР В Р’В Р СћРІР‚Р В Р Р‹Р В РІР‚С™Р В Р’В Р вЂ™Р’ВµР В Р Р‹Р В РЎвЂњ: {td.dealer.address}"
-
-            if td.product:
-                message += f"\nР РЋР вЂљР РЋРЎСџР РЋРІвЂћСћР Р†Р вЂљРІР‚Сњ Р В Р’В Р РЋРЎв„ўР В Р’В Р РЋРІР‚СћР В Р’В Р СћРІР‚Р В Р’В Р вЂ™Р’ВµР В Р’В Р вЂ™Р’В»Р В Р Р‹Р В Р вЂ°: {td.product.title}"
-
-            message += f"\nР РЋР вЂљР РЋРЎСџР Р†Р вЂљРЎС™Р Р†Р вЂљР’В¦ Р В Р’В Р Р†Р вЂљРЎСљР В Р’В Р вЂ™Р’В°Р В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р вЂ™Р’В°: {td.preferred_date.strftime('%d.%m.%Y')}"
-            message += f"\nР РЋР вЂљР РЋРЎСџР Р†Р вЂљРЎС›Р РЋРІР‚в„ў Р В Р’В Р Р†Р вЂљРІвЂћСћР В Р Р‹Р В РІР‚С™Р В Р’В Р вЂ™Р’ВµР В Р’В Р РЋР В Р Р‹Р В Р РЏ: {td.preferred_time}"
-
-            tz = pytz.timezone(settings.TIME_ZONE)
-            created_time = td.created_at.astimezone(tz).strftime('%d.%m.%Y Р В Р’В Р В РІР‚В  %H:%M')
-            message += f"\n\nР В Р вЂ Р В Р РЏР вЂ™Р’В° {created_time}"
+            message = cls.format_test_drive_message(td)
 
             url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
             payload = {
@@ -177,7 +187,7 @@ class TelegramNotificationSender:
                 "disable_web_page_preview": True,
             }
 
-            response = requests.post(url, json=payload, timeout=5)
+            response = HttpClient.post(url, json=payload, timeout=5)
 
             if response.status_code == 200:
                 logger.info(f"Telegram Р В Р Р‹Р РЋРІР‚СљР В Р’В Р В РІР‚В Р В Р’В Р вЂ™Р’ВµР В Р’В Р СћРІР‚Р В Р’В Р РЋРІР‚СћР В Р’В Р РЋР В Р’В Р вЂ™Р’В»Р В Р’В Р вЂ™Р’ВµР В Р’В Р В РІР‚В¦Р В Р’В Р РЋРІР‚Р В Р’В Р вЂ™Р’Вµ Р В Р’В Р РЋРІР‚СћР В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р РЋРІР‚вЂќР В Р Р‹Р В РІР‚С™Р В Р’В Р вЂ™Р’В°Р В Р’В Р В РІР‚В Р В Р’В Р вЂ™Р’В»Р В Р’В Р вЂ™Р’ВµР В Р’В Р В РІР‚В¦Р В Р’В Р РЋРІР‚Сћ Р В Р’В Р СћРІР‚Р В Р’В Р вЂ™Р’В»Р В Р Р‹Р В Р РЏ Р В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р вЂ™Р’ВµР В Р Р‹Р В РЎвЂњР В Р Р‹Р Р†Р вЂљРЎв„ў-Р В Р’В Р СћРІР‚Р В Р Р‹Р В РІР‚С™Р В Р’В Р вЂ™Р’В°Р В Р’В Р Р†РІР‚С›РІР‚вЂњР В Р’В Р В РІР‚В Р В Р’В Р вЂ™Р’В° #{td.id}")
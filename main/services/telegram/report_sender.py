@@ -1,4 +1,3 @@
-import requests
 import logging
 import json
 from django.conf import settings
@@ -6,6 +5,7 @@ from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import timedelta, datetime
 import pytz
+from main.services.http_client import HttpClient
 
 logger = logging.getLogger('django')
 
@@ -194,7 +194,7 @@ class TelegramReportSender:
                 "disable_web_page_preview": True,
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = HttpClient.post(url, json=payload, timeout=10)
             
             if response.status_code == 200:
                 logger.info("Р В Р’В Р Р†Р вЂљРЎС›Р В Р’В Р вЂ™Р’В¶Р В Р’В Р вЂ™Р’ВµР В Р’В Р СћРІР‚Р В Р’В Р В РІР‚В¦Р В Р’В Р вЂ™Р’ВµР В Р’В Р В РІР‚В Р В Р’В Р В РІР‚В¦Р В Р Р‹Р Р†Р вЂљРІвЂћвЂ“Р В Р’В Р Р†РІР‚С›РІР‚вЂњ Р В Р’В Р РЋРІР‚СћР В Р Р‹Р Р†Р вЂљРЎв„ўР В Р Р‹Р Р†Р вЂљР Р‹Р В Р Р‹Р Р†Р вЂљР В Р Р‹Р Р†Р вЂљРЎв„ў Telegram Р В Р’В Р РЋРІР‚СћР В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р РЋРІР‚вЂќР В Р Р‹Р В РІР‚С™Р В Р’В Р вЂ™Р’В°Р В Р’В Р В РІР‚В Р В Р’В Р вЂ™Р’В»Р В Р’В Р вЂ™Р’ВµР В Р’В Р В РІР‚В¦")
@@ -552,7 +552,7 @@ class TelegramReportSender:
                 "disable_web_page_preview": True,
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = HttpClient.post(url, json=payload, timeout=10)
             
             if response.status_code == 200:
                 logger.info("Р В Р’В Р Р†Р вЂљРЎС›Р В Р’В Р вЂ™Р’В¶Р В Р’В Р вЂ™Р’ВµР В Р’В Р В РІР‚В¦Р В Р’В Р вЂ™Р’ВµР В Р’В Р СћРІР‚Р В Р’В Р вЂ™Р’ВµР В Р’В Р вЂ™Р’В»Р В Р Р‹Р В Р вЂ°Р В Р’В Р В РІР‚В¦Р В Р Р‹Р Р†Р вЂљРІвЂћвЂ“Р В Р’В Р Р†РІР‚С›РІР‚вЂњ Р В Р’В Р РЋРІР‚СћР В Р Р‹Р Р†Р вЂљРЎв„ўР В Р Р‹Р Р†Р вЂљР Р‹Р В Р Р‹Р Р†Р вЂљР В Р Р‹Р Р†Р вЂљРЎв„ў Telegram Р В Р’В Р РЋРІР‚СћР В Р Р‹Р Р†Р вЂљРЎв„ўР В Р’В Р РЋРІР‚вЂќР В Р Р‹Р В РІР‚С™Р В Р’В Р вЂ™Р’В°Р В Р’В Р В РІР‚В Р В Р’В Р вЂ™Р’В»Р В Р’В Р вЂ™Р’ВµР В Р’В Р В РІР‚В¦")
@@ -1,43 +1,124 @@
+import time
+
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.core.cache import cache
 
+from main.services.bot_service import BotService
+from main.services.media_index import MediaIndex
+
 
 LANGUAGES = ('uz', 'ru', 'en')
 
 
-def _clear_bot_cache(model_name, instance=None):
-    """Bot API cache ni tozalash вЂ” model o'zgarganda avtomatik chaqiriladi."""
-    if model_name == 'ProductCategory':
-        for lang in LANGUAGES:
-            cache.delete(f'bot:brands:{lang}')
-            # Brand o'zgarganda unga tegishli cars cache ham eskiradi
-            cache.delete(f'bot:cars:{instance.id}:{lang}') if instance else None
+def home_cache_key(lang):
+    """Kalit: bosh sahifa konteksti (views.index) — til bo'yicha."""
+    return f'home:context:{lang}'
+
+
+def _clear_home_cache():
+    """Bosh sahifa cache ni tozalash — yangilik, mahsulot, kategoriya, diler yoki menejer o'zgarganda."""
+    cache.delete_many([home_cache_key(lang) for lang in LANGUAGES])
+
+
+# Mahsulot API (ProductViewSet, ProductCategoryViewSet) javoblari shu versiya bilan
+# cache lanadi va ETag oladi; katalog o'zgarganda versiya oshadi
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def catalog_version():
+    """Joriy katalog versiyasi (birinchi murojaatda soatdan yaratiladi)."""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Hisoblagich cache dan chiqib ketsa ham yangi qiymat eski versiyalar bilan to'qnashmaydi
+        cache.add(CATALOG_VERSION_KEY, int(time.time()), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY, 0)
+    return version
+
+
+def _bump_catalog_version():
+    """Katalog versiyasini oshirish — eski API javoblari kalitsiz qoladi va TTL bilan o'chadi."""
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOG_VERSION_KEY, int(time.time()), timeout=None)
+
+
+def _clear_bot_cache():
+    """Bot API cache ni tozalash — model o'zgarganda avtomatik chaqiriladi.
 
-    elif model_name == 'Product':
-        for lang in LANGUAGES:
-            if instance and instance.category_id:
-                cache.delete(f'bot:cars:{instance.category_id}:{lang}')
-            cache.delete(f'bot:car:{instance.id}:{lang}') if instance else None
+    Alohida kalitlarni sanab o'chirish o'rniga BotService kalit avlodini
+    (bot:v{gen}:...) oshiradi: yangi kalit shakllari ham o'tkazib yuborilmaydi.
+    """
+    BotService.clear_bot_cache()
 
-    elif model_name == 'Dealer':
-        for lang in LANGUAGES:
-            cache.delete(f'bot:dealers:{lang}')
+
+def _clear_caches():
+    """Bot va bosh sahifa cache ini tranzaksiya commit bo'lgandan keyin tozalash.
+
+    Commit dan oldin tozalansa, boshqa worker (yoki bot jarayoni) eski ma'lumotni
+    o'qib, umumiy cache ga qayta yozib qo'yishi mumkin.
+    """
+    def clear():
+        _clear_bot_cache()
+        _clear_home_cache()
+
+    transaction.on_commit(clear)
 
 
 @receiver(post_save, sender='main.ProductCategory')
 @receiver(post_delete, sender='main.ProductCategory')
 def clear_brand_cache(sender, instance, **kwargs):
-    _clear_bot_cache('ProductCategory', instance)
+    _clear_caches()
+    transaction.on_commit(_bump_catalog_version)
 
 
 @receiver(post_save, sender='main.Product')
 @receiver(post_delete, sender='main.Product')
 def clear_product_cache(sender, instance, **kwargs):
-    _clear_bot_cache('Product', instance)
+    # Rasm fayllari bot avlodi oshishidan oldin qayta tekshiriladi —
+    # bot yangi snapshot bilan yangi indeksni oladi
+    deleted = kwargs.get('signal') is post_delete
+    transaction.on_commit(lambda: MediaIndex.update_product(instance, deleted=deleted))
+    _clear_caches()
+    transaction.on_commit(_bump_catalog_version)
+
+
+@receiver(post_save, sender='main.ProductFeature')
+@receiver(post_delete, sender='main.ProductFeature')
+def clear_product_feature_cache(sender, instance, **kwargs):
+    _clear_caches()
+    transaction.on_commit(_bump_catalog_version)
+
+
+@receiver(post_save, sender='main.ProductParameter')
+@receiver(post_delete, sender='main.ProductParameter')
+@receiver(post_save, sender='main.ParameterCategory')
+@receiver(post_delete, sender='main.ParameterCategory')
+@receiver(post_save, sender='main.ProductCardSpec')
+@receiver(post_delete, sender='main.ProductCardSpec')
+@receiver(post_save, sender='main.ProductGallery')
+@receiver(post_delete, sender='main.ProductGallery')
+@receiver(post_save, sender='main.FeatureIcon')
+@receiver(post_delete, sender='main.FeatureIcon')
+def bump_catalog_version(sender, instance, **kwargs):
+    transaction.on_commit(_bump_catalog_version)
 
 
 @receiver(post_save, sender='main.Dealer')
 @receiver(post_delete, sender='main.Dealer')
 def clear_dealer_cache(sender, instance, **kwargs):
-    _clear_bot_cache('Dealer', instance)
\ No newline at end of file
+    _clear_caches()
+
+
+@receiver(post_save, sender='main.News')
+@receiver(post_delete, sender='main.News')
+def clear_news_cache(sender, instance, **kwargs):
+    transaction.on_commit(_clear_home_cache)
+
+
+@receiver(post_save, sender='main.BranchManager')
+@receiver(post_delete, sender='main.BranchManager')
+def clear_branch_manager_cache(sender, instance, **kwargs):
+    transaction.on_commit(_clear_home_cache)
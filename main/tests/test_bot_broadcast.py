@@ -0,0 +1,166 @@
+import time
+from datetime import timedelta
+from unittest.mock import patch, MagicMock
+
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from main.models import BotBroadcast, TelegramUser
+from main.services.telegram import BotBroadcastRunner
+from main.services.telegram.broadcast import TokenBucket, validate_text
+
+
+def _telegram_response(status_code, **data):
+    response = MagicMock(status_code=status_code)
+    response.json.return_value = {'ok': status_code == 200, **data}
+    return response
+
+
+@override_settings(
+    BOT_TOKEN='test', BOT_BROADCAST_RATE=1000, BOT_BROADCAST_CHAT_INTERVAL=0,
+    BOT_BROADCAST_WORKERS=2, BOT_BROADCAST_BATCH_SIZE=2,
+)
+class BotBroadcastTest(TestCase):
+    """Рассылка пользователям бота: лимиты, 429, чекпоинт"""
+
+    def setUp(self):
+        self.users = [
+            TelegramUser.objects.create(telegram_id=100 + i, language='ru' if i % 2 else 'uz')
+            for i in range(5)
+        ]
+        # getMe в create_job
+        get_me = patch('main.services.telegram.broadcast.HttpClient.get', return_value=_telegram_response(200))
+        self.get_me = get_me.start()
+        self.addCleanup(get_me.stop)
+
+    def _send(self, url, json, **kwargs):
+        chat_id = json['chat_id']
+        if chat_id == 101:
+            return _telegram_response(403, description='Forbidden: bot was blocked by the user')
+        if chat_id == 102:
+            return _telegram_response(400, description='Bad Request: PEER_ID_INVALID')
+        # Первая попытка в чат 103 упирается во flood control
+        if chat_id == 103 and chat_id not in self.flooded:
+            self.flooded.add(chat_id)
+            return _telegram_response(429, parameters={'retry_after': 0})
+        return _telegram_response(200)
+
+    def test_counts_and_retry_after(self):
+        """Доставлено / заблокировали / ошибка; после 429 сообщение отправляется повторно"""
+        self.flooded = set()
+        job = BotBroadcastRunner.create_job('<b>Aksiya</b>')
+        self.assertEqual(job.total, 5)
+
+        with patch('main.services.telegram.broadcast.HttpClient.post', side_effect=self._send) as post:
+            BotBroadcastRunner.run(job.pk)
+
+        self.assertEqual(post.call_count, 6)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual((job.delivered_count, job.blocked_count, job.failed_count), (3, 1, 1))
+        self.assertEqual(job.last_user_id, self.users[-1].pk)
+
+    def test_resume_from_checkpoint(self):
+        """Прерванная рассылка продолжается после last_user_id, уже отправленным не пишет"""
+        job = BotBroadcastRunner.create_job('Salom', users=TelegramUser.objects.filter(language='uz'))
+        BotBroadcast.objects.filter(pk=job.pk).update(last_user_id=self.users[0].pk, delivered_count=1)
+
+        with patch('main.services.telegram.broadcast.HttpClient.post', return_value=_telegram_response(200)) as post:
+            BotBroadcastRunner.run(job.pk)
+            self.assertEqual(BotBroadcastRunner.run_pending(), 0)
+
+        self.assertEqual([c.kwargs['json']['chat_id'] for c in post.call_args_list], [102, 104])
+        job.refresh_from_db()
+        self.assertEqual((job.total, job.delivered_count, job.status), (3, 3, 'done'))
+
+    def test_request_error_aborts_job(self):
+        """Ошибка самого запроса (разметка, токен) не перебирает всех получателей"""
+        for status_code, description in (
+            (400, "Bad Request: can't parse entities: unsupported start tag \"br\" at byte offset 5"),
+            (404, 'Not Found'),
+        ):
+            job = BotBroadcastRunner.create_job('Salom')
+            response = _telegram_response(status_code, description=description)
+            with patch('main.services.telegram.broadcast.HttpClient.post', return_value=response) as post:
+                BotBroadcastRunner.run(job.pk)
+
+            self.assertLessEqual(post.call_count, 2)  # по одному на поток
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.failed_count, job.last_user_id), ('failed', 0, 0))
+            self.assertIn(str(status_code), job.error)
+
+    def test_create_job_validates_text_and_token(self):
+        with self.assertRaisesMessage(ValueError, '<br>'):
+            BotBroadcastRunner.create_job('Salom<br>')
+        with override_settings(BOT_TOKEN=''):
+            with self.assertRaisesMessage(ValueError, 'BOT_TOKEN'):
+                BotBroadcastRunner.create_job('Salom')
+        self.get_me.return_value = _telegram_response(401, description='Unauthorized')
+        with self.assertRaisesMessage(ValueError, 'BOT_TOKEN'):
+            BotBroadcastRunner.create_job('Salom')
+        self.assertFalse(BotBroadcast.objects.exists())
+
+
+class ValidateTextTest(TestCase):
+    """Разметка parse_mode=HTML проверяется до создания рассылки"""
+
+    def test_valid(self):
+        validate_text('<b>Aksiya</b> &amp; <a href="https://autoliga.uz">sayt</a>\n<i>-10%</i>')
+
+    def test_invalid(self):
+        for text in ('', '   ', 'Salom<br>', '<b>Aksiya', '<b><i>Aksiya</b></i>', 'Aksiya</b>', 'x' * 4097):
+            with self.subTest(text=text[:20]):
+                with self.assertRaises(ValueError):
+                    validate_text(text)
+
+    def test_length_counts_text_not_tags(self):
+        validate_text('<b>' + 'x' * 4096 + '</b>')
+
+
+@override_settings(
+    BOT_TOKEN='test', BOT_BROADCAST_RATE=1000, BOT_BROADCAST_CHAT_INTERVAL=0,
+    BOT_BROADCAST_WORKERS=1, BOT_BROADCAST_BATCH_SIZE=10,
+)
+class BotBroadcastHeartbeatTest(TransactionTestCase):
+    """Пауза после 429 не делает идущую рассылку «брошенной» для send_broadcast --pending"""
+
+    def test_paused_job_not_reclaimed(self):
+        TelegramUser.objects.create(telegram_id=100, language='uz')
+        TelegramUser.objects.create(telegram_id=101, language='uz')
+        with patch('main.services.telegram.broadcast.HttpClient.get', return_value=_telegram_response(200)):
+            job = BotBroadcastRunner.create_job('Salom')
+        reclaimed = []
+        flooded = []
+
+        def send(url, json, **kwargs):
+            if not flooded:
+                flooded.append(json['chat_id'])
+                return _telegram_response(429, parameters={'retry_after': 0.5})
+            if not reclaimed:
+                # Пауза закончилась: cron в это время пытался бы забрать рассылку
+                reclaimed.append(BotBroadcastRunner._claim(job.pk))
+            return _telegram_response(200)
+
+        with patch.object(BotBroadcastRunner, 'HEARTBEAT_INTERVAL', 0.05), \
+                patch.object(BotBroadcastRunner, 'STALE_AFTER', timedelta(seconds=0.3)), \
+                patch('main.services.telegram.broadcast.HttpClient.post', side_effect=send):
+            BotBroadcastRunner.run(job.pk)
+
+        self.assertEqual(reclaimed, [False])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.delivered_count), ('done', 2))
+
+
+class TokenBucketTest(TestCase):
+    """Ведро токенов ограничивает темп и выдерживает паузу retry_after"""
+
+    def test_rate_and_pause(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        started = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+        bucket.pause(0.1)
+        started = time.monotonic()
+        bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
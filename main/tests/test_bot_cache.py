@@ -0,0 +1,239 @@
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from main.models import Product, ProductCategory, ProductFeature, TelegramUser, TestDriveRequest
+from main.services.bot_service import BotService
+from main.services.media_index import MediaIndex
+
+
+class BotCacheGenerationTest(TestCase):
+    """Версионированные ключи bot:v{gen}:... и их сброс"""
+
+    def setUp(self):
+        cache.clear()
+        self.brand = ProductCategory.objects.create(name='Chevrolet', slug='chevrolet')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_clear_bot_cache_bumps_generation(self):
+        """clear_bot_cache не перебирает ключи, а меняет поколение"""
+        old_key = BotService.cache_key('brands', 'uz')
+        BotService.get_brands('uz')
+        self.assertIsNotNone(cache.get(old_key))
+
+        BotService.clear_bot_cache()
+
+        self.assertNotEqual(BotService.cache_key('brands', 'uz'), old_key)
+        with self.assertNumQueries(1):
+            self.assertEqual(BotService.get_brands('uz'), [{'id': self.brand.id, 'name': 'Chevrolet'}])
+
+    def test_model_change_flushes_all_bot_keys(self):
+        """Изменение бренда сбрасывает и ключи, которые сигнал не перечисляет (td_data)"""
+        BotService.get_brands('uz')
+        BotService.get_test_drive_form_data('uz')
+
+        self.brand.name = 'Chevrolet Uz'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brand.save()
+
+        self.assertIsNone(cache.get(BotService.cache_key('td_data', 'uz')))
+        self.assertEqual(BotService.get_brands('uz')[0]['name'], 'Chevrolet Uz')
+
+
+class BotCarDetailCacheTest(TestCase):
+    """Кэш карточки автомобиля в боте"""
+
+    def setUp(self):
+        cache.clear()
+        brand = ProductCategory.objects.create(name='Chevrolet', slug='chevrolet')
+        self.car = Product.objects.create(
+            title='Tracker', slug='tracker', category=brand, main_image='products/main/tracker.jpg'
+        )
+        for order in range(8, 0, -1):
+            ProductFeature.objects.create(product=self.car, name=f'Feature {order}', order=order)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_detail_cached_and_features_from_prefetch(self):
+        """Промах — 2 запроса (авто+бренд, характеристики), повтор — 0"""
+        with self.assertNumQueries(2):
+            detail = BotService.get_car_detail(self.car.id, 'uz')
+        self.assertEqual(detail['features'], [f'Feature {order}' for order in range(1, 7)])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(BotService.get_car_detail(self.car.id, 'uz'), detail)
+
+    def test_catalog_snapshot_in_few_queries(self):
+        """Каталог для снапшота бота: машины и карточки одним запросом + характеристики"""
+        with self.assertNumQueries(6):
+            catalog = BotService.get_catalog('uz')
+
+        brand_id = self.car.category_id
+        self.assertEqual(catalog['cars'][brand_id], [{'id': self.car.id, 'title': 'Tracker'}])
+        self.assertEqual(catalog['car_details'][self.car.id], BotService.get_car_detail(self.car.id, 'uz'))
+
+    def test_feature_change_invalidates_detail(self):
+        """Правка характеристики сбрасывает кэш карточки"""
+        BotService.get_car_detail(self.car.id, 'uz')
+
+        feature = self.car.features.get(order=1)
+        feature.name = 'Panorama'
+        with self.captureOnCommitCallbacks(execute=True):
+            feature.save()
+
+        self.assertEqual(BotService.get_car_detail(self.car.id, 'uz')['features'][0], 'Panorama')
+
+
+class TelegramPhotoCacheTest(TestCase):
+    """file_id загруженных в Telegram фото автомобиля"""
+
+    def setUp(self):
+        self.car = Product.objects.create(title='Tracker', slug='tracker', main_image='products/main/tracker.jpg')
+
+    def test_file_id_reused_until_image_changes(self):
+        """file_id отдаётся только для того же hash изображения"""
+        self.assertIsNone(BotService.get_photo_file_id(self.car.id, 'main_image', 'hash-1'))
+
+        BotService.save_photo_file_id(self.car.id, 'main_image', 'hash-1', 'AgAC-1')
+        self.assertEqual(BotService.get_photo_file_id(self.car.id, 'main_image', 'hash-1'), 'AgAC-1')
+        self.assertIsNone(BotService.get_photo_file_id(self.car.id, 'main_image', 'hash-2'))
+
+        BotService.save_photo_file_id(self.car.id, 'main_image', 'hash-2', 'AgAC-2')
+        self.assertEqual(self.car.telegram_photos.count(), 1)
+        self.assertEqual(BotService.get_photo_file_id(self.car.id, 'main_image', 'hash-2'), 'AgAC-2')
+
+
+class TelegramUserLanguageTest(TestCase):
+    """Язык пользователя бота сохраняется в TelegramUser"""
+
+    def test_language_read_back_after_update(self):
+        """Незнакомый пользователь — None, после выбора — сохранённый язык"""
+        self.assertIsNone(BotService.get_user_language(1001))
+
+        BotService.create_or_update_telegram_user(1001, language='ru', username='client')
+        with self.assertNumQueries(1):
+            self.assertEqual(BotService.get_user_language(1001), 'ru')
+        self.assertEqual(TelegramUser.objects.get(telegram_id=1001).username, 'client')
+
+
+class MediaIndexTest(TestCase):
+    """Индекс изображений: файл проверяется при сборке и сохранении товара, не при показе"""
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.media_root.name, 'products/main'))
+        with open(os.path.join(self.media_root.name, 'products/main/tracker.jpg'), 'wb') as f:
+            f.write(b'jpeg')
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root.name)
+        self.settings_override.enable()
+        brand = ProductCategory.objects.create(name='Chevrolet', slug='chevrolet')
+        self.car = Product.objects.create(
+            title='Tracker', slug='tracker', category=brand,
+            main_image='products/main/tracker.jpg', card_image='products/main/missing.jpg',
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.media_root.cleanup()
+        cache.clear()
+
+    def test_index_and_missing_files(self):
+        index = MediaIndex.get_index()
+        entry = index[self.car.main_image.url]
+        self.assertEqual((entry['size'], entry['path']),
+                         (4, os.path.join(self.media_root.name, 'products/main/tracker.jpg')))
+        self.assertIsNone(index[self.car.card_image.url]['path'])
+        self.assertEqual(MediaIndex.missing_names(), ['products/main/missing.jpg'])
+
+        # Повторное чтение — из кеша, без запросов
+        with self.assertNumQueries(0):
+            MediaIndex.get_index()
+
+    def test_product_save_updates_index(self):
+        MediaIndex.get_index()
+        self.car.card_image = 'products/main/tracker.jpg'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.car.save()
+
+        self.assertEqual(MediaIndex.missing_names(), [])
+        self.assertIsNotNone(MediaIndex.get_index()[self.car.card_image.url]['path'])
+
+    def test_path_outside_media_root(self):
+        self.assertIsNone(MediaIndex.resolve('../../etc/passwd')['path'])
+
+    def test_concurrent_updates_not_lost(self):
+        """Два сохранения товаров одновременно (разные процессы) — в индексе оба"""
+        other = Product.objects.create(
+            title='Cobalt', slug='cobalt', category=self.car.category, main_image='products/main/cobalt.jpg',
+        )
+        MediaIndex.get_index()
+        self.car.card_image = 'products/main/tracker-card.jpg'
+        other.card_image = 'products/main/cobalt-card.jpg'
+        # Как после save(): update_product вызывается из on_commit
+        Product.objects.filter(pk=self.car.pk).update(card_image=self.car.card_image.name)
+        Product.objects.filter(pk=other.pk).update(card_image=other.card_image.name)
+
+        resolve = MediaIndex.resolve
+
+        def slow_resolve(name):
+            time.sleep(0.05)  # между чтением и записью индекса
+            return resolve(name)
+
+        with patch.object(MediaIndex, 'resolve', side_effect=slow_resolve):
+            threads = [threading.Thread(target=MediaIndex.update_product, args=(p,)) for p in (self.car, other)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        index = MediaIndex.get_index()
+        self.assertIn(self.car.card_image.url, index)
+        self.assertIn(other.card_image.url, index)
+
+    def test_lock_busy_drops_index(self):
+        """Блокировка занята — индекс сразу сбрасывается и пересобирается, а не затирается"""
+        MediaIndex.get_index()
+        cache.set(MediaIndex.LOCK_KEY, 'other-process', 30)
+        started = time.monotonic()
+        MediaIndex.update_product(self.car)
+        self.assertLess(time.monotonic() - started, 0.05)  # без ожидания в on_commit запроса
+        self.assertIsNone(cache.get(MediaIndex.CACHE_KEY))
+
+        cache.delete(MediaIndex.LOCK_KEY)
+        self.assertIn(self.car.main_image.url, MediaIndex.get_index())
+
+
+class TestDriveRequestLimitTest(TestCase):
+    """Заявка на тест-драйв из бота: дневной лимит по номеру, уведомление отдельно"""
+
+    def _create(self, **kwargs):
+        data = {'name': 'Ali', 'phone': '+998901234567', 'preferred_date': date.today(),
+                'preferred_time': '10:00', 'agree_terms': True}
+        return BotService.create_test_drive_request(data, **kwargs)
+
+    @patch('main.services.telegram.TelegramNotificationSender.send_test_drive_notification')
+    def test_daily_limit_by_range(self, send_notification):
+        yesterday = self._create(notify=False)[0]
+        TestDriveRequest.objects.filter(pk=yesterday.pk).update(created_at=timezone.now() - timedelta(days=1))
+
+        self.assertIsNone(self._create(notify=False)[1])
+        self.assertIsNone(self._create(notify=False)[1])
+        self.assertEqual(self._create(notify=False), (None, 'daily_limit'))
+        send_notification.assert_not_called()
+
+    @patch('main.services.telegram.TelegramNotificationSender.send_test_drive_notification')
+    def test_notify_sends_notification(self, send_notification):
+        test_drive, error = self._create()
+        send_notification.assert_called_once_with(test_drive)
+        self.assertIn('Ali', BotService.test_drive_notification_text(test_drive))
@@ -0,0 +1,74 @@
+import asyncio
+import sys
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+BOT_DIR = str(Path(settings.BASE_DIR) / 'Autoliga_Botfile')
+if BOT_DIR not in sys.path:
+    sys.path.insert(0, BOT_DIR)
+
+from utils.catalog import CatalogSnapshot  # noqa: E402
+
+
+def _catalog(products, dealers=(('Toshkent', 1),)):
+    return {
+        'brands': [], 'cars': {}, 'car_details': {}, 'dealers': [],
+        'td_data': {
+            'dealers': [{'name': name, 'id': pk} for name, pk in dealers],
+            'products': [{'title': title, 'id': pk} for title, pk in products],
+            'time_slots': ['10:00', '11:00'],
+        },
+    }
+
+
+class CatalogSnapshotTestDriveTest(SimpleTestCase):
+    """Test-drayv: klaviatura va tanlov tekshiruvi bitta snapshot dan"""
+
+    def setUp(self):
+        self.catalogs = {lang: _catalog([('Tiggo 7', 7), ('Tiggo 8', 8)]) for lang in ('uz', 'ru', 'en')}
+        for target, kwargs in (
+            ('utils.catalog._build', {'side_effect': lambda languages: {l: self.catalogs[l] for l in languages}}),
+            ('utils.catalog.BotService.cache_generation', {'return_value': 1}),
+            ('utils.catalog.MediaIndex.get_index', {'return_value': {}}),
+        ):
+            patcher = mock.patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _keyboard(self, catalog):
+        # bot.get_td_products_keyboard bilan bir xil: derived() orqali
+        return catalog.derived('uz', ('td_products_kb',), lambda c: [p['title'] for p in c['td_data']['products']])
+
+    def test_choice_follows_refresh(self):
+        """Katalog suhbat o'rtasida yangilansa, yangi klaviaturadagi tugma qabul qilinadi"""
+        catalog = CatalogSnapshot()
+
+        async def scenario():
+            await catalog.refresh()
+            before = await self._keyboard(catalog), await catalog.test_drive_choice('uz', 'products', 'Tiggo 8')
+
+            self.catalogs['uz'] = _catalog([('Tiggo 7 Pro', 7), ('Arrizo 8', 9)])
+            await catalog.refresh()
+            keyboard = await self._keyboard(catalog)
+            return before, keyboard, [await catalog.test_drive_choice('uz', 'products', t) for t in keyboard], \
+                await catalog.test_drive_choice('uz', 'products', 'Tiggo 8')
+
+        before, keyboard, ids, removed = asyncio.run(scenario())
+        self.assertEqual(before, (['Tiggo 7', 'Tiggo 8'], 8))
+        self.assertEqual(keyboard, ['Tiggo 7 Pro', 'Arrizo 8'])
+        self.assertEqual(ids, [7, 9])
+        self.assertIsNone(removed)
+
+    def test_dealer_choice(self):
+        catalog = CatalogSnapshot()
+
+        async def scenario():
+            return (
+                await catalog.test_drive_choice('ru', 'dealers', 'Toshkent'),
+                await catalog.test_drive_choice('ru', 'dealers', 'Tiggo 7'),
+            )
+
+        self.assertEqual(asyncio.run(scenario()), (1, None))
@@ -0,0 +1,200 @@
+import asyncio
+import sys
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from main.models import BotFSMState
+
+BOT_DIR = str(Path(settings.BASE_DIR) / 'Autoliga_Botfile')
+if BOT_DIR not in sys.path:
+    sys.path.insert(0, BOT_DIR)
+
+from aiogram import Bot, F  # noqa: E402
+from aiogram.fsm.context import FSMContext  # noqa: E402
+from aiogram.fsm.storage.base import StorageKey  # noqa: E402
+from aiogram.types import Update  # noqa: E402
+from utils.fsm_storage import DjangoFSMStorage  # noqa: E402
+from utils.scheduler import ChatScheduler, OrderedDispatcher  # noqa: E402
+
+
+def _key(chat_id):
+    return StorageKey(bot_id=1, chat_id=chat_id, user_id=chat_id)
+
+
+class DjangoFSMStorageTest(TransactionTestCase):
+    """FSM storage: DB — asosiy manba, xotira — LRU va kechiktirilgan yozish"""
+
+    def _storage(self, **kwargs):
+        # Fon flush tsikli testga aralashmasin — flush qo'lda chaqiriladi
+        return DjangoFSMStorage(flush_interval=3600, **kwargs)
+
+    def _run(self, storage, coro):
+        async def main():
+            try:
+                return await coro
+            finally:
+                if storage._flush_task:
+                    storage._flush_task.cancel()
+                    storage._flush_task = None
+        return asyncio.run(main())
+
+    def test_load_from_db(self):
+        storage = self._storage()
+        key = storage.key_builder.build(_key(1))
+        BotFSMState.objects.create(key=key, state='TestDrive:phone', data={'car_id': 7})
+
+        async def scenario():
+            return await storage.get_state(_key(1)), await storage.get_data(_key(1)), await storage.get_state(_key(2))
+
+        self.assertEqual(self._run(storage, scenario()), ('TestDrive:phone', {'car_id': 7}, None))
+
+    def test_write_behind_flush(self):
+        """O'zgarishlar flush gacha faqat xotirada; flush — bitta upsert, bo'sh holat — o'chirish"""
+        storage = self._storage()
+
+        async def scenario():
+            await storage.set_state(_key(1), 'TestDrive:name')
+            await storage.set_data(_key(1), {'name': 'Ali'})
+            before = await asyncio.to_thread(BotFSMState.objects.count)
+            await storage.flush()
+            row = await asyncio.to_thread(BotFSMState.objects.values_list('state', 'data').get)
+
+            await storage.set_state(_key(1), None)
+            await storage.set_data(_key(1), {})
+            await storage.flush()
+            after = await asyncio.to_thread(BotFSMState.objects.count)
+            return before, row, after
+
+        self.assertEqual(self._run(storage, scenario()), (0, ('TestDrive:name', {'name': 'Ali'}), 0))
+
+    def test_reload_after_other_process_write(self):
+        """Boshqa jarayon (worker) yozgan holat xotiradagi eskirgan nusxadan ustun"""
+        worker_a, worker_b = self._storage(), self._storage()
+
+        async def scenario():
+            await worker_a.set_state(_key(1), 'TestDrive:name')
+            await worker_a.flush()
+            self.assertEqual(await worker_a.get_state(_key(1)), 'TestDrive:name')
+
+            await worker_b.set_state(_key(1), 'TestDrive:phone')
+            await worker_b.set_data(_key(1), {'name': 'Ali'})
+            await worker_b.flush()
+
+            return await worker_a.get_state(_key(1)), await worker_a.get_data(_key(1))
+
+        self.assertEqual(self._run(worker_a, scenario()), ('TestDrive:phone', {'name': 'Ali'}))
+        self._run(worker_b, worker_b.close())
+
+    def test_version_checked_once_per_update(self):
+        """Update ichida DB versiyasi bir marta so'raladi; keyingi update boshqa jarayon yozganini ko'radi"""
+        worker_a, worker_b = self._storage(), self._storage()
+        fetch_version = DjangoFSMStorage._fetch_version
+
+        async def scenario():
+            await worker_a.set_state(_key(1), 'TestDrive:name')
+            await worker_a.flush()
+            with worker_a.update_scope():
+                first = [await worker_a.get_state(_key(1)), await worker_a.get_data(_key(1)),
+                         await worker_a.get_state(_key(1))]
+                checks = version.call_count
+
+            await worker_b.set_state(_key(1), 'TestDrive:phone')
+            await worker_b.flush()
+            with worker_a.update_scope():
+                return first, checks, await worker_a.get_state(_key(1))
+
+        with mock.patch.object(DjangoFSMStorage, '_fetch_version', side_effect=fetch_version) as version:
+            first, checks, second = self._run(worker_a, scenario())
+        self.assertEqual((first, checks, second), (['TestDrive:name', {}, 'TestDrive:name'], 1, 'TestDrive:phone'))
+        self._run(worker_b, worker_b.close())
+
+    def test_dispatcher_opens_update_scope(self):
+        """FSMContextMiddleware va handler o'qishlari — bitta update, bitta versiya tekshiruvi"""
+        storage = self._storage()
+        dp = OrderedDispatcher(storage=storage, scheduler=ChatScheduler())
+        bot = Bot(token='123:abc')
+        seen = []
+
+        @dp.message(F.text)
+        async def handler(message, state: FSMContext):
+            seen.append((await state.get_state(), await state.get_data()))
+
+        update = Update.model_validate({
+            'update_id': 1,
+            'message': {
+                'message_id': 1, 'date': 1700000000, 'text': 'Ali',
+                'chat': {'id': 1, 'type': 'private'}, 'from': {'id': 1, 'is_bot': False, 'first_name': 'Ali'},
+            },
+        })
+        key = StorageKey(bot_id=bot.id, chat_id=1, user_id=1)
+
+        async def scenario():
+            await storage.set_state(key, 'TestDrive:name')
+            await storage.flush()
+            await dp.feed_update(bot, update)
+
+        with mock.patch.object(DjangoFSMStorage, '_fetch_version', side_effect=DjangoFSMStorage._fetch_version) as version:
+            self._run(storage, scenario())
+        self.assertEqual(seen, [('TestDrive:name', {})])
+        self.assertEqual(version.call_count, 1)
+
+    def test_unflushed_change_kept(self):
+        """Yozilmagan (dirty) o'zgarish DB dagi eski qator bilan almashtirilmaydi"""
+        storage = self._storage()
+        BotFSMState.objects.create(key=storage.key_builder.build(_key(1)), state='old')
+
+        async def scenario():
+            await storage.set_state(_key(1), 'new')
+            return await storage.get_state(_key(1))
+
+        self.assertEqual(self._run(storage, scenario()), 'new')
+
+    def test_ttl(self):
+        """ttl dan eski holat tashlab ketilgan hisoblanadi; purge uni DB dan o'chiradi"""
+        storage = self._storage(ttl=60)
+        BotFSMState.objects.create(
+            key=storage.key_builder.build(_key(1)), state='TestDrive:phone',
+            updated_at=timezone.now() - timedelta(seconds=120),
+        )
+
+        async def scenario():
+            state = await storage.get_state(_key(1))
+            await storage.flush()  # purge (PURGE_INTERVAL o'tgan — birinchi marta)
+            return state
+
+        self.assertIsNone(self._run(storage, scenario()))
+        self.assertFalse(BotFSMState.objects.exists())
+
+    def test_cached_entry_expires(self):
+        storage = self._storage(ttl=60)
+
+        async def scenario():
+            await storage.set_state(_key(1), 'TestDrive:phone')
+            await storage.flush()
+            storage._entries[storage.key_builder.build(_key(1))][2] -= 120
+            return await storage.get_state(_key(1))
+
+        self.assertIsNone(self._run(storage, scenario()))
+
+    def test_lru_eviction(self):
+        """max_entries dan oshsa eng eski yozilgan suhbat chiqariladi, dirty lar qoladi"""
+        storage = self._storage(max_entries=2)
+
+        async def scenario():
+            await storage.set_state(_key(1), 'a')  # dirty — chiqarilmaydi
+            await storage.get_state(_key(2))
+            await storage.get_state(_key(3))
+            keys_dirty = list(storage._entries)
+            await storage.flush()
+            await storage.get_state(_key(4))
+            return keys_dirty, list(storage._entries)
+
+        build = DjangoFSMStorage().key_builder.build
+        keys_dirty, keys_after = self._run(storage, scenario())
+        self.assertEqual(keys_dirty, [build(_key(1)), build(_key(3))])
+        self.assertEqual(keys_after, [build(_key(3)), build(_key(4))])
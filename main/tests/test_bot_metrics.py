@@ -0,0 +1,92 @@
+import asyncio
+import sys
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from main.services.bot_service import BotService
+
+BOT_DIR = str(Path(settings.BASE_DIR) / 'Autoliga_Botfile')
+if BOT_DIR not in sys.path:
+    sys.path.insert(0, BOT_DIR)
+
+from utils.metrics import BotMetrics  # noqa: E402
+
+
+def _worker(pid, totals, workers=4):
+    metrics = BotMetrics()
+    for total_ms in totals:
+        metrics._record({'handler': 'start', 'state': '-', 'db_ms': 0.0, 'api_ms': 0.0,
+                         'total_ms': total_ms, 'failed': False})
+    metrics.queue_stats = lambda: {'pending': 1, 'max_pending': 100, 'chats': 1, 'busy_workers': 1,
+                                   'workers': workers, 'max_chat_depth': pid % 10}
+    with mock.patch('utils.metrics.os.getpid', return_value=pid):
+        asyncio.run(metrics.publish())
+    return metrics
+
+
+class BotMetricsPublishTest(TestCase):
+    """Har bot jarayoni o'z kaliti bilan yozadi, admin hammasini birlashtiradi"""
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_snapshots_merged(self):
+        _worker(101, [10.0, 30.0])
+        _worker(102, [50.0])
+
+        stats = BotService.get_metrics()
+        self.assertEqual(stats['pids'], [101, 102])
+        self.assertEqual(stats['updates']['count'], 3)
+        self.assertEqual(stats['updates']['avg_ms'], 30.0)
+        self.assertEqual(stats['updates']['max_ms'], 50.0)
+        self.assertEqual((stats['updates']['p50_ms'], stats['updates']['p95_ms']), (30.0, 50.0))
+        self.assertNotIn('recent', stats['updates'])
+        self.assertEqual(stats['handlers']['start']['count'], 3)
+        self.assertEqual((stats['queue']['workers'], stats['queue']['max_chat_depth']), (8, 2))
+        self.assertEqual([(s['pid'], s['total_ms']) for s in stats['slowest']], [(102, 50.0), (101, 30.0), (101, 10.0)])
+
+    def test_percentiles_from_all_samples(self):
+        """p95 — barcha jarayonlar o'lchovlaridan, jarayon p95 larining o'rtachasi emas"""
+        _worker(101, [10.0] * 19)
+        _worker(102, [1000.0])
+
+        stats = BotService.get_metrics()
+        self.assertEqual(stats['updates']['p95_ms'], 1000.0)
+        self.assertEqual(stats['handlers']['start']['p50_ms'], 10.0)
+
+    def test_republish_replaces_own_snapshot(self):
+        _worker(101, [10.0])
+        _worker(101, [10.0, 20.0])
+        stats = BotService.get_metrics()
+        self.assertEqual((stats['pids'], stats['updates']['count']), ([101], 2))
+
+    def test_expired_pid_dropped(self):
+        _worker(101, [10.0])
+        _worker(102, [20.0])
+        cache.delete(BotService.metrics_cache_key(101))  # jarayon to'xtagan, snapshot muddati o'tgan
+
+        self.assertEqual(BotService.get_metrics()['pids'], [102])
+        _worker(102, [20.0])
+        self.assertEqual(cache.get(BotService.METRICS_PIDS_KEY), [102])
+
+    def test_nothing_published(self):
+        self.assertIsNone(BotService.get_metrics())
+
+    def test_admin_view(self):
+        _worker(101, [10.0])
+        _worker(102, [20.0])
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+
+        url = reverse('admin:telegramuser_bot_stats')
+        self.assertEqual(self.client.get(url, {'format': 'json'}, secure=True).json()['updates']['count'], 2)
+        self.assertContains(self.client.get(url, secure=True), '2 ta jarayon')
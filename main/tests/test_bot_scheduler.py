@@ -0,0 +1,142 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+BOT_DIR = str(Path(settings.BASE_DIR) / 'Autoliga_Botfile')
+if BOT_DIR not in sys.path:
+    sys.path.insert(0, BOT_DIR)
+
+from aiogram import Bot, Dispatcher, F  # noqa: E402
+from aiogram.types import Update  # noqa: E402
+from utils.scheduler import ChatScheduler, OrderedDispatcher  # noqa: E402
+
+
+def _update(update_id, chat_id, text):
+    return Update.model_validate({
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id, 'date': 1700000000, 'text': text,
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': 'Ali'},
+        },
+    })
+
+
+class ChatSchedulerTest(SimpleTestCase):
+    """Chat ichida ketma-ket, chatlar orasida parallel, navbat chegarasi, to'xtashda tugatish"""
+
+    def test_fifo_per_chat(self):
+        scheduler = ChatScheduler(workers=4)
+        done = []
+
+        def job(name, delay):
+            async def run():
+                await asyncio.sleep(delay)
+                done.append(name)
+            return run
+
+        async def scenario():
+            # Birinchisi eng sekin — parallel ishlansa tartib buzilardi
+            for name, delay in (('a1', 0.05), ('a2', 0.01), ('a3', 0)):
+                await scheduler.submit(1, job(name, delay))
+            await scheduler.stop()
+
+        asyncio.run(scenario())
+        self.assertEqual(done, ['a1', 'a2', 'a3'])
+
+    def test_chats_run_concurrently(self):
+        scheduler = ChatScheduler(workers=4)
+        running, peak = 0, 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.1)
+            running -= 1
+
+        async def scenario():
+            started = time.monotonic()
+            for chat_id in range(6):
+                await scheduler.submit(chat_id, job)
+            await scheduler.stop()
+            return time.monotonic() - started
+
+        elapsed = asyncio.run(scenario())
+        self.assertEqual(peak, 4)  # workers dan oshmaydi
+        self.assertLess(elapsed, 0.35)
+
+    def test_backpressure(self):
+        """max_pending ta update navbatda bo'lsa submit joy bo'shashini kutadi"""
+        scheduler = ChatScheduler(workers=1, max_pending=2)
+
+        async def scenario():
+            release = asyncio.Event()
+
+            async def job():
+                await release.wait()
+
+            await scheduler.submit(1, job)
+            await scheduler.submit(2, job)
+            third = asyncio.create_task(scheduler.submit(3, job))
+            await asyncio.sleep(0.05)
+            blocked = not third.done()
+            pending = scheduler.stats()['pending']
+
+            release.set()
+            await asyncio.wait_for(third, 1)
+            await scheduler.stop()
+            return blocked, pending
+
+        self.assertEqual(asyncio.run(scenario()), (True, 2))
+
+    def test_stop_drains_queue(self):
+        scheduler = ChatScheduler(workers=2)
+        done = []
+
+        async def scenario():
+            for i in range(5):
+                async def job(i=i):
+                    await asyncio.sleep(0.01)
+                    done.append(i)
+                await scheduler.submit(i % 2, job)
+            await scheduler.stop(timeout=5)
+            return scheduler._tasks
+
+        self.assertEqual(asyncio.run(scenario()), [])
+        self.assertEqual(sorted(done), [0, 1, 2, 3, 4])
+
+
+class OrderedDispatcherTest(SimpleTestCase):
+    """Polling yo'li (aiogram _process_update) ham chat navbati orqali ishlaydi"""
+
+    def test_polling_updates_ordered_per_chat(self):
+        dp = OrderedDispatcher(scheduler=ChatScheduler(workers=4))
+        bot = Bot(token='123:abc')
+        handled = []
+
+        @dp.message(F.text)
+        async def handler(message):
+            # Birinchi xabar eng sekin
+            await asyncio.sleep(0.05 if message.text == '1' else 0)
+            handled.append((message.chat.id, message.text))
+
+        async def scenario():
+            for update_id, (chat_id, text) in enumerate([(1, '1'), (1, '2'), (2, 'x'), (1, '3')]):
+                self.assertTrue(await dp._process_update(bot, _update(update_id, chat_id, text)))
+            await dp.emit_shutdown(bot=bot)
+
+        asyncio.run(scenario())
+        self.assertEqual([text for chat_id, text in handled if chat_id == 1], ['1', '2', '3'])
+        self.assertEqual(handled[0], (2, 'x'))  # boshqa chat sekin xabarni kutmaydi
+
+    def test_start_polling_without_tasks(self):
+        dp = OrderedDispatcher(scheduler=ChatScheduler())
+        with mock.patch.object(Dispatcher, 'start_polling', new_callable=mock.AsyncMock) as start_polling:
+            asyncio.run(dp.start_polling(Bot(token='123:abc'), handle_as_tasks=True))
+        self.assertIs(start_polling.await_args.kwargs['handle_as_tasks'], False)
@@ -0,0 +1,53 @@
+import asyncio
+import sys
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.test import TransactionTestCase
+
+from main.services.bot_service import BotService
+
+BOT_DIR = str(Path(settings.BASE_DIR) / 'Autoliga_Botfile')
+if BOT_DIR not in sys.path:
+    sys.path.insert(0, BOT_DIR)
+
+from utils.user_lang import UserLanguageCache  # noqa: E402
+
+
+class UserLanguageCacheTest(TransactionTestCase):
+    """Til: LRU (TTL bilan) -> TelegramUser.language"""
+
+    def _expire(self, cache, telegram_id):
+        lang, _ = cache._langs[telegram_id]
+        cache._langs[telegram_id] = (lang, 0)
+
+    def test_lazy_load_and_hit(self):
+        BotService.create_or_update_telegram_user(1001, language='ru')
+        cache = UserLanguageCache()
+
+        with mock.patch('utils.user_lang.BotService.get_user_language',
+                        wraps=BotService.get_user_language) as get_language:
+            self.assertEqual(asyncio.run(cache.get(1001)), 'ru')
+            self.assertEqual(asyncio.run(cache.get(1001)), 'ru')
+            self.assertEqual(asyncio.run(cache.get(2002)), 'uz')  # ro'yxatdan o'tmagan
+        self.assertEqual(get_language.call_count, 2)
+
+    def test_change_in_other_worker_seen_after_ttl(self):
+        """Boshqa worker o'zgartirgan til TTL tugagach DB dan o'qiladi"""
+        BotService.create_or_update_telegram_user(1001, language='uz')
+        worker_a, worker_b = UserLanguageCache(ttl=60), UserLanguageCache(ttl=60)
+
+        self.assertEqual(asyncio.run(worker_a.get(1001)), 'uz')
+        asyncio.run(worker_b.set(1001, 'en'))
+        self.assertEqual(asyncio.run(worker_b.get(1001)), 'en')
+        self.assertEqual(asyncio.run(worker_a.get(1001)), 'uz')
+
+        self._expire(worker_a, 1001)
+        self.assertEqual(asyncio.run(worker_a.get(1001)), 'en')
+
+    def test_maxsize(self):
+        cache = UserLanguageCache(maxsize=2)
+        for telegram_id in (1, 2, 3):
+            cache.remember(telegram_id, 'ru')
+        self.assertEqual(list(cache._langs), [2, 3])
@@ -0,0 +1,366 @@
+import asyncio
+import json
+import sys
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from main.models import BotLease, BotUpdate
+
+BOT_DIR = str(Path(settings.BASE_DIR) / 'Autoliga_Botfile')
+if BOT_DIR not in sys.path:
+    sys.path.insert(0, BOT_DIR)
+
+from aiogram import Bot  # noqa: E402
+from utils.inbox import WebhookInbox  # noqa: E402
+from webhook import MAX_BODY_SIZE, TelegramWebhookRouter  # noqa: E402
+
+SECRET = 'webhook-secret'
+
+
+class FakeDispatcher:
+    def __init__(self, fail=False):
+        self.fail = fail
+        # Berilsa enqueue_update shu event gacha kutadi (ChatScheduler backpressure)
+        self.gate = None
+        self.updates = []
+        self.events = []
+
+    async def enqueue_update(self, bot, update, **kwargs):
+        if self.fail and update.update_id in self.fail:
+            raise RuntimeError('queue closed')
+        if self.gate is not None:
+            await self.gate.wait()
+        self.updates.append(update.update_id)
+
+    def resolve_used_update_types(self):
+        return ['message']
+
+    async def emit_startup(self, **kwargs):
+        self.events.append('startup')
+
+    async def emit_shutdown(self, **kwargs):
+        self.events.append('shutdown')
+
+
+def _data(update_id):
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': 1, 'date': 1700000000, 'text': '/start',
+            'chat': {'id': 42, 'type': 'private'},
+        },
+    }
+
+
+def _update(update_id):
+    return json.dumps(_data(update_id)).encode()
+
+
+async def _consume(inbox):
+    # _run aylanishi kabi: avval lease, keyin navbatdan olish
+    await inbox._renew()
+    return await inbox.consume()
+
+
+@override_settings(
+    BOT_WEBHOOK_PATH='/telegram/webhook/', BOT_WEBHOOK_SECRET=SECRET,
+    BOT_WEBHOOK_BASE_URL='https://autoliga.uz', BOT_WEBHOOK_DEDUP_WINDOW=600,
+)
+class TelegramWebhookRouterTest(TransactionTestCase):
+    """ASGI router: secret, hajm chegarasi, update_id dedup, lifespan"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.django_app = mock.AsyncMock()
+        self.router = TelegramWebhookRouter(self.django_app)
+        self.dp = FakeDispatcher()
+        self.bot = Bot(token='123:abc')
+        self.router._bot, self.router._dp = self.bot, self.dp
+
+    def _consume(self):
+        # Navbat egasi (lease) nima qilsa — DB dagi update larni dp ga berish
+        return asyncio.run(_consume(self.router._inbox))
+
+    def _post(self, chunks, secret=SECRET, path='/telegram/webhook/', method='POST'):
+        if isinstance(chunks, bytes):
+            chunks = [chunks]
+        messages = [
+            {'type': 'http.request', 'body': chunk, 'more_body': i < len(chunks) - 1}
+            for i, chunk in enumerate(chunks)
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        headers = [(b'content-type', b'application/json')]
+        if secret is not None:
+            headers.append((b'x-telegram-bot-api-secret-token', secret.encode()))
+        scope = {'type': 'http', 'path': path, 'method': method, 'headers': headers}
+        asyncio.run(self.router(scope, receive, send))
+        return sent[0]['status'] if sent else None
+
+    def test_secret_header(self):
+        self.assertEqual(self._post(_update(1), secret=None), 403)
+        self.assertEqual(self._post(_update(1), secret='wrong'), 403)
+        self.assertEqual(self._post(_update(1)), 200)
+        self._consume()
+        self.assertEqual(self.dp.updates, [1])
+
+    def test_no_secret_configured_rejects(self):
+        with override_settings(BOT_WEBHOOK_SECRET=''):
+            router = TelegramWebhookRouter(self.django_app)
+        router._bot, router._dp = self.bot, self.dp
+        self.router = router
+        self.assertEqual(self._post(_update(1), secret=''), 403)
+
+    def test_body_size_limit(self):
+        chunk = b' ' * (MAX_BODY_SIZE // 2 + 1)
+        self.assertEqual(self._post([chunk, chunk, _update(1)]), 413)
+        self.assertFalse(BotUpdate.objects.exists())
+
+    def test_bad_request(self):
+        self.assertEqual(self._post(b'{"message": 1}'), 400)
+        self.assertEqual(self._post(b'not json'), 400)
+        self.assertEqual(self._post(_update(1), method='GET'), 405)
+
+    def test_update_dedup(self):
+        """Telegram qayta yuborgan update ikkinchi marta ishlanmaydi"""
+        self.assertEqual(self._post(_update(5)), 200)
+        self.assertEqual(self._post(_update(5)), 200)
+        self.assertEqual(self._post(_update(6)), 200)
+        self._consume()
+        self.assertEqual(self._post(_update(5)), 200)  # olingandan keyin ham
+        self._consume()
+        self.assertEqual(self.dp.updates, [5, 6])
+
+    def test_store_failure_allows_retry(self):
+        """Navbatga yozilmagan update uchun 500 — Telegram retry si qabul qilinadi"""
+        with mock.patch.object(WebhookInbox, '_store', side_effect=OperationalError('database is locked')):
+            self.assertEqual(self._post(_update(7)), 500)
+        self.assertEqual(self._post(_update(7)), 200)
+        self._consume()
+        self.assertEqual(self.dp.updates, [7])
+
+    def _become_owner(self):
+        self.router._load_bot()
+        asyncio.run(self.router._inbox._renew())
+
+    def test_owner_dispatches_directly(self):
+        """Lease egasiga kelgan update darhol dp ga — DB ga yozilmaydi, poll kutilmaydi"""
+        self._become_owner()
+        self.assertEqual(self._post(_update(5)), 200)
+        self.assertEqual(self._post(_update(5)), 200)  # Telegram qayta yubordi
+        self.assertEqual(self.dp.updates, [5])
+        self.assertFalse(BotUpdate.objects.exists())
+
+    def test_owner_takes_handover_first(self):
+        """Boshqa workerlar yozgan, hali olinmagan update lar egasiga kelgandan oldin ishlanadi"""
+        self._become_owner()
+        BotUpdate.objects.create(update_id=3, data=_data(3))
+        self.assertEqual(self._post(_update(4)), 200)
+        self.assertEqual(self.dp.updates, [3, 4])
+
+    def test_retry_through_other_worker_skipped(self):
+        """Egasi ishlagan update ning qayta yuborilgani boshqa workerga tushsa ham ikkinchi marta ishlanmaydi"""
+        self._become_owner()
+        self.assertEqual(self._post(_update(7)), 200)
+        other = WebhookInbox(self.bot, self.dp)
+        asyncio.run(other.put(7, _data(7)))
+        self._consume()
+        self.assertEqual(self.dp.updates, [7])
+        self.assertFalse(BotUpdate.objects.filter(taken_at__isnull=True).exists())
+
+    def test_owner_enqueue_failure_allows_retry(self):
+        self._become_owner()
+        self.dp.fail = {8}
+        self.assertEqual(self._post(_update(8)), 500)
+        self.dp.fail = None
+        self.assertEqual(self._post(_update(8)), 200)
+        self.assertEqual(self.dp.updates, [8])
+
+    def test_other_paths_go_to_django(self):
+        self._post(b'', path='/api/uz/products/', method='GET')
+        self.django_app.assert_awaited_once()
+
+    def test_lifespan(self):
+        messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        with mock.patch.object(Bot, 'set_webhook', new_callable=mock.AsyncMock) as set_webhook, \
+                mock.patch.object(self.bot.session, 'close', new_callable=mock.AsyncMock) as close:
+            asyncio.run(self.router({'type': 'lifespan'}, receive, send))
+
+        set_webhook.assert_awaited_once_with(
+            url='https://autoliga.uz/telegram/webhook/', secret_token=SECRET, allowed_updates=['message'],
+        )
+        close.assert_awaited_once()
+        self.assertEqual(self.dp.events, ['startup', 'shutdown'])
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+        self.assertIsNone(self.router._inbox._task)  # navbatdan olish to'xtatilgan
+
+    def test_lifespan_startup_error_keeps_site(self):
+        """set_webhook xatosi saytni to'xtatmaydi — startup baribir yakunlanadi"""
+        messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        with mock.patch.object(Bot, 'set_webhook', side_effect=RuntimeError('network')), \
+                mock.patch.object(self.bot.session, 'close', new_callable=mock.AsyncMock):
+            asyncio.run(self.router({'type': 'lifespan'}, receive, send))
+
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+        self.assertNotIn('startup', self.dp.events)
+
+
+class WebhookInboxTest(TransactionTestCase):
+    """DB navbati: istalgan worker yozadi, faqat lease egasi tartib bilan oladi"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.bot = Bot(token='123:abc')
+        self.dp = FakeDispatcher()
+
+    def _inbox(self, owner, **kwargs):
+        inbox = WebhookInbox(self.bot, self.dp, **kwargs)
+        inbox.owner = owner
+        return inbox
+
+    def test_single_owner(self):
+        acquire = WebhookInbox._acquire
+        self.assertTrue(acquire(WebhookInbox.LEASE_NAME, 'worker-a', 15))
+        self.assertFalse(acquire(WebhookInbox.LEASE_NAME, 'worker-b', 15))
+        self.assertTrue(acquire(WebhookInbox.LEASE_NAME, 'worker-a', 15))  # uzaytirish
+
+        WebhookInbox._release(WebhookInbox.LEASE_NAME, 'worker-a')
+        self.assertTrue(acquire(WebhookInbox.LEASE_NAME, 'worker-b', 15))
+
+        # Egasi javob bermay qoldi — muddati o'tgach boshqasi oladi
+        BotLease.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(acquire(WebhookInbox.LEASE_NAME, 'worker-a', 15))
+
+    def test_order_across_workers(self):
+        """Turli workerlarga kelgan update lar bitta joyda update_id tartibida ishlanadi"""
+        worker_a, worker_b = self._inbox('worker-a'), self._inbox('worker-b')
+
+        async def scenario():
+            await worker_a.put(3, _data(3))
+            await worker_b.put(1, _data(1))
+            await worker_a.put(2, _data(2))
+            return await _consume(worker_b), await _consume(worker_b)
+
+        self.assertEqual(asyncio.run(scenario()), (3, 0))
+        self.assertEqual(self.dp.updates, [1, 2, 3])
+
+    def test_enqueue_failure_returns_updates(self):
+        """dp ga yetmagan update lar navbatga qaytadi — keyingi urinishda tartib saqlanadi"""
+        inbox = self._inbox('worker-a')
+        for update_id in (1, 2, 3):
+            asyncio.run(inbox.put(update_id, _data(update_id)))
+
+        self.dp.fail = {2}
+        with self.assertRaises(RuntimeError):
+            asyncio.run(_consume(inbox))
+        self.assertEqual(list(BotUpdate.objects.filter(taken_at__isnull=True).values_list('update_id', flat=True)), [2, 3])
+
+        self.dp.fail = None
+        asyncio.run(_consume(inbox))
+        self.assertEqual(self.dp.updates, [1, 2, 3])
+
+    def test_lease_renewed_while_enqueue_blocked(self):
+        """enqueue_update lease_ttl dan uzoq kutsa ham boshqa worker lease ni ololmaydi"""
+        inbox = self._inbox('worker-a', lease_ttl=0.3)
+
+        async def scenario():
+            self.dp.gate = asyncio.Event()
+            for update_id in (1, 2):
+                await inbox.put(update_id, _data(update_id))
+            consuming = asyncio.create_task(_consume(inbox))
+            await asyncio.sleep(0.5)
+            stolen = await asyncio.to_thread(WebhookInbox._acquire, WebhookInbox.LEASE_NAME, 'worker-b', 0.3)
+            self.dp.gate.set()
+            return stolen, await consuming
+
+        self.assertEqual(asyncio.run(scenario()), (False, 2))
+        self.assertEqual(self.dp.updates, [1, 2])
+
+    def test_lease_lost_stops_consuming(self):
+        """Lease boshqa workerga o'tsa, dp ga berilmagan update lar navbatga qaytadi"""
+        inbox = self._inbox('worker-a', lease_ttl=0.3)
+
+        async def scenario():
+            self.dp.gate = asyncio.Event()
+            for update_id in (1, 2, 3):
+                await inbox.put(update_id, _data(update_id))
+            consuming = asyncio.create_task(_consume(inbox))
+            await asyncio.sleep(0.05)
+            await asyncio.to_thread(
+                BotLease.objects.update, owner='worker-b', expires_at=timezone.now() + timedelta(seconds=60),
+            )
+            await asyncio.sleep(0.2)  # lease_ttl / 3 — uzaytirish urinishi
+            self.dp.gate.set()
+            await consuming
+
+        asyncio.run(scenario())
+        self.assertFalse(inbox.is_owner)
+        self.assertEqual(self.dp.updates, [1])
+        self.assertEqual(
+            list(BotUpdate.objects.filter(taken_at__isnull=True).order_by('update_id').values_list('update_id', flat=True)),
+            [2, 3],
+        )
+
+    def test_purge(self):
+        inbox = self._inbox('worker-a', dedup_window=600)
+        BotUpdate.objects.create(update_id=1, data=_data(1), taken_at=timezone.now() - timedelta(seconds=700))
+        BotUpdate.objects.create(update_id=2, data=_data(2), taken_at=timezone.now())
+        BotUpdate.objects.create(update_id=3, data=_data(3))
+
+        asyncio.run(inbox._purge_taken())
+        self.assertEqual(list(BotUpdate.objects.order_by('update_id').values_list('update_id', flat=True)), [2, 3])
+
+    def test_run_loop(self):
+        """Ikki worker: bittasi egasi bo'ladi, ikkinchisiga kelgan update ham ishlanadi; stop lease ni bo'shatadi"""
+        worker_a = self._inbox('worker-a', poll_interval=0.05, lease_ttl=1)
+        worker_b = self._inbox('worker-b', poll_interval=0.05, lease_ttl=1)
+
+        async def scenario():
+            await worker_a.start()
+            await asyncio.sleep(0.1)
+            await worker_b.start()
+            await worker_b.put(1, _data(1))
+            await worker_a.put(2, _data(2))
+            for _ in range(40):
+                if len(self.dp.updates) == 2:
+                    break
+                await asyncio.sleep(0.05)
+            owners = worker_a.is_owner, worker_b.is_owner
+            await worker_a.stop()
+            await worker_b.stop()
+            return owners
+
+        self.assertEqual(asyncio.run(scenario()), (True, False))
+        self.assertEqual(self.dp.updates, [1, 2])
+        self.assertLessEqual(BotLease.objects.get().expires_at, timezone.now())
@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from main.models import ParameterCategory, Product, ProductCategory, ProductParameter
+
+
+class CatalogApiCacheTest(TestCase):
+    """Кэш API товаров по версии каталога, ETag и 304"""
+
+    def setUp(self):
+        cache.clear()
+        brand = ProductCategory.objects.create(name='Chevrolet', slug='chevrolet')
+        self.car = Product.objects.create(
+            title='Tracker', slug='tracker', category=brand, main_image='products/main/tracker.jpg'
+        )
+        engine = ParameterCategory.objects.create(name='Dvigatel')
+        for order in range(3):
+            ProductParameter.objects.create(product=self.car, category=engine, text=f'Param {order}', order=order)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_detail_cached_with_etag(self):
+        """Повтор — из кэша без запросов; If-None-Match с тем же ETag — 304"""
+        response = self.client.get('/api/uz/products/tracker/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(len(response.json()['spec_groups'][0]['parameters']), 3)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/uz/products/tracker/', secure=True)
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.client.get('/api/uz/products/tracker/', secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_spec_groups_use_prefetch(self):
+        """spec_groups берёт параметры с категориями из prefetch: товар, card_specs, параметры, features, галерея"""
+        with self.assertNumQueries(5):
+            self.client.get('/api/uz/products/tracker/', secure=True)
+
+    def test_parameter_save_changes_etag(self):
+        """Сохранение параметра поднимает версию каталога — новый ответ и новый ETag"""
+        etag = self.client.get('/api/uz/products/tracker/', secure=True)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductParameter.objects.create(product=self.car, text='Yangi parametr', order=9)
+
+        response = self.client.get('/api/uz/products/tracker/', secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Yangi parametr')
+
+    def test_list_cached_per_query(self):
+        """Список кэшируется отдельно для каждого query (фильтр по марке)"""
+        self.assertEqual(self.client.get('/api/uz/products/', secure=True).json()['count'], 1)
+        response = self.client.get('/api/uz/products/?category=unknown', secure=True)
+        self.assertEqual(response.json()['count'], 0)
@@ -0,0 +1,63 @@
+import datetime
+import io
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+
+from main import fast_json
+
+
+class FastJsonTest(SimpleTestCase):
+    """fast_json даёт те же данные, что стандартный JSONRenderer / json.dumps"""
+
+    payload = {
+        'title': 'Тахо',
+        'price': Decimal('12.50'),
+        'label': gettext_lazy('Narx'),
+        'created_at': datetime.datetime(2026, 3, 1, 9, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        'specs': {1: 'Dvigatel'},
+        'note': 'a b',
+    }
+
+    def test_renderer_matches_drf(self):
+        body = fast_json.JSONRenderer().render(self.payload)
+        self.assertEqual(json.loads(body), json.loads(renderers.JSONRenderer().render(self.payload)))
+        self.assertIn(b'"2026-03-01T09:30:15.123456Z"', body)
+        self.assertIn(b'a\\u2028b', body)
+        self.assertEqual(fast_json.JSONRenderer().render(None), b'')
+
+    def test_renderer_indent(self):
+        """indent в Accept — отступы как у стандартного рендерера"""
+        body = fast_json.JSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(body, b'{\n  "a": 1\n}')
+
+    def test_dumps_keeps_cyrillic(self):
+        self.assertEqual(fast_json.dumps([{'name': 'Диллер'}]), '[{"name":"Диллер"}]')
+
+    def test_parser(self):
+        parser = fast_json.JSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"name": "Тахо"}'.encode())), {'name': 'Тахо'})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"name": '))
+
+    def test_non_finite_floats(self):
+        """NaN/Infinity: orjson пишет null, стандартный рендерер (STRICT_JSON) — ValueError"""
+        data = {'price': float('nan'), 'max': float('inf')}
+        if fast_json.orjson is not None:
+            self.assertEqual(json.loads(fast_json.JSONRenderer().render(data)), {'price': None, 'max': None})
+        with mock.patch.object(fast_json, 'orjson', None):
+            with self.assertRaises(ValueError):
+                fast_json.JSONRenderer().render(data)
+
+    def test_stdlib_fallback(self):
+        """Без orjson — тот же результат через стандартный json"""
+        expected = json.loads(fast_json.JSONRenderer().render(self.payload))
+        with mock.patch.object(fast_json, 'orjson', None):
+            self.assertEqual(json.loads(fast_json.JSONRenderer().render(self.payload)), expected)
+            self.assertEqual(fast_json.dumps([{'name': 'Диллер'}]), '[{"name":"Диллер"}]')
+            self.assertEqual(fast_json.JSONParser().parse(io.BytesIO(b'[1]')), [1])
@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from main.models import News
+
+
+class HomePageCacheTest(TestCase):
+    """Кэш контекста главной страницы и его сброс сигналами"""
+
+    def setUp(self):
+        cache.clear()
+        self.news = News.objects.create(
+            title='Yangilik', desc='Qisqacha', created_at=date(2025, 1, 1)
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_second_hit_has_no_queries(self):
+        """Повторный анонимный заход на главную — без запросов к БД"""
+        response = self.client.get('/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Yangilik')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/', secure=True)
+        self.assertContains(response, 'Yangilik')
+
+    def test_news_save_invalidates_cache(self):
+        """Сохранение новости в админке сбрасывает кэш главной"""
+        self.client.get('/', secure=True)
+
+        self.news.title = 'Yangilangan sarlavha'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.news.save()
+
+        response = self.client.get('/', secure=True)
+        self.assertContains(response, 'Yangilangan sarlavha')
@@ -0,0 +1,142 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from main.services.http_client import HttpClient, HostMetrics
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Отвечает статусом из пути (/503 -> 503) и считает запросы по методам"""
+
+    calls = []
+
+    def _reply(self):
+        self.calls.append((self.command, self.path))
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        status = int(self.path.strip('/') or 200)
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_GET = do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(HTTP_CLIENT_RETRIES=2, HTTP_CLIENT_CONNECT_TIMEOUT=2, HTTP_CLIENT_READ_TIMEOUT=5)
+class HttpClientTest(SimpleTestCase):
+    """Пул по хостам, повторы только для идемпотентных методов, метрики задержек"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        cls.url = f'http://127.0.0.1:{cls.server.server_port}'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        _Handler.calls = []
+        HttpClient.close()
+        HttpClient._metrics.clear()
+
+    def tearDown(self):
+        HttpClient.close()
+        HttpClient._metrics.clear()
+
+    def test_get_retried_on_5xx(self):
+        response = HttpClient.get(f'{self.url}/503')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(_Handler.calls, [('GET', '/503')] * 3)
+
+    def test_post_not_retried_on_5xx(self):
+        """POST мог дойти до сервера — повтор создал бы дубль (лид, сообщение)"""
+        response = HttpClient.post(f'{self.url}/503', json={'name': 'lead'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(_Handler.calls, [('POST', '/503')])
+
+    def test_no_retry_on_4xx(self):
+        self.assertEqual(HttpClient.get(f'{self.url}/404').status_code, 404)
+        self.assertEqual(len(_Handler.calls), 1)
+
+    def test_session_per_host(self):
+        self.assertIs(HttpClient.session_for(f'{self.url}/a'), HttpClient.session_for(f'{self.url}/b'))
+        self.assertIsNot(HttpClient.session_for(f'{self.url}/a'), HttpClient.session_for('http://localhost:1/'))
+
+    def test_metrics_recorded(self):
+        HttpClient.get(f'{self.url}/200')
+        HttpClient.post(f'{self.url}/500')
+        HttpClient.get(f'{self.url}/404')
+
+        metrics = HttpClient.get_metrics()[self.url]
+        self.assertEqual(metrics['count'], 3)
+        self.assertEqual(metrics['errors'], 1)  # только 5xx; 4xx — ответ сервера, не сбой
+        self.assertGreater(metrics['max_ms'], 0)
+
+    def test_connection_error_recorded(self):
+        """Обрыв соединения (после повторов) — исключение и ошибка в метриках"""
+        url = 'http://127.0.0.1:1'
+        with override_settings(HTTP_CLIENT_RETRIES=0):
+            with self.assertRaises(requests.ConnectionError):
+                HttpClient.post(f'{url}/lead')
+        self.assertEqual(HttpClient.get_metrics()[url]['errors'], 1)
+
+    def test_retries_recorded(self):
+        HttpClient.get(f'{self.url}/503')
+        HttpClient.post(f'{self.url}/503')
+        metrics = HttpClient.get_metrics()[self.url]
+        self.assertEqual((metrics['count'], metrics['retries']), (2, 2))  # повторы только у GET
+
+    def test_close_clears_metrics(self):
+        HttpClient.get(f'{self.url}/200')
+        HttpClient.close()
+        self.assertEqual(HttpClient.get_metrics(), {})
+
+
+class HttpMetricsAdminTest(TestCase):
+    """Метрики HttpClient видны на странице логов amoCRM"""
+
+    def tearDown(self):
+        HttpClient._metrics.clear()
+
+    def test_logs_page_shows_hosts(self):
+        HttpClient._metrics['https://example.amocrm.ru'] = HostMetrics()
+        HttpClient._metrics['https://example.amocrm.ru'].record(120.0, failed=False, retries=1)
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+
+        response = self.client.get(reverse('admin:amocrm_logs'), secure=True)
+        self.assertContains(response, 'https://example.amocrm.ru')
+        self.assertContains(response, '<td>120,0</td>', count=4)  # avg, p50, p95, max (ru-локаль)
+
+
+class HostMetricsTest(SimpleTestCase):
+
+    def test_snapshot(self):
+        metrics = HostMetrics(window=10)
+        for ms in range(1, 21):
+            metrics.record(float(ms), failed=ms == 20)
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['count'], 20)
+        self.assertEqual(snapshot['errors'], 1)
+        self.assertEqual(snapshot['retries'], 0)
+        self.assertEqual(snapshot['avg_ms'], 10.5)
+        self.assertEqual(snapshot['max_ms'], 20.0)
+        # Перцентили — по последним window замерам (11..20)
+        self.assertEqual(snapshot['p50_ms'], 16.0)
+        self.assertEqual(snapshot['p95_ms'], 20.0)
+
+    def test_empty(self):
+        self.assertEqual(HostMetrics().snapshot()['p95_ms'], 0.0)
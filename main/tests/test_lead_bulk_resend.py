@@ -0,0 +1,130 @@
+from datetime import timedelta
+from unittest.mock import patch, MagicMock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from main.models import ContactForm, AmoCRMToken, LeadOutbox, LeadResendJob
+from main.services.amocrm import LeadResendJobRunner
+from main.services.lead_outbox import LeadOutboxProcessor
+
+
+AMOCRM_TEST_SETTINGS = dict(
+    AMOCRM_SUBDOMAIN='test',
+    AMOCRM_PIPELINE_ID=1,
+    AMOCRM_STATUS_ID=2,
+    AMOCRM_BULK_CHUNK_SIZE=2,
+    AMOCRM_FIELD_REGION=10,
+    AMOCRM_FIELD_MESSAGE=11,
+    AMOCRM_FIELD_PRODUCT=12,
+    AMOCRM_FIELD_REFERER=13,
+    AMOCRM_FIELD_UTM=14,
+    AMOCRM_FIELD_FORMID=15,
+)
+
+
+def _complex_response(url, json, **kwargs):
+    """Ответ /leads/complex: id лида на каждый request_id (в обратном порядке)"""
+    response = MagicMock(status_code=200)
+    response.json.return_value = [
+        {'id': 1000 + int(lead['request_id']), 'request_id': [lead['request_id']]}
+        for lead in reversed(json)
+    ]
+    return response
+
+
+@override_settings(**AMOCRM_TEST_SETTINGS)
+@patch('main.services.amocrm.lead_sender.LeadSender._get_editable_status_for_pipeline', return_value=3)
+class LeadBulkResendTest(TestCase):
+    """Пакетная переотправка ошибочных заявок в amoCRM"""
+
+    def setUp(self):
+        AmoCRMToken.objects.create(
+            access_token='test_access_token',
+            refresh_token='test_refresh_token',
+            expires_at=timezone.now() + timedelta(days=30)
+        )
+        self.leads = [
+            ContactForm.objects.create(
+                name=f'Lead {i}', region='Toshkent shahri', phone='+998900000000',
+                amocrm_status='failed', amocrm_error='timeout'
+            )
+            for i in range(5)
+        ]
+        ContactForm.objects.create(name='Sent', region='Toshkent shahri', phone='+998900000001', amocrm_status='sent')
+
+    def test_job_sends_in_chunks(self, _status):
+        """5 заявок при размере пачки 2 — три запроса, id лидов по request_id"""
+        job = LeadResendJobRunner.create_job(ContactForm.objects.all())
+        self.assertEqual(job.total, 5)
+
+        with patch('main.services.amocrm.lead_sender.HttpClient.post', side_effect=_complex_response) as post:
+            LeadResendJobRunner.run(job.pk)
+
+        self.assertEqual(post.call_count, 3)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual((job.processed, job.sent_count, job.failed_count), (5, 5, 0))
+
+        for lead in self.leads:
+            lead.refresh_from_db()
+            self.assertEqual(lead.amocrm_status, 'sent')
+            self.assertEqual(lead.amocrm_lead_id, str(1000 + lead.pk))
+            self.assertIsNone(lead.amocrm_error)
+
+    def test_failed_chunk_keeps_error(self, _status):
+        """Ошибка amoCRM — заявки пачки остаются failed с текстом ошибки"""
+        job = LeadResendJobRunner.create_job(ContactForm.objects.all())
+
+        error = MagicMock(status_code=400, text='Bad request')
+        error.json.return_value = {'title': 'Bad Request'}
+        with patch('main.services.amocrm.lead_sender.HttpClient.post', return_value=error):
+            LeadResendJobRunner.run(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.sent_count, job.failed_count), ('done', 0, 5))
+        self.assertEqual(ContactForm.objects.filter(amocrm_status='failed', amocrm_error='Bad Request').count(), 5)
+
+    def test_job_runs_once(self, _status):
+        """Задачу, уже выполненную одним процессом, другой не повторяет"""
+        job = LeadResendJobRunner.create_job(ContactForm.objects.all())
+
+        with patch('main.services.amocrm.lead_sender.HttpClient.post', side_effect=_complex_response) as post:
+            LeadResendJobRunner.run(job.pk)
+            LeadResendJobRunner.run(job.pk)
+            self.assertEqual(LeadResendJobRunner.run_pending(), 0)
+
+        self.assertEqual(post.call_count, 3)
+        self.assertEqual(LeadResendJob.objects.get(pk=job.pk).status, 'done')
+
+    def test_outbox_keeps_leads_without_telegram(self, _status):
+        """
+        Заявка, по которой outbox ещё не отправил Telegram, в задачу не попадает:
+        её amoCRM повторяет воркер. Остальные открытые записи outbox закрываются.
+        """
+        pending_telegram, telegram_done = self.leads[0], self.leads[1]
+        LeadOutbox.objects.create(contact_form=pending_telegram, attempts=1, telegram_notified=False)
+        LeadOutbox.objects.create(contact_form=telegram_done, attempts=1, telegram_notified=True)
+
+        job = LeadResendJobRunner.create_job(ContactForm.objects.all())
+
+        self.assertEqual(job.total, 4)
+        self.assertNotIn(pending_telegram.pk, job.lead_ids)
+        self.assertFalse(LeadOutbox.objects.get(contact_form=pending_telegram).is_done)
+        self.assertTrue(LeadOutbox.objects.get(contact_form=telegram_done).is_done)
+
+        # Воркер берёт только свою заявку — один лид в amoCRM на каждую заявку
+        LeadOutbox.objects.update(next_attempt_at=timezone.now())
+        with patch('main.services.amocrm.lead_sender.LeadSender.send_lead') as send_lead, \
+                patch('main.services.telegram.TelegramNotificationSender.send_lead_notification'):
+            LeadOutboxProcessor.drain()
+        self.assertEqual([call.args[0].pk for call in send_lead.call_args_list], [pending_telegram.pk])
+
+    def test_only_outbox_leads_no_job(self, _status):
+        """Все ошибочные заявки ещё в outbox без Telegram — задачи нет"""
+        ContactForm.objects.filter(pk__in=[lead.pk for lead in self.leads[1:]]).update(amocrm_status='sent')
+        LeadOutbox.objects.create(contact_form=self.leads[0], telegram_notified=False)
+
+        self.assertIsNone(LeadResendJobRunner.create_job(ContactForm.objects.all()))
+        self.assertFalse(LeadOutbox.objects.get(contact_form=self.leads[0]).is_done)
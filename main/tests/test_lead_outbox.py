@@ -0,0 +1,118 @@
+from datetime import timedelta
+from unittest.mock import patch
+import json
+
+from django.test import TestCase, Client, override_settings
+from django.utils import timezone
+
+from main.models import ContactForm, LeadOutbox
+from main.services.lead_outbox import LeadOutboxProcessor
+
+
+def _fake_send_lead(status, error=None):
+    """Подмена LeadSender.send_lead: только проставляет статус"""
+    def send_lead(contact_form):
+        contact_form.amocrm_status = status
+        contact_form.amocrm_error = error
+        if status == 'sent':
+            contact_form.amocrm_lead_id = '777'
+        contact_form.save()
+    return send_lead
+
+
+@override_settings(LEAD_OUTBOX_MAX_ATTEMPTS=3, LEAD_OUTBOX_BACKOFF_BASE=30, LEAD_OUTBOX_BACKOFF_MAX=3600)
+class LeadOutboxTest(TestCase):
+    """Очередь отправки заявок в amoCRM / Telegram"""
+
+    def setUp(self):
+        self.client = Client()
+
+    def _create_lead(self):
+        contact_form = ContactForm.objects.create(
+            name='Outbox Test', region='Toshkent shahri', phone='+998900000001'
+        )
+        return LeadOutboxProcessor.enqueue(contact_form)
+
+    # ==========================================
+    # API: ответ сразу после INSERT
+    # ==========================================
+
+    @patch('main.services.telegram.TelegramNotificationSender.send_lead_notification')
+    @patch('main.services.amocrm.lead_sender.LeadSender.send_lead')
+    def test_create_only_enqueues(self, send_lead, send_notification):
+        """POST /contact/ не ходит во внешние сервисы, а ставит заявку в очередь"""
+        response = self.client.post(
+            '/api/uz/contact/',
+            data=json.dumps({'name': 'Test', 'region': 'Toshkent shahri', 'phone': '+998901234567'}),
+            content_type='application/json',
+            secure=True
+        )
+
+        self.assertEqual(response.status_code, 201)
+        send_lead.assert_not_called()
+        send_notification.assert_not_called()
+
+        lead = ContactForm.objects.get(phone='+998901234567')
+        self.assertEqual(lead.amocrm_status, 'pending')
+        self.assertFalse(lead.outbox.is_done)
+
+    # ==========================================
+    # Воркер
+    # ==========================================
+
+    @patch('main.services.telegram.TelegramNotificationSender.send_lead_notification', return_value=True)
+    def test_drain_delivers(self, send_notification):
+        """Успешная отправка закрывает запись очереди"""
+        entry = self._create_lead()
+
+        with patch('main.services.amocrm.lead_sender.LeadSender.send_lead', side_effect=_fake_send_lead('sent')):
+            self.assertEqual(LeadOutboxProcessor.drain(), 1)
+
+        entry.refresh_from_db()
+        self.assertTrue(entry.is_done)
+        self.assertTrue(entry.telegram_notified)
+        self.assertEqual(entry.contact_form.amocrm_status, 'sent')
+        send_notification.assert_called_once()
+
+    @patch('main.services.telegram.TelegramNotificationSender.send_lead_notification', return_value=True)
+    def test_failure_is_retried_with_backoff(self, send_notification):
+        """Ошибка amoCRM — повтор позже, Telegram уведомляется один раз"""
+        entry = self._create_lead()
+
+        with patch('main.services.amocrm.lead_sender.LeadSender.send_lead',
+                   side_effect=_fake_send_lead('failed', 'timeout')):
+            LeadOutboxProcessor.drain()
+
+        entry.refresh_from_db()
+        self.assertFalse(entry.is_done)
+        self.assertEqual(entry.attempts, 1)
+        self.assertGreater(entry.next_attempt_at, timezone.now() + timedelta(seconds=20))
+        self.assertEqual(entry.contact_form.amocrm_status, 'failed')
+
+        # До наступления next_attempt_at заявка не берётся
+        self.assertEqual(LeadOutboxProcessor.drain(), 0)
+
+        LeadOutbox.objects.filter(pk=entry.pk).update(next_attempt_at=timezone.now())
+        with patch('main.services.amocrm.lead_sender.LeadSender.send_lead', side_effect=_fake_send_lead('sent')):
+            LeadOutboxProcessor.drain()
+
+        entry.refresh_from_db()
+        self.assertTrue(entry.is_done)
+        self.assertEqual(entry.attempts, 2)
+        send_notification.assert_called_once()
+
+    @patch('main.services.telegram.TelegramNotificationSender.send_lead_notification', return_value=True)
+    def test_gives_up_after_max_attempts(self, send_notification):
+        """После LEAD_OUTBOX_MAX_ATTEMPTS попыток заявка остаётся в статусе failed"""
+        entry = self._create_lead()
+
+        with patch('main.services.amocrm.lead_sender.LeadSender.send_lead',
+                   side_effect=_fake_send_lead('failed', 'boom')):
+            for _ in range(3):
+                LeadOutbox.objects.filter(pk=entry.pk).update(next_attempt_at=timezone.now())
+                LeadOutboxProcessor.drain()
+
+        entry.refresh_from_db()
+        self.assertTrue(entry.is_done)
+        self.assertEqual(entry.attempts, 3)
+        self.assertEqual(entry.contact_form.amocrm_error, 'boom')
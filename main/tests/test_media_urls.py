@@ -0,0 +1,43 @@
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from main.models import Product, ProductGallery
+from main.serializers import ProductCardSerializer, ProductGallerySerializer
+from main.serializers_base import MediaUrlBuilder
+
+
+@override_settings(ALLOWED_HOSTS=['autoliga.uz'])
+class MediaUrlBuilderTest(SimpleTestCase):
+    """URL медиа собираются от базы, вычисленной один раз на запрос"""
+
+    def setUp(self):
+        self.request = RequestFactory().get('/api/uz/products/', HTTP_HOST='autoliga.uz', secure=True)
+
+    def test_same_as_build_absolute_uri(self):
+        """Результат совпадает с request.build_absolute_uri(file.url), включая экранирование"""
+        image = ProductGallery(image='products/gallery/tracker 2024 (1).jpg').image
+        self.assertEqual(MediaUrlBuilder(self.request)(image), self.request.build_absolute_uri(image.url))
+
+    def test_without_request(self):
+        image = ProductGallery(image='products/gallery/a.jpg').image
+        self.assertEqual(MediaUrlBuilder()(image), image.url)
+        self.assertIsNone(MediaUrlBuilder()(ProductGallery().image))
+
+    @override_settings(MEDIA_CDN_URL='https://cdn.autoliga.uz/media')
+    def test_cdn_base(self):
+        image = ProductGallery(image='products/gallery/a.jpg').image
+        self.assertEqual(MediaUrlBuilder(self.request)(image), 'https://cdn.autoliga.uz/media/products/gallery/a.jpg')
+
+    def test_serializers_share_builder(self):
+        """Один builder на корневой сериализатор (many=True и вложенные поля)"""
+        context = {'request': self.request}
+        data = ProductGallerySerializer(
+            [ProductGallery(id=n, image=f'products/gallery/{n}.jpg') for n in range(3)], many=True, context=context
+        ).data
+        self.assertEqual(data[2]['image_url'], 'https://autoliga.uz/media/products/gallery/2.jpg')
+        self.assertIsInstance(context['media_url_builder'], MediaUrlBuilder)
+
+    def test_card_image_fallback(self):
+        """Карточка без card_image — main_image"""
+        car = Product(id=1, title='Tracker', slug='tracker', main_image='products/main/tracker.jpg')
+        serializer = ProductCardSerializer(context={'request': self.request})
+        self.assertEqual(serializer.get_image_url(car), 'https://autoliga.uz/media/products/main/tracker.jpg')
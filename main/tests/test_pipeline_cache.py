@@ -0,0 +1,62 @@
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from main.services.amocrm import LeadSender
+
+
+def _statuses_response():
+    response = MagicMock(status_code=200)
+    response.json.return_value = {'_embedded': {'statuses': [
+        {'id': 100, 'is_editable': False},
+        {'id': 200, 'is_editable': True},
+    ]}}
+    return response
+
+
+@override_settings(AMOCRM_SUBDOMAIN='test', AMOCRM_PIPELINE_ID=5, AMOCRM_PIPELINE_CACHE_TTL=3600)
+class PipelineCacheTest(TestCase):
+    """Статусы воронки: amocrm:pipeline:{id} в кэше, amoCRM — только при промахе"""
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    @patch('main.services.amocrm.lead_sender.HttpClient.get')
+    def test_miss_then_hit(self, http_get):
+        http_get.return_value = _statuses_response()
+
+        self.assertEqual(LeadSender._get_editable_status_for_pipeline('token', 5), 200)
+        self.assertEqual(cache.get('amocrm:pipeline:5'), {'editable_status_id': 200, 'status_ids': [100, 200]})
+
+        self.assertEqual(LeadSender._get_editable_status_for_pipeline('token', 5), 200)
+        self.assertEqual(http_get.call_count, 1)
+
+    @patch('main.services.amocrm.lead_sender.HttpClient.get')
+    def test_invalidate(self, http_get):
+        http_get.return_value = _statuses_response()
+        LeadSender._get_editable_status_for_pipeline('token', 5)
+
+        LeadSender.invalidate_pipeline_cache(5)
+        self.assertIsNone(cache.get('amocrm:pipeline:5'))
+        LeadSender._get_editable_status_for_pipeline('token', 5)
+        self.assertEqual(http_get.call_count, 2)
+
+    @patch('main.services.amocrm.lead_sender.HttpClient.get', side_effect=ConnectionError('down'))
+    def test_fetch_error_not_cached(self, http_get):
+        """Ошибка загрузки — None, в кэш ничего не пишется (следующий лид попробует снова)"""
+        self.assertIsNone(LeadSender._get_editable_status_for_pipeline('token', 5))
+        self.assertIsNone(cache.get('amocrm:pipeline:5'))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    @patch('main.services.amocrm.lead_sender.HttpClient.get')
+    def test_prewarm_refuses_process_local_cache(self, http_get):
+        out = StringIO()
+        call_command('prewarm_amocrm_cache', stdout=out)
+        self.assertIn('LocMemCache', out.getvalue())
+        http_get.assert_not_called()
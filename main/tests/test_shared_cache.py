@@ -0,0 +1,77 @@
+import shutil
+import tempfile
+import threading
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from myproject.cache_backends import SQLiteCache
+from myproject.middleware import RateLimitMiddleware
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    """Общий SQLite-кэш: атомарные add/incr и истечение ключей"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = SQLiteCache(f'{self.tmpdir}/cache.sqlite3', {})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_roundtrip_and_expiry(self):
+        """Значения любых типов читаются обратно, просроченные — нет"""
+        self.cache.set('dict', {'a': [1, 2]})
+        self.cache.set('short', 'x', timeout=0.05)
+        self.assertEqual(self.cache.get('dict'), {'a': [1, 2]})
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertTrue(self.cache.add('short', 'y'))
+
+    def test_add_and_incr_are_atomic(self):
+        """Параллельные потоки (свои соединения) не теряют инкременты"""
+        def worker():
+            for _ in range(50):
+                if not self.cache.add('counter', 1):
+                    self.cache.incr('counter')
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.cache.get('counter'), 200)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+
+class RateLimitSharedCacheTest(SimpleTestCase):
+    """Rate limit считает запросы через общий кэш"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.override = override_settings(
+            CACHES={'default': {
+                'BACKEND': 'myproject.cache_backends.SQLiteCache',
+                'LOCATION': f'{self.tmpdir}/cache.sqlite3',
+            }},
+            RATE_LIMIT_RULES={'/api/': {'limit': 2, 'window': 60}},
+        )
+        self.override.enable()
+
+    def tearDown(self):
+        cache.clear()
+        self.override.disable()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_limit_shared_between_middleware_instances(self):
+        """Два экземпляра (как два воркера) делят один лимит"""
+        workers = [RateLimitMiddleware(lambda request: HttpResponse('ok')) for _ in range(2)]
+        request = RequestFactory().get('/api/uz/products/', REMOTE_ADDR='10.0.0.1')
+
+        statuses = [workers[i % 2](request).status_code for i in range(3)]
+
+        self.assertEqual(statuses, [200, 200, 429])
@@ -0,0 +1,78 @@
+from datetime import timedelta
+from unittest.mock import patch, MagicMock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from main.models import AmoCRMToken
+from main.services.amocrm import TokenManager
+
+
+def _token_response(access_token='new_access', refresh_token='new_refresh'):
+    response = MagicMock(status_code=200)
+    response.json.return_value = {
+        'access_token': access_token,
+        'refresh_token': refresh_token,
+        'expires_in': 86400,
+    }
+    return response
+
+
+@override_settings(
+    AMOCRM_SUBDOMAIN='test',
+    AMOCRM_CLIENT_ID='id',
+    AMOCRM_CLIENT_SECRET='secret',
+    AMOCRM_REDIRECT_URI='https://example.com',
+)
+class TokenManagerTest(TestCase):
+    """Кэш access_token в процессе и обновление под блокировкой"""
+
+    def setUp(self):
+        TokenManager.invalidate_cache()
+
+    def tearDown(self):
+        TokenManager.invalidate_cache()
+
+    def test_valid_token_is_cached_in_process(self):
+        """Повторные вызовы не читают AmoCRMToken из БД"""
+        AmoCRMToken.objects.create(
+            access_token='access', refresh_token='refresh',
+            expires_at=timezone.now() + timedelta(days=1)
+        )
+
+        self.assertEqual(TokenManager.get_valid_token(), 'access')
+        with self.assertNumQueries(0):
+            self.assertEqual(TokenManager.get_valid_token(), 'access')
+
+    @patch('main.services.amocrm.token_manager.HttpClient.post', return_value=_token_response())
+    def test_expired_token_refreshed_once(self, post):
+        """Истёкший токен обновляется один раз, дальше берётся из памяти"""
+        AmoCRMToken.objects.create(
+            access_token='old_access', refresh_token='old_refresh',
+            expires_at=timezone.now() + timedelta(minutes=10)
+        )
+
+        for _ in range(3):
+            self.assertEqual(TokenManager.get_valid_token(), 'new_access')
+
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(AmoCRMToken.objects.get(pk=1).refresh_token, 'new_refresh')
+
+    @patch('main.services.amocrm.token_manager.HttpClient.post', return_value=_token_response())
+    def test_refresh_skipped_if_rotated_by_other_worker(self, post):
+        """Устаревший объект токена не тратит одноразовый refresh_token повторно"""
+        stale = AmoCRMToken.objects.create(
+            access_token='old_access', refresh_token='old_refresh',
+            expires_at=timezone.now() + timedelta(minutes=10)
+        )
+        # Другой процесс уже обновил токены
+        AmoCRMToken.objects.filter(pk=1).update(
+            access_token='fresh_access', refresh_token='fresh_refresh',
+            expires_at=timezone.now() + timedelta(days=1)
+        )
+
+        TokenManager.refresh_token(stale)
+
+        post.assert_not_called()
+        self.assertEqual(stale.access_token, 'fresh_access')
+        self.assertEqual(TokenManager.get_valid_token(), 'fresh_access')
@@ -0,0 +1,37 @@
+from django.test import SimpleTestCase
+from django.utils import translation
+
+from main.models import Dealer, Product
+from main.translation_access import accessor, translated
+
+
+class TranslationAccessTest(SimpleTestCase):
+    """Accessor-таблица: тот же результат, что и getattr(obj, f'{field}_{lang}') or obj.field"""
+
+    def test_language_value(self):
+        car = Product(title_uz='Tahoe', title_ru='Тахо')
+        self.assertEqual(translated(car, 'title', 'ru'), 'Тахо')
+        self.assertEqual(translated(car, 'title', 'uz'), 'Tahoe')
+
+    def test_fallback_to_active_language(self):
+        """Пустой перевод — значение основного поля (текущий язык)"""
+        car = Product(title_uz='Tahoe', title_ru='')
+        with translation.override('uz'):
+            self.assertEqual(translated(car, 'title', 'ru'), 'Tahoe')
+
+    def test_default(self):
+        dealer = Dealer(name_uz='Autoliga', address_uz='', address_ru='')
+        with translation.override('uz'):
+            self.assertEqual(translated(dealer, 'address', 'ru', default='—'), '—')
+            self.assertEqual(accessor(Dealer, 'address', 'ru')(dealer), '')
+
+    def test_custom_languages(self):
+        dealer = Dealer(name_uz='', name_ru='Автолига', name_en='Autoliga')
+        with translation.override('uz'):
+            name_of = accessor(Dealer, 'name', 'uz', languages=('en', 'ru'))
+            self.assertEqual(name_of(dealer), 'Autoliga')
+            self.assertIs(accessor(Dealer, 'name', 'uz', languages=('en', 'ru')), name_of)
+
+    def test_untranslated_field(self):
+        dealer = Dealer(phone='+998 71 000 00 00')
+        self.assertEqual(translated(dealer, 'phone', 'ru'), '+998 71 000 00 00')
@@ -0,0 +1,46 @@
+from django.test import TestCase
+from django.utils import translation
+
+from main.models import (Vacancy, VacancyCondition, VacancyIdealCandidate, VacancyRequirement,
+                         VacancyResponsibility)
+from main.serializers import VacancySerializer
+
+
+class VacancySerializerQueriesTest(TestCase):
+    """Страница вакансий: число запросов не зависит от количества вакансий"""
+
+    def _create_vacancy(self, n):
+        vacancy = Vacancy.objects.create(title=f'Vakansiya {n}', title_ru=f'Вакансия {n}', slug=f'vacancy-{n}')
+        for order in (2, 1):
+            VacancyResponsibility.objects.create(vacancy=vacancy, title=f'Vazifa {order}',
+                                                 text=f'Matn {order}', order=order)
+            VacancyRequirement.objects.create(vacancy=vacancy, text=f'Talab {order}', order=order)
+            VacancyCondition.objects.create(vacancy=vacancy, text=f'Shart {order}', order=order)
+            VacancyIdealCandidate.objects.create(vacancy=vacancy, text=f'Sifat {order}', order=order)
+
+    def _serialize(self):
+        queryset = VacancySerializer.eager_queryset(Vacancy.objects.filter(is_active=True))
+        return VacancySerializer(queryset, many=True).data
+
+    def test_constant_queries(self):
+        """Вакансии + 4 связи = 5 запросов и для одной, и для пяти вакансий"""
+        self._create_vacancy(0)
+        with self.assertNumQueries(5):
+            self._serialize()
+
+        for n in range(1, 5):
+            self._create_vacancy(n)
+        with self.assertNumQueries(5):
+            self.assertEqual(len(self._serialize()), 5)
+
+    def test_order_and_translation(self):
+        """Вложенные списки отсортированы по order, поля — на текущем языке с откатом"""
+        self._create_vacancy(0)
+        data = self._serialize()[0]
+        self.assertEqual(data['title'], 'Vakansiya 0')
+        self.assertEqual([item['text'] for item in data['requirements']], ['Talab 1', 'Talab 2'])
+        self.assertEqual(data['responsibilities'][0], {'id': data['responsibilities'][0]['id'],
+                                                       'title': 'Vazifa 1', 'text': 'Matn 1'})
+
+        with translation.override('ru'):
+            self.assertEqual(self._serialize()[0]['title'], 'Вакансия 0')
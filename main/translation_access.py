@@ -0,0 +1,93 @@
+"""
+Tarjima maydonlari uchun oldindan tuzilgan accessor jadvali.
+
+Har bir obyekt va maydon uchun f'{field}_{lang}' satrini yasab, getattr(...) or
+... zanjirini yozish o'rniga main/translation.py dagi ro'yxatdan o'tgan
+modellar bo'yicha (model, til) -> {maydon: accessor} jadvali bir marta quriladi.
+Tillar tartibi — MODELTRANSLATION_FALLBACK_LANGUAGES dan (modeltranslation
+resolution_order); hammasi bo'sh bo'lsa, avvalgidek asosiy maydon (joriy faol
+til) qiymati olinadi.
+
+Katta ro'yxatlarda accessor ni sikldan tashqarida oling:
+
+    title_of = accessor(Product, 'title', lang)
+    titles = [title_of(car) for car in cars]
+
+Bitta qiymat uchun:
+
+    translated(dealer, 'address', lang, default='')
+"""
+
+from operator import attrgetter
+
+from modeltranslation.translator import translator
+from modeltranslation.utils import build_localized_fieldname, resolution_order
+
+# (model, til) -> {maydon: accessor}; birinchi murojaatda to'liq quriladi
+_table: dict[tuple[type, str], dict[str, object]] = {}
+# languages bilan so'ralgan va tarjima qilinmaydigan maydonlar accessorlari
+_custom: dict[tuple, object] = {}
+
+
+def _compile(field, languages):
+    getters = tuple(attrgetter(build_localized_fieldname(field, lang)) for lang in languages)
+
+    def get(obj, default=''):
+        for getter in getters:
+            value = getter(obj)
+            if value:
+                return value
+        return getattr(obj, field, None) or default
+
+    return get
+
+
+def _plain(field):
+    # Tarjima qilinmaydigan maydon (yoki model ro'yxatda yo'q)
+    def get(obj, default=''):
+        return getattr(obj, field, None) or default
+
+    return get
+
+
+def _build():
+    from django.conf import settings
+
+    table = {}
+    for model in translator.get_registered_models():
+        fields = translator.get_options_for_model(model).fields
+        for lang in settings.MODELTRANSLATION_LANGUAGES:
+            order = resolution_order(lang)
+            table[model, lang] = {field: _compile(field, order) for field in fields}
+    # Bitta update: boshqa thread (bot DB pool) yarim qurilgan jadvalni ko'rmaydi
+    _table.update(table)
+
+
+def accessor(model, field, lang, languages=None):
+    """
+    obj -> tarjima qiymati funksiyasi (accessor(obj, default='')).
+
+    languages: lang dan keyin qaraladigan tillar — standart tartib
+    (MODELTRANSLATION_FALLBACK_LANGUAGES) o'rniga.
+    """
+    if languages is not None:
+        key = (model, field, lang, tuple(languages))
+        get = _custom.get(key)
+        if get is None:
+            order = tuple(dict.fromkeys((lang, *languages)))
+            get = _custom[key] = _compile(field, order)
+        return get
+
+    if not _table:
+        _build()
+    get = _table.get((model, lang), {}).get(field)
+    if get is None:
+        get = _custom.get((model, field))
+        if get is None:
+            get = _custom[model, field] = _plain(field)
+    return get
+
+
+def translated(obj, field, lang, default=''):
+    """Bitta obyekt maydonining tarjimasi (qarang: accessor)."""
+    return accessor(type(obj), field, lang)(obj, default)
@@ -8,12 +8,13 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAdminUser
-from django.http import HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseNotModified, HttpResponseRedirect
+from django.utils.http import parse_etags
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.throttling import AnonRateThrottle
 from .models import ( TelegramUser,
     News, ContactForm, JobApplication, Vacancy, Product, ProductCategory, 
-    Dealer, DealerImage, Review, TestDriveRequest, BranchManager
+    Dealer, DealerImage, Review, TestDriveRequest, BranchManager, ProductParameter
 )
 from .serializers import (
     NewsSerializer, ContactFormSerializer, JobApplicationSerializer,
@@ -22,9 +23,14 @@ from .serializers import (
     VacancySerializer
 )
 from django.utils import timezone
+import hashlib
 import logging
-import json
 from django.db.models import Prefetch
+from django.db import transaction
+from django.core.cache import cache
+from .signals import home_cache_key, catalog_version
+from .fast_json import JSONRenderer, dumps
+from .translation_access import accessor, translated
 
 
 logger = logging.getLogger('django')
@@ -38,73 +44,89 @@ def current_year(request):
 
 
 
-def index(request):
-    """Главная страница с динамическим слайдером"""
-    try:
-        from django.utils.translation import get_language
-        current_lang = get_language()
+def _build_home_context(current_lang):
+    """Данные главной страницы (списки и JSON) — кэшируются целиком на язык"""
+    news_list = list(News.objects.filter(
+        is_active=True
+    ).select_related('author').order_by('-order', '-created_at')[:8])
+    
+    featured_products = Product.objects.filter(
+        is_active=True,
+        is_featured=True
+    ).order_by('-slider_order', '-created_at')[:10]
+    
+    productCategory = list(ProductCategory.objects.filter(
+        is_active=True
+    ).prefetch_related(
+        Prefetch(
+            'products',
+            queryset=Product.objects.filter(
+                is_active=True
+            ).only('id', 'slug', 'title', 'main_image'),  # faqat kerakli fieldlar
+            to_attr='active_products'  #  cache'ga oladi
+        )
+    ))
+
+    title_of = accessor(Product, 'title', current_lang)
+    price_of = accessor(Product, 'slider_price', current_lang)
+    power_of = accessor(Product, 'slider_power', current_lang)
+    fuel_of = accessor(Product, 'slider_fuel_consumption', current_lang)
+
+    slider_data = []
+    for product in featured_products:
+        title = title_of(product)
+        price = price_of(product, 'Narx so\'rang')
+        power = power_of(product, '—')
+        fuel = fuel_of(product, '—')
         
-        news_list = News.objects.filter(
-            is_active=True
-        ).select_related('author').order_by('-order', '-created_at')[:8]
+        slider_item = {
+            'year': product.slider_year,
+            'title': title,
+            'price': price,
+            'power': power,
+            'mpg': fuel,
+            'image': None,
+            'link': f'/products/{product.slug}/',
+        }
         
-        featured_products = Product.objects.filter(
-            is_active=True,
-            is_featured=True
-        ).order_by('-slider_order', '-created_at')[:10]
+        if product.slider_image:
+            slider_item['image'] = product.slider_image.url
+        elif product.main_image:
+            slider_item['image'] = product.main_image.url
         
-        productCategory = ProductCategory.objects.filter(
-            is_active=True
-        ).prefetch_related(
-            Prefetch(
-                'products',
-                queryset=Product.objects.filter(
-                    is_active=True
-                ).only('id', 'slug', 'title', 'main_image'),  # faqat kerakli fieldlar
-                to_attr='active_products'  #  cache'ga oladi
-            )
-        )
-
-
-
+        slider_data.append(slider_item)
+    
+    # Менеджеры для секции "Наша команда"
+    team_managers = list(BranchManager.objects.filter(
+        is_active=True
+    ).select_related('dealer').order_by('order', 'id'))
+
+    return {
+        'news_list': news_list,
+        'slider_products': dumps(slider_data),
+        'featured_count': len(slider_data),
+        'productCategory': productCategory,
+        'team_managers': team_managers,
+    }
 
 
-        slider_data = []
-        for product in featured_products:
-            title = getattr(product, f'title_{current_lang}', None) or product.title
-            price = getattr(product, f'slider_price_{current_lang}', None) or product.slider_price or 'Narx so\'rang'
-            power = getattr(product, f'slider_power_{current_lang}', None) or product.slider_power or '—'
-            fuel = getattr(product, f'slider_fuel_consumption_{current_lang}', None) or product.slider_fuel_consumption or '—'
-            
-            slider_item = {
-                'year': product.slider_year,
-                'title': title,
-                'price': price,
-                'power': power,
-                'mpg': fuel,
-                'image': None,
-                'link': f'/products/{product.slug}/',
-            }
-            
-            if product.slider_image:
-                slider_item['image'] = product.slider_image.url
-            elif product.main_image:
-                slider_item['image'] = product.main_image.url
-            
-            slider_data.append(slider_item)
+def index(request):
+    """Главная страница с динамическим слайдером"""
+    try:
+        from django.utils.translation import get_language
+        current_lang = get_language()
         
-        # Менеджеры для секции "Наша команда"
-        team_managers = BranchManager.objects.filter(
-            is_active=True
-        ).select_related('dealer').order_by('order', 'id')
+        # Сбрасывается сигналами (main/signals.py) при сохранении новостей, продуктов,
+        # категорий, дилеров и менеджеров — обычный заход не делает запросов к БД
+        cache_key = home_cache_key(current_lang)
+        home_context = cache.get(cache_key)
+        if home_context is None:
+            home_context = _build_home_context(current_lang)
+            cache.set(cache_key, home_context, settings.HOME_PAGE_CACHE_TIMEOUT)
 
         context = {
-            'news_list': news_list,
-            'slider_products': json.dumps(slider_data, ensure_ascii=False),
-            'featured_count': len(slider_data),
-            'productCategory': productCategory,
+            **home_context,
             'RECAPTCHA_SITE_KEY': getattr(settings, 'RECAPTCHA_SITE_KEY', ''),
-            'team_managers': team_managers,
         }
         
         return render(request, 'main/index.html', context)
@@ -194,24 +216,18 @@ def news(request):
         return render(request, 'main/news.html', {'news_list': []})
 
 
-def dealers(request):
+def _dealers_payload(lang):
+    """Dilerlar sahifasi (xarita) uchun ma'lumotlar"""
     dealers_qs = Dealer.objects.filter(is_active=True).order_by('order', 'name')
+    # Joriy til, bo'sh bo'lsa — boshqa tillardan (uz, ru, en tartibida)
+    name_of = accessor(Dealer, 'name', lang, languages=settings.MODELTRANSLATION_LANGUAGES)
+    address_of = accessor(Dealer, 'address', lang, languages=settings.MODELTRANSLATION_LANGUAGES)
+    hours_of = accessor(Dealer, 'working_hours', lang, languages=settings.MODELTRANSLATION_LANGUAGES)
     dealers_data = []
     for d in dealers_qs:
-        # modeltranslation: d.name joriy tilga qarab qaytaradi.
-        # Agar bo'sh bo'lsa, boshqa tillardan olish
-        name = (d.name or
-                getattr(d, 'name_uz', '') or
-                getattr(d, 'name_ru', '') or
-                getattr(d, 'name_en', '') or '')
-        address = (d.address or
-                   getattr(d, 'address_uz', '') or
-                   getattr(d, 'address_ru', '') or
-                   getattr(d, 'address_en', '') or '')
-        working_hours = (d.working_hours or
-                         getattr(d, 'working_hours_uz', '') or
-                         getattr(d, 'working_hours_ru', '') or
-                         getattr(d, 'working_hours_en', '') or '')
+        name = name_of(d)
+        address = address_of(d)
+        working_hours = hours_of(d)
         dealers_data.append({
             'id': d.id,
             'name': name,
@@ -228,8 +244,13 @@ def dealers(request):
             'lng': float(d.longitude) if d.longitude else None,
             'detail_url': d.get_absolute_url(),
         })
+    return dealers_data
+
+
+def dealers(request):
+    dealers_data = _dealers_payload(translation.get_language() or 'uz')
     return render(request, 'main/dealers.html', {
-        'dealers_json': json.dumps(dealers_data, ensure_ascii=False),
+        'dealers_json': dumps(dealers_data),
     })
 
 
@@ -270,8 +291,8 @@ def test_drive(request):
     dealers_data = [{'id': d.id, 'name': d.name, 'address': d.address or ''} for d in dealers]
 
     return render(request, 'main/test_drive.html', {
-        'products_json': json.dumps(products_data, ensure_ascii=False),
-        'dealers_json': json.dumps(dealers_data, ensure_ascii=False),
+        'products_json': dumps(products_data),
+        'dealers_json': dumps(dealers_data),
         'RECAPTCHA_SITE_KEY': getattr(settings, 'RECAPTCHA_SITE_KEY', ''),
     })
 
@@ -281,12 +302,9 @@ def jobs(request):
     try:
         
         
-        vacancies = Vacancy.objects.filter(is_active=True).prefetch_related(
-            'responsibilities', 
-            'requirements', 
-            'ideal_candidates',
-            'conditions'
-        ).order_by('order', '-created_at')
+        vacancies = VacancySerializer.eager_queryset(
+            Vacancy.objects.filter(is_active=True).order_by('order', '-created_at')
+        )
         
         serializer = VacancySerializer(vacancies, many=True, context={'request': request})
         vacancies_data = serializer.data
@@ -398,28 +416,12 @@ class ContactFormViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
             
-            contact_form = serializer.save()
-            
-            # Отправляем в amoCRM
-            try:
-                from main.services.amocrm.lead_sender import LeadSender
-                LeadSender.send_lead(contact_form)
-                contact_form.refresh_from_db()
-            except Exception as amocrm_error:
-                logger.error(
-                    f"Ошибка amoCRM для лида #{contact_form.id}: {str(amocrm_error)}", 
-                    exc_info=True
-                )
-            
-            # Отправляем в Telegram (ПОСЛЕ amoCRM)
-            try:
-                from main.services.telegram import TelegramNotificationSender
-                TelegramNotificationSender.send_lead_notification(contact_form)
-            except Exception as telegram_error:
-                logger.error(
-                    f"Ошибка Telegram для лида #{contact_form.id}: {str(telegram_error)}", 
-                    exc_info=True
-                )
+            # amoCRM и Telegram — в фоне (python manage.py run_outbox),
+            # заявка попадает в очередь в той же транзакции, что и INSERT
+            from main.services.lead_outbox import LeadOutboxProcessor
+            with transaction.atomic():
+                contact_form = serializer.save()
+                LeadOutboxProcessor.enqueue(contact_form)
             
             return Response({
                 'success': True,
@@ -498,7 +500,50 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Internal error'}, status=500)
 
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+class CatalogCacheMixin:
+    """
+    Кеш JSON-ответов list/retrieve по (язык, версия каталога, URL) и сильный ETag.
+
+    Версию поднимают сигналы при сохранении товаров, параметров, галереи и т.д.
+    (signals.catalog_version) — старые ответы просто перестают читаться.
+    If-None-Match с актуальным ETag получает 304 без тела.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(request, super().retrieve, *args, **kwargs)
+
+    def _cached_response(self, request, view, *args, **kwargs):
+        # Browsable API и прочие форматы не кешируются
+        if request.accepted_renderer.format != 'json':
+            return view(request, *args, **kwargs)
+
+        language = translation.get_language() or 'uz'
+        # В URL входят хост (абсолютные ссылки на картинки) и query (page, category)
+        url_hash = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+        key = f'api:catalog:v{catalog_version()}:{language}:{url_hash}'
+
+        cached = cache.get(key)
+        if cached is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            body = JSONRenderer().render(response.data)
+            cached = (f'"{hashlib.sha256(body).hexdigest()[:32]}"', body)
+            cache.set(key, cached, settings.API_CATALOG_CACHE_TIMEOUT)
+
+        etag, body = cached
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        return response
+
+
+class ProductViewSet(CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     """API для продуктов"""
     permission_classes = [AllowAny]
     lookup_field = 'slug'
@@ -509,7 +554,7 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
                 'category'  # ✅ ИСПРАВЛЕНО: select_related вместо prefetch_related
             ).prefetch_related(
                 'card_specs__icon',
-                'parameters',
+                Prefetch('parameters', queryset=ProductParameter.objects.select_related('category')),
                 'features__icon',
                 'gallery'
             ).order_by('order', 'title')
@@ -542,10 +587,10 @@ def products(request):
             
             category_info = {
                 'id': category.id,
-                'title': getattr(category, f'name_{language}', None) or category.name,
-                'slogan': getattr(category, f'description_{language}', None) or category.description or '',
+                'title': translated(category, 'name', language),
+                'slogan': translated(category, 'description', language),
                 'hero_image': category.hero_image.url if category.hero_image else 'images/default_hero.png',
-                'breadcrumb': getattr(category, f'name_{language}', None) or category.name
+                'breadcrumb': translated(category, 'name', language)
             }
         else:
             # Первая активная категория по умолчанию
@@ -554,10 +599,10 @@ def products(request):
                 language = getattr(request, 'LANGUAGE_CODE', 'uz')
                 category_info = {
                     'id': category.id,
-                    'title': getattr(category, f'name_{language}', None) or category.name,
-                    'slogan': getattr(category, f'description_{language}', None) or category.description or '',
+                    'title': translated(category, 'name', language),
+                    'slogan': translated(category, 'description', language),
                     'hero_image': category.hero_image.url if category.hero_image else 'images/default_hero.png',
-                    'breadcrumb': getattr(category, f'name_{language}', None) or category.name
+                    'breadcrumb': translated(category, 'name', language)
                 }
                 category_slug = category.slug
             else:
@@ -605,7 +650,7 @@ def log_js_error(request):
         logger.error(f"Ошибка логирования JS ошибки: {str(e)}", exc_info=True)
         return Response({'status': 'error'}, status=500)
     
-class ProductCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductCategoryViewSet(CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     """API для категорий продуктов"""
     serializer_class = ProductCategorySerializer
     permission_classes = [AllowAny]
@@ -635,6 +680,24 @@ class ReviewCreateThrottle(AnonRateThrottle):
             'ident': ip,
         }
 
+    def allow_request(self, request, view):
+        # DRF get() + set() ni ishlatadi: bir vaqtdagi ikki so'rov turli workerlarda
+        # ikkalasi ham o'tib ketadi. Limit 1 bo'lganda cache.add() atomik band qiladi.
+        if self.rate is None or self.num_requests != 1:
+            return super().allow_request(request, view)
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        if self.cache.add(self.key, [self.now], self.duration):
+            self.history = [self.now]
+            return True
+
+        self.history = self.cache.get(self.key) or [self.now]
+        return self.throttle_failure()
+
     def wait(self):
         return super().wait()
 
@@ -756,7 +819,6 @@ class TestDriveViewSet(viewsets.GenericViewSet):
 
 from rest_framework.views import APIView
 from rest_framework.permissions import BasePermission
-from django.core.cache import cache
 
 
 class IsBotAuthenticated(BasePermission):
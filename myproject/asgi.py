@@ -8,9 +8,22 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
+import sys
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402 — after setup
+
+if settings.BOT_MODE == 'webhook':
+    # Telegram update lari shu jarayonda, bot.py dagi dp orqali ishlanadi
+    BOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Autoliga_Botfile')
+    if BOT_DIR not in sys.path:
+        sys.path.insert(0, BOT_DIR)
+
+    from webhook import TelegramWebhookRouter  # noqa: E402
+
+    application = TelegramWebhookRouter(application)
@@ -0,0 +1,221 @@
+"""
+Umumiy (shared) cache backend — tashqi servissiz.
+
+LocMemCache har bir jarayonda alohida: Passenger/gunicorn workerlari va bot
+jarayoni (Autoliga_Botfile/run_bot.py) bir-birining cache ini ko'rmaydi.
+SQLiteCache bitta serverdagi barcha jarayonlar uchun bitta fayl:
+
+- WAL rejimi: o'quvchilar yozuvchini kutmaydi
+- add() va incr() atomik (BEGIN IMMEDIATE) — rate limit hisoblagichlari
+  workerlar soniga ko'payib ketmaydi
+- butun sonlar INTEGER sifatida saqlanadi, qolganlari pickle
+
+settings.py:
+    CACHES = {'default': {
+        'BACKEND': 'myproject.cache_backends.SQLiteCache',
+        'LOCATION': '/path/to/cache.sqlite3',
+    }}
+"""
+
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class SQLiteCache(BaseCache):
+    """Jarayonlar orasida umumiy cache (bitta SQLite fayl)."""
+
+    # Har ~N-yozuvda eskirgan qatorlarni tozalash
+    CULL_PROBABILITY = 0.01
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = str(location)
+        self._local = threading.local()
+        options = params.get('OPTIONS', {})
+        self._busy_timeout = float(options.get('BUSY_TIMEOUT', 5))
+
+    # ============ CONNECTION ============
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        # fork() dan keyin (Passenger/gunicorn preload) ulanish qayta ochiladi
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self._path,
+                timeout=self._busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # ============ ENCODING ============
+
+    @staticmethod
+    def _encode(value):
+        # bool int ning avlodi, lekin uni pickle qilamiz (incr uchun faqat haqiqiy int)
+        if type(value) is int and -(2 ** 63) <= value < 2 ** 63:
+            return value
+        return sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+    @staticmethod
+    def _decode(raw):
+        if isinstance(raw, int):
+            return raw
+        return pickle.loads(raw)
+
+    def _expires(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    # ============ API ============
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'DELETE FROM cache WHERE key = ? AND expires IS NOT NULL AND expires <= ?',
+                (key, now),
+            )
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+                (key, self._encode(value), self._expires(timeout)),
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return cursor.rowcount == 1
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT value, expires FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return default
+        return self._decode(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._connection().execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+            (key, self._encode(value), self._expires(timeout)),
+        )
+        self._maybe_cull()
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            'UPDATE cache SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self._expires(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute('DELETE FROM cache WHERE key = ?', (key,))
+        return cursor.rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            if not isinstance(row[0], int):
+                raise ValueError(f"Key '{key}' is not an integer")
+            new_value = row[0] + delta
+            conn.execute('UPDATE cache SET value = ? WHERE key = ?', (new_value, key))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return new_value
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not key_map:
+            return {}
+        placeholders = ','.join('?' * len(key_map))
+        rows = self._connection().execute(
+            f'SELECT key, value FROM cache WHERE key IN ({placeholders}) '
+            f'AND (expires IS NULL OR expires > ?)',
+            (*key_map, time.time()),
+        ).fetchall()
+        return {key_map[key]: self._decode(value) for key, value in rows}
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self._expires(timeout)
+        rows = [
+            (self.make_and_validate_key(key, version=version), self._encode(value), expires)
+            for key, value in data.items()
+        ]
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)', rows)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._maybe_cull()
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if not keys:
+            return
+        placeholders = ','.join('?' * len(keys))
+        self._connection().execute(f'DELETE FROM cache WHERE key IN ({placeholders})', keys)
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    # ============ CULLING ============
+
+    def _maybe_cull(self):
+        if random.random() >= self.CULL_PROBABILITY:
+            return
+        conn = self._connection()
+        conn.execute('DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?', (time.time(),))
+        count = conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count > self._max_entries:
+            # Eng tez eskiradiganlarning 1/cull_frequency qismini o'chirish
+            conn.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
@@ -26,6 +26,23 @@ def _ip_cache_key(prefix, ip):
     return f"{prefix}:{ip_hash}"
 
 
+def _incr_counter(key, timeout):
+    """Hisoblagichni atomik oshirish (barcha workerlar uchun umumiy).
+
+    get() + set() o'rniga add() + incr(): ikki worker bir vaqtda
+    birinchi hitni yozsa ham hisob yo'qolmaydi. TTL birinchi hitdan boshlanadi.
+    Returns yangi qiymat.
+    """
+    if cache.add(key, 1, timeout=timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Key add() va incr() orasida eskirdi
+        cache.add(key, 1, timeout=timeout)
+        return 1
+
+
 # ============ LANGUAGE MIDDLEWARE ============
 
 class ForceRussianMiddleware:
@@ -264,19 +281,8 @@ class RateLimitMiddleware:
         rate_key = _ip_cache_key(f'rl:{prefix}', ip)
 
         try:
-            current = cache.get(rate_key, 0)
-            if current >= rule['limit']:
-                return False
-            # Atomic increment with TTL
-            # cache.incr fails if key doesn't exist in some backends
-            if current == 0:
-                cache.set(rate_key, 1, timeout=rule['window'])
-            else:
-                try:
-                    cache.incr(rate_key)
-                except ValueError:
-                    cache.set(rate_key, 1, timeout=rule['window'])
-            return True
+            # Avval oshirib, keyin tekshirish — parallel workerlar limitdan oshirib yubormaydi
+            return _incr_counter(rate_key, rule['window']) <= rule['limit']
         except Exception:
             # Cache xatosi bo'lsa -> request ni o'tkazib yuborish (fail-open)
             return True
@@ -285,9 +291,9 @@ class RateLimitMiddleware:
         """Violation counter. Threshold oshsa -> IP ni bloklash."""
         viol_key = _ip_cache_key('viol', ip)
         try:
-            count = cache.get(viol_key, 0)
-            if count + 1 >= self.VIOLATION_THRESHOLD:
-                # IP ni bloklash
+            count = _incr_counter(viol_key, self.VIOLATION_WINDOW)
+            if count == self.VIOLATION_THRESHOLD:
+                # IP ni bloklash (faqat threshold ga yetgan worker — bir marta)
                 block_key = _ip_cache_key('block', ip)
                 cache.set(block_key, 1, timeout=self.BLOCK_DURATION)
                 cache.delete(viol_key)
@@ -296,14 +302,6 @@ class RateLimitMiddleware:
                     f"({self.VIOLATION_THRESHOLD} violations in {self.VIOLATION_WINDOW}s, "
                     f"blocked for {self.BLOCK_DURATION}s)"
                 )
-            else:
-                if count == 0:
-                    cache.set(viol_key, 1, timeout=self.VIOLATION_WINDOW)
-                else:
-                    try:
-                        cache.incr(viol_key)
-                    except ValueError:
-                        cache.set(viol_key, 1, timeout=self.VIOLATION_WINDOW)
         except Exception:
             pass  # Cache xatosi bo'lsa -> bloklashni o'tkazib yuborish
 
@@ -349,7 +347,7 @@ class AdminBruteForceMiddleware:
         if response.status_code == 200:
             # Login muvaffaqiyatsiz
             try:
-                attempts = cache.get(attempts_key, 0) + 1
+                attempts = _incr_counter(attempts_key, self.LOCKOUT_DURATION)
                 if attempts >= self.MAX_ATTEMPTS:
                     cache.set(lockout_key, 1, timeout=self.LOCKOUT_DURATION)
                     cache.delete(attempts_key)
@@ -357,8 +355,6 @@ class AdminBruteForceMiddleware:
                         f"Admin brute force detected, IP locked: {ip} "
                         f"({self.MAX_ATTEMPTS} failed attempts)"
                     )
-                else:
-                    cache.set(attempts_key, attempts, timeout=self.LOCKOUT_DURATION)
             except Exception:
                 pass
         elif response.status_code == 302:
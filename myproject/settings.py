@@ -74,8 +74,14 @@ REST_FRAMEWORK = {
         'anon': '100/minute',
         'review_create': '1/hour',
     },
+    # orjson, если установлен (main/fast_json.py); иначе стандартный json
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'main.fast_json.JSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'main.fast_json.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
@@ -151,6 +157,11 @@ JAZZMIN_SETTINGS = {
             "url": "https://autoliga.uz",
             "icon": "fas fa-flag",
             "new_window": True
+        }, {
+            "name": "Статистика бота",
+            "url": "admin:telegramuser_bot_stats",
+            "icon": "fas fa-tachometer-alt",
+            "permissions": ["main.view_telegramuser"]
         }]
     },
     
@@ -237,17 +248,93 @@ DATABASES = {
 }
 
 # ============ CACHE ============
-CACHES = {
-    'default': {
+# Кэш общий для всех воркеров сайта и процесса бота (rate limit, throttle, bot:*,
+# сброс по сигналам). LocMem оставлен только для локальной отладки.
+#   sqlite — один файл на сервере, без внешних сервисов (по умолчанию)
+#   file   — FileBasedCache (каталог)
+#   redis  — нужен пакет redis и REDIS_URL
+CACHE_BACKEND = config('CACHE_BACKEND', default='sqlite')
+
+if CACHE_BACKEND == 'redis':
+    _cache_options = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
+    }
+elif CACHE_BACKEND == 'file':
+    _cache_options = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'cache' / 'autoliga-cache')),
+    }
+elif CACHE_BACKEND == 'locmem':
+    _cache_options = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'autoliga-cache',
+    }
+else:
+    _cache_options = {
+        'BACKEND': 'myproject.cache_backends.SQLiteCache',
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'cache' / 'autoliga-cache.sqlite3')),
+    }
+
+CACHES = {
+    'default': {
+        **_cache_options,
+        'KEY_PREFIX': 'autoliga',
         'TIMEOUT': 300,
     }
 }
 
+# Кэш контекста главной страницы (сбрасывается сигналами при изменениях в админке)
+HOME_PAGE_CACHE_TIMEOUT = config('HOME_PAGE_CACHE_TIMEOUT', default=600, cast=int)
+# Кэш JSON-ответов API товаров (ключ включает версию каталога — сигналы поднимают её при изменениях)
+API_CATALOG_CACHE_TIMEOUT = config('API_CATALOG_CACHE_TIMEOUT', default=3600, cast=int)
+
 # Bot API token authentication
 BOT_API_TOKEN = config('BOT_API_TOKEN', default='')
 
+# ============ TELEGRAM BOT ============
+# polling — отдельный процесс (run_bot.sh); webhook — обновления через ASGI (myproject/asgi.py)
+BOT_MODE = config('BOT_MODE', default='polling')
+BOT_WEBHOOK_BASE_URL = config('BOT_WEBHOOK_BASE_URL', default='https://autoliga.uz')
+BOT_WEBHOOK_PATH = config('BOT_WEBHOOK_PATH', default='/telegram/webhook/')
+BOT_WEBHOOK_SECRET = config('BOT_WEBHOOK_SECRET', default='')
+BOT_WEBHOOK_DEDUP_WINDOW = config('BOT_WEBHOOK_DEDUP_WINDOW', default=600, cast=int)  # секунд
+# Обновления из webhook обрабатывает один ASGI-воркер — владелец аренды; остальные передают
+# ему свои через таблицу BotUpdate, он забирает их раз в POLL_INTERVAL (Autoliga_Botfile/utils/inbox.py)
+BOT_WEBHOOK_LEASE_TTL = config('BOT_WEBHOOK_LEASE_TTL', default=15, cast=int)  # секунд
+BOT_WEBHOOK_POLL_INTERVAL = config('BOT_WEBHOOK_POLL_INTERVAL', default=0.5, cast=float)  # секунд
+# Уведомления о заявках в группу менеджеров (TelegramNotificationSender, бот — utils/notify.py)
+TELEGRAM_BOT_TOKEN = config('TELEGRAM_BOT_TOKEN', default='')
+TELEGRAM_CHAT_ID = config('TELEGRAM_CHAT_ID', default='')
+# Рассылка пользователям бота (python manage.py send_broadcast) — токен клиентского бота
+BOT_TOKEN = config('BOT_TOKEN', default='')
+# Лимит Telegram ~30 сообщений/сек на бота и ~1/сек в один чат — держимся ниже
+BOT_BROADCAST_RATE = config('BOT_BROADCAST_RATE', default=25, cast=float)              # сообщений/сек
+BOT_BROADCAST_CHAT_INTERVAL = config('BOT_BROADCAST_CHAT_INTERVAL', default=1, cast=float)  # секунд
+BOT_BROADCAST_WORKERS = config('BOT_BROADCAST_WORKERS', default=8, cast=int)
+BOT_BROADCAST_BATCH_SIZE = config('BOT_BROADCAST_BATCH_SIZE', default=200, cast=int)    # чекпоинт в БД
+
+# ============ ВНЕШНИЕ HTTP-ЗАПРОСЫ ============
+# Общий пул соединений для amoCRM / Telegram / reCAPTCHA (main/services/http_client.py)
+HTTP_CLIENT_CONNECT_TIMEOUT = config('HTTP_CLIENT_CONNECT_TIMEOUT', default=5, cast=float)
+HTTP_CLIENT_READ_TIMEOUT = config('HTTP_CLIENT_READ_TIMEOUT', default=10, cast=float)
+HTTP_CLIENT_RETRIES = config('HTTP_CLIENT_RETRIES', default=2, cast=int)
+HTTP_CLIENT_POOL_SIZE = config('HTTP_CLIENT_POOL_SIZE', default=10, cast=int)
+
+# ============ amoCRM ============
+# Кэш статусов воронки (прогрев: python manage.py prewarm_amocrm_cache)
+AMOCRM_PIPELINE_CACHE_TTL = config('AMOCRM_PIPELINE_CACHE_TTL', default=3600, cast=int)  # секунд
+# Лидов в одном запросе /api/v4/leads/complex при пакетной переотправке (лимит amoCRM — 50)
+AMOCRM_BULK_CHUNK_SIZE = config('AMOCRM_BULK_CHUNK_SIZE', default=50, cast=int)
+
+# ============ ОЧЕРЕДЬ ОТПРАВКИ ЗАЯВОК ============
+# Заявки отправляются в amoCRM/Telegram фоновым воркером: python manage.py run_outbox
+LEAD_OUTBOX_MAX_ATTEMPTS = config('LEAD_OUTBOX_MAX_ATTEMPTS', default=8, cast=int)
+LEAD_OUTBOX_BACKOFF_BASE = config('LEAD_OUTBOX_BACKOFF_BASE', default=30, cast=int)     # секунд
+LEAD_OUTBOX_BACKOFF_MAX = config('LEAD_OUTBOX_BACKOFF_MAX', default=3600, cast=int)     # секунд
+LEAD_OUTBOX_BATCH_SIZE = config('LEAD_OUTBOX_BATCH_SIZE', default=20, cast=int)
+LEAD_OUTBOX_POLL_INTERVAL = config('LEAD_OUTBOX_POLL_INTERVAL', default=2, cast=int)    # секунд
+
 # ============ ВАЛИДАЦИЯ ПАРОЛЕЙ ============
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -272,6 +359,8 @@ STATICFILES_DIRS = []
 
 
 MEDIA_URL = '/media/'
+# Базовый URL медиа на CDN (например https://cdn.autoliga.uz/media/); пусто — хост запроса + MEDIA_URL
+MEDIA_CDN_URL = config('MEDIA_CDN_URL', default='')
 MEDIA_ROOT = BASE_DIR / 'media' if DEBUG else '/home/autolig1/public_html/media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'